@@ -0,0 +1,34 @@
+"""Shared helpers for the benchmark management commands, which run against a throwaway test database."""
+
+import statistics
+import time
+from contextlib import contextmanager
+from django.test.utils import setup_databases, teardown_databases
+
+# Vocabulary used to build synthetic offer titles and descriptions.
+WORDS = [
+    'website', 'design', 'logo', 'branding', 'seo', 'marketing', 'video', 'editing', 'python', 'django',
+    'react', 'mobile', 'app', 'wordpress', 'shop', 'copywriting', 'translation', 'podcast', 'animation',
+    'illustration', 'photo', 'retouching', 'consulting', 'data', 'analysis', 'newsletter', 'social', 'media',
+    'landing', 'page', 'ux', 'audit', 'security', 'hosting', 'migration', 'database', 'api', 'integration',
+]
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """Create a fresh, fully migrated test database and drop it afterwards so real data is never touched."""
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+
+
+def time_call(func, repeat=5, clock=time.perf_counter):
+    """Run func repeatedly and return the median time in milliseconds, wall-clock unless another clock is given."""
+    timings = []
+    for _ in range(repeat):
+        start = clock()
+        func()
+        timings.append((clock() - start) * 1000)
+    return statistics.median(timings)
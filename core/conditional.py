@@ -0,0 +1,100 @@
+"""Helpers for conditional requests using weak ETags and Last-Modified values derived from row timestamps."""
+
+import hashlib
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    """Raised when an If-Match header no longer matches the current version of a resource."""
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has been modified since it was retrieved.'
+    default_code = 'precondition_failed'
+
+
+def build_validators(*parts, last_modified):
+    """Return a weak ETag over the version parts and Last-Modified as epoch seconds."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"', int(last_modified.timestamp())
+
+
+def not_modified_response(request, validators):
+    """Return a 304 response if the client's cached copy is still current, otherwise None."""
+    if validators is None or request.method not in ('GET', 'HEAD'):
+        return None
+    etag, last_modified = validators
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def check_if_match(request, validators):
+    """Reject the write with 412 if If-Match names a version other than the current one.
+
+    The ETags identify row versions rather than exact bytes, so they are compared weakly. Returns True when the
+    write must then be conditional on the version checked, that is when If-Match names specific versions.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if not header or validators is None:
+        return False
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return False
+    current = validators[0].removeprefix('W/')
+    if current not in [etag.removeprefix('W/') for etag in etags]:
+        raise PreconditionFailed()
+    return True
+
+
+def claim_version(instance, field='updated_at'):
+    """Move an instance's row off the version it was read at, or reject the write with 412 if another write did.
+
+    A compare-and-swap, UPDATE ... WHERE pk = %s AND updated_at = <version read>, run first in the write's
+    transaction: of two writers that passed If-Match with the same version, only one updates a row.
+    """
+    rows = type(instance)._default_manager.filter(pk=instance.pk, **{field: getattr(instance, field)})
+    if not rows.update(**{field: timezone.now()}):
+        raise PreconditionFailed()
+
+
+def set_validator_headers(response, validators):
+    """Attach ETag and Last-Modified headers to a response."""
+    if validators is None:
+        return response
+    etag, last_modified = validators
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalObjectMixin:
+    """Adds 304 responses to retrieve and If-Match checks to updates of a generic detail view.
+
+    Subclasses implement get_validators(), which must read the version cheaply without serializing.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError('Subclasses must return (etag, last_modified) or None.')
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+        return set_validator_headers(super().retrieve(request, *args, **kwargs), validators)
+
+    def perform_update(self, serializer):
+        # Checked after get_object() so permission errors take precedence over version conflicts.
+        if not check_if_match(self.request, self.get_validators()):
+            super().perform_update(serializer)
+            return
+        # The version claimed is the one get_object() read, so a write landing after that fails the claim.
+        with transaction.atomic():
+            claim_version(serializer.instance)
+            super().perform_update(serializer)
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        return set_validator_headers(response, self.get_validators())
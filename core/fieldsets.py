@@ -0,0 +1,91 @@
+"""Sparse fieldsets for list endpoints: ?fields= and ?omit= pick the output fields and the columns read for them."""
+
+from collections import namedtuple
+from django.db.models import Prefetch
+from rest_framework import exceptions
+
+# Model columns, joins and prefetches an output field reads; the primary key is always selected.
+FieldSource = namedtuple('FieldSource', ['columns', 'select_related', 'prefetch_related'], defaults=[(), ()])
+
+
+def parse_field_list(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def get_sparse_fields(request, available):
+    """Resolve ?fields= and ?omit= into the set of selected output fields, or None when all are wanted."""
+    fields = parse_field_list(request.query_params.get('fields', ''))
+    omit = parse_field_list(request.query_params.get('omit', ''))
+    if not fields and not omit:
+        return None
+    unknown = [name for name in fields + omit if name not in available]
+    if unknown:
+        raise exceptions.ValidationError({'fields': f'Unknown field(s): {", ".join(unknown)}.'})
+    return set(fields or available) - set(omit)
+
+
+class SparseFieldsetSerializerMixin:
+    """Removes the fields a view did not select, so they are neither read from the instance nor computed.
+
+    sparse_sources maps output names that are not plain serializer fields to the serializer fields they
+    are built from in to_representation(); such subclasses check wants() before computing them.
+    """
+    sparse_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.sparse_fields
+        if selected is None:
+            return
+        needed = set()
+        for name in selected:
+            needed.update(self.sparse_sources.get(name, (name,)))
+        for name in list(self.fields):
+            if name not in needed:
+                self.fields.pop(name)
+
+    @property
+    def sparse_fields(self):
+        return self.context.get('sparse_fields')
+
+    def wants(self, name):
+        """Check whether an output field was selected."""
+        return self.sparse_fields is None or name in self.sparse_fields
+
+
+class SparseFieldsetViewMixin:
+    """Adds ?fields= and ?omit= to a list view, described by field_sources (output name -> FieldSource)."""
+    field_sources = {}
+
+    def get_sparse_fields(self):
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = get_sparse_fields(self.request, self.field_sources)
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def apply_sparse_fieldset(self, queryset, columns=()):
+        """Limit the queryset to the columns, joins and prefetches of the selected fields.
+
+        columns names extra columns the view itself reads, such as keys used by cursor pagination.
+        """
+        selected = self.get_sparse_fields()
+        if selected is None:
+            return queryset
+        sources = [self.field_sources[name] for name in selected]
+        columns = {*columns, *(column for source in sources for column in source.columns)}
+        select_related = {path for source in sources for path in source.select_related}
+        prefetches = {}
+        for source in sources:
+            for prefetch in source.prefetch_related:
+                lookup = prefetch.prefetch_to if isinstance(prefetch, Prefetch) else prefetch
+                prefetches[lookup] = prefetch
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches.values())
+        return queryset.only(queryset.model._meta.pk.name, *columns)
@@ -0,0 +1,57 @@
+"""Hyperlink field that reverses its route once and fills in lookup values by string formatting."""
+
+from urllib.parse import quote
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+from rest_framework import serializers
+
+# Stand-in lookup value reversed once to locate the lookup in the route; it has to satisfy int converters too.
+PLACEHOLDER = 918273645546372819
+# (view name, lookup kwarg, urlconf, script prefix) -> (path before the lookup, path after it), or None.
+_route_templates = {}
+
+
+def route_template(view_name, lookup_url_kwarg):
+    """Return the path of a route split around its lookup value, resolved once per process and prefix."""
+    key = (view_name, lookup_url_kwarg, get_urlconf(), get_script_prefix())
+    if key not in _route_templates:
+        path = reverse(view_name, kwargs={lookup_url_kwarg: PLACEHOLDER})
+        parts = path.split(str(PLACEHOLDER))
+        # A path that contains the stand-in anywhere else cannot be split safely.
+        _route_templates[key] = tuple(parts) if len(parts) == 2 else None
+    return _route_templates[key]
+
+
+class TemplatedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    """HyperlinkedIdentityField producing the same URLs without a reverse() and build_absolute_uri() per item.
+
+    The absolute URL prefix is built once per request and reused for every item the field serializes;
+    versioned or format-suffixed links fall back to DRF's per-item reverse.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (request, absolute prefix, suffix) of the request the field last served.
+        self._template = None
+
+    def get_template(self, request):
+        if self._template is None or self._template[0] is not request:
+            template = route_template(self.view_name, self.lookup_url_kwarg)
+            if template is None:
+                return None
+            prefix, suffix = template
+            self._template = (request, request.build_absolute_uri(prefix), suffix)
+        return self._template[1:]
+
+    def get_url(self, obj, view_name, request, format):
+        if format or request is None or getattr(request, 'versioning_scheme', None) is not None:
+            return super().get_url(obj, view_name, request, format)
+        # Unsaved objects will not yet have a valid URL.
+        if hasattr(obj, 'pk') and obj.pk in (None, ''):
+            return None
+        template = self.get_template(request)
+        if template is None:
+            return super().get_url(obj, view_name, request, format)
+        prefix, suffix = template
+        lookup_value = quote(str(getattr(obj, self.lookup_field)), safe=RFC3986_SUBDELIMS + '/~:@')
+        return f'{prefix}{lookup_value}{suffix}'
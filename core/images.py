@@ -0,0 +1,152 @@
+"""Image variant pipeline that renders resized, re-encoded copies of uploaded images in a worker pool."""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> (width, height, crop). Cropped variants fill the box, the others fit inside it.
+IMAGE_VARIANTS = {
+    'thumbnail': (160, 160, True),
+    'card': (480, 360, True),
+    'full': (1600, 1600, False),
+}
+# Output formats per variant: a JPEG for every client plus a smaller WebP for those that accept it.
+IMAGE_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+_executor = None
+
+
+def get_executor():
+    """Return the shared worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+            thread_name_prefix='image-variants'
+        )
+    return _executor
+
+
+def variant_name(source_name, variant, extension):
+    """Build the storage path of a variant next to its source image."""
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}_{variant}.{extension}')
+
+
+def render_variants(source_name, storage=default_storage):
+    """Render every variant of a stored image and return the mapping stored on the model."""
+    with storage.open(source_name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    variants = {'source': source_name}
+    for variant, (width, height, crop) in IMAGE_VARIANTS.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+        variants[variant] = {}
+        for key, (image_format, extension, options) in IMAGE_FORMATS.items():
+            # JPEG has no alpha channel, so transparent images are flattened for that format only.
+            output = resized.convert('RGB') if image_format == 'JPEG' else resized
+            buffer = BytesIO()
+            output.save(buffer, format=image_format, **options)
+            name = variant_name(source_name, variant, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            variants[variant][key] = storage.save(name, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def delete_variants(variants, storage=default_storage):
+    """Remove the files of a previously rendered variant mapping."""
+    for variant in IMAGE_VARIANTS:
+        for name in (variants or {}).get(variant, {}).values():
+            if storage.exists(name):
+                storage.delete(name)
+
+
+def generate_variants(model, pk, field_name, variants_field, on_stored=None):
+    """Render variants for one row and store them, unless the image changed in the meantime.
+
+    on_stored is called with the primary key once the variants are stored.
+    """
+    try:
+        row = model.objects.filter(pk=pk).values(field_name, variants_field).first()
+        if not row or not row[field_name]:
+            return None
+        source_name = row[field_name]
+        previous = row[variants_field] or {}
+        if previous.get('source') and previous['source'] != source_name:
+            delete_variants(previous)
+        variants = render_variants(source_name)
+        # update() skips auto_now, so it is applied here; the representation changed, and so must its ETag.
+        now = timezone.now()
+        touched = {field.name: now for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)}
+        # Only store the result if the row still points at the image that was rendered.
+        stored = model.objects.filter(pk=pk, **{field_name: source_name}).update(**{variants_field: variants}, **touched)
+        if stored and on_stored is not None:
+            on_stored(pk)
+        return variants
+    except Exception:
+        logger.exception('Rendering image variants failed for %s %s', model.__name__, pk)
+        return None
+
+
+def generate_variants_in_worker(*args):
+    """Run generate_variants on a pool thread, which manages its own database connection."""
+    close_old_connections()
+    try:
+        return generate_variants(*args)
+    finally:
+        close_old_connections()
+
+
+def variants_are_current(instance, field_name, variants_field):
+    """Check whether the stored variants belong to the instance's current image."""
+    image = getattr(instance, field_name)
+    variants = getattr(instance, variants_field) or {}
+    return not image or variants.get('source') == image.name
+
+
+def schedule_variants(instance, field_name, variants_field, on_stored=None):
+    """Queue variant rendering for an instance after the surrounding transaction commits."""
+    if variants_are_current(instance, field_name, variants_field):
+        return
+    model, pk = type(instance), instance.pk
+
+    def submit():
+        if getattr(settings, 'IMAGE_VARIANTS_ASYNC', True):
+            get_executor().submit(generate_variants_in_worker, model, pk, field_name, variants_field, on_stored)
+        else:
+            generate_variants(model, pk, field_name, variants_field, on_stored)
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(image, variants, request=None, storage=default_storage):
+    """Turn a stored variant mapping into (absolute) URLs, or None while rendering for the image is pending."""
+    if not image or not variants or variants.get('source') != image.name:
+        return None
+    urls = {}
+    for variant in IMAGE_VARIANTS:
+        urls[variant] = {}
+        for key, name in variants.get(variant, {}).items():
+            url = storage.url(name)
+            urls[variant][key] = request.build_absolute_uri(url) if request is not None else url
+    return urls
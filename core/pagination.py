@@ -0,0 +1,126 @@
+"""Keyset (cursor) pagination that pages on (field, id) without COUNT or OFFSET queries."""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """Paginates by seeking past the (field, id) position of the last row instead of counting and offsetting."""
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+    # Maps the value of the ordering query parameter to a (field, descending) key; None is the default.
+    orderings = {None: ('created_at', True)}
+
+    @classmethod
+    def is_requested(cls, request):
+        """Check whether the client asked for cursor pagination."""
+        return request.query_params.get('pagination') == 'cursor' or cls.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request):
+        """Resolve the keyset ordering from the ordering query parameter."""
+        ordering = request.query_params.get('ordering')
+        if ordering not in self.orderings:
+            ordering = None
+        return ordering, *self.orderings[ordering]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        self.page_size = self.get_page_size(request)
+        self.ordering, self.field, self.descending = self.get_ordering(request)
+        model_field = queryset.model._meta.get_field(self.field)
+        position = self.decode_cursor(request, model_field)
+        # Walking backwards flips the sort so the rows closest to the cursor are fetched first.
+        reverse = position is not None and position['reverse']
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if position is not None:
+            lookup = 'lt' if descending else 'gt'
+            # The redundant inclusive bound lets the database turn the seek into an index range.
+            queryset = self.seek(queryset, Q(**{f'{self.field}__{lookup}e': position['value']}) & (
+                Q(**{f'{self.field}__{lookup}': position['value']}) |
+                Q(**{self.field: position['value'], f'id__{lookup}': position['id']})
+            ))
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.model_field = model_field
+        self.page = rows
+        return rows
+
+    def seek(self, queryset, condition):
+        """Keep the rows past the cursor position; override for querysets that cannot be filtered, like a UNION."""
+        return queryset.filter(condition)
+
+    def encode_cursor(self, row, reverse):
+        """Build an opaque URL for the position of the given row."""
+        payload = {
+            'o': self.ordering,
+            'v': self.model_field.value_to_string(row),
+            'i': row.pk,
+            'r': reverse,
+        }
+        token = urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model_field):
+        """Parse the cursor query parameter into a position, rejecting tampered or mismatched cursors."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode()))
+            if payload['o'] != self.ordering:
+                raise ValueError('Cursor was issued for a different ordering.')
+            return {
+                'value': model_field.to_python(payload['v']),
+                'id': int(payload['i']),
+                'reverse': bool(payload['r']),
+            }
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
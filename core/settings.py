@@ -165,4 +165,68 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10, 
     'PAGE_SIZE_QUERY_PARAM': 'page_size', 
     'MAX_PAGE_SIZE': 10 
-}
\ No newline at end of file
+}
+
+# Offer search
+# Dotted path to a backend in offers_app.search; None picks FTS5 on SQLite and tsvector on PostgreSQL.
+
+OFFER_SEARCH_BACKEND = None
+
+# Typo-tolerant search (?search_mode=fuzzy) through the per-process trigram index in offers_app.trigrams.
+# Query words match indexed words with at least THRESHOLD trigram similarity; the index is reloaded after MAX_AGE seconds.
+# All matches are listed; the LIMIT best ones are ranked by similarity and the rest follow newest first.
+# Plain fuzzy list pages are ranked and paged from the index, fetching only the page's rows: at 500k offers that
+# took 5-26 ms for one or two words and about 85 ms for three broad words (benchmark_offer_search). With other
+# filters, orderings or facets every match goes to the database as one parameter, 100-600 ms at that size.
+OFFER_FUZZY_SEARCH_THRESHOLD = 0.3
+OFFER_FUZZY_SEARCH_LIMIT = 200
+OFFER_TRIGRAM_INDEX_MAX_AGE = 300
+
+# Title autocomplete (/api/offers/suggest/) through the per-process prefix index in offers_app.suggest.
+# At most MAX_TITLES distinct titles are held, the most popular ones; the index is reloaded after MAX_AGE seconds.
+OFFER_SUGGEST_MAX_TITLES = 100_000
+OFFER_SUGGEST_MAX_AGE = 300
+
+# Similar offers (/api/offers/<pk>/similar/), precomputed by the build_similar_offers command.
+OFFER_SIMILAR_COUNT = 10
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Point the 'offers' alias at FileBasedCache or a shared store (e.g. Redis) to share cached lists between processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'offers': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'offers',
+    },
+}
+
+OFFER_LIST_CACHE_ENABLED = True
+OFFER_LIST_CACHE_ALIAS = 'offers'
+OFFER_LIST_CACHE_TIMEOUT = 300
+
+
+# Offer catalog snapshot
+# Optional per-process column store of the list filter and sort fields (offers_app.snapshot).
+# Writes from other processes are picked up by the full reload after MAX_AGE seconds.
+
+OFFER_CATALOG_SNAPSHOT_ENABLED = False
+OFFER_CATALOG_SNAPSHOT_MAX_AGE = 60
+
+
+# Order history
+# The plain /api/orders/ list stays a bare JSON array for existing clients but holds at most MAX_RESULTS orders,
+# the newest; a Link header then points at the cursor-paginated rest. ?stream=true still returns every order.
+
+ORDER_LIST_MAX_RESULTS = 1000
+
+
+# Image variants
+# Resized copies of uploaded images are rendered by core.images on a thread pool after commit.
+
+IMAGE_VARIANTS_ASYNC = True
+IMAGE_VARIANT_WORKERS = 2
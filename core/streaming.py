@@ -0,0 +1,46 @@
+"""Streamed JSON list responses that serialize a queryset chunk by chunk instead of materializing it."""
+
+import json
+from itertools import islice
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def is_stream_requested(request):
+    """Check whether the client opted into a streamed response with ?stream=true."""
+    return request.query_params.get('stream') in ('1', 'true')
+
+
+def stream_json_list(queryset, serialize, chunk_size=500):
+    """Yield a JSON array of the queryset's rows, serializing chunk_size rows at a time.
+
+    serialize receives a list of instances and returns their representations, e.g. serializer(many=True).data.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    yield '['
+    separator = ''
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield separator + ','.join(encoder.encode(item) for item in serialize(chunk))
+        separator = ','
+    yield ']'
+
+
+class StreamingListMixin:
+    """Lets a list view answer ?stream=true with the whole filtered queryset as a streamed JSON array."""
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if not is_stream_requested(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def serialize(chunk):
+            return self.get_serializer(chunk, many=True).data
+
+        return StreamingHttpResponse(
+            stream_json_list(queryset, serialize, self.stream_chunk_size), content_type='application/json'
+        )
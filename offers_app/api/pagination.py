@@ -0,0 +1,18 @@
+"""Keyset (cursor) pagination for the offer catalog."""
+
+from rest_framework import exceptions
+from core.pagination import KeysetCursorPagination
+
+
+class OfferCursorPagination(KeysetCursorPagination):
+    """Keyset pagination for the offer catalog, opted into with ?pagination=cursor or a cursor parameter."""
+    orderings = {
+        None: ('created_at', True),
+        'updated_at': ('updated_at', False),
+        'min_price': ('min_price', False),
+    }
+
+    def get_ordering(self, request):
+        if request.query_params.get('ordering') == 'relevance':
+            raise exceptions.ValidationError({'ordering': 'Relevance ordering is not supported with cursor pagination.'})
+        return super().get_ordering(request)
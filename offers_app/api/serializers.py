@@ -1,13 +1,20 @@
 """Serializers for the offers_app to handle Offer and OfferDetail data in Django REST Framework."""
 
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers
-from offers_app.models import Offer, OfferDetail
-from profiles_app.models import Profile
+from offers_app.models import Offer, OfferDetail, SimilarOffer
+from offers_app.cache import invalidate_offer_list_cache_after_write
+from offers_app.snapshot import mark_offers_changed
+from core.fieldsets import SparseFieldsetSerializerMixin
+from core.hyperlinks import TemplatedHyperlinkedIdentityField
+from core.images import variant_urls
 
 
 class OfferDetailSerializer(serializers.ModelSerializer):
     """Serializes basic OfferDetail fields for read-only access."""
-    url = serializers.HyperlinkedIdentityField(
+    url = TemplatedHyperlinkedIdentityField(
         view_name='offerdetail-detail',
         lookup_field='id'
     )
@@ -26,28 +33,33 @@ class FullOfferDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type']
 
 
-class OfferListSerializer(serializers.ModelSerializer):
-    """Serializes Offer data with nested details and user profile information."""
+class OfferListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Serializes Offer data with nested details and user profile information, limited to the selected fields."""
     user_details = serializers.SerializerMethodField()
     details = OfferDetailSerializer(many=True, read_only=True)
     # Format timestamps in ISO format without microseconds.
     created_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%SZ', read_only=True)
     updated_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%SZ', read_only=True)
     image = serializers.ImageField(allow_null=True, required=False)
-    min_price = serializers.DecimalField(source='annotated_min_price', max_digits=10, decimal_places=2, read_only=True)  # Uses annotated value from the model.
+    image_variants = serializers.SerializerMethodField()
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)  # Uses the stored value from the model.
     min_delivery_time = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Offer
         fields = [
-            'id', 'user', 'title', 'image', 'description',
+            'id', 'user', 'title', 'image', 'image_variants', 'description',
             'created_at', 'updated_at', 'details', 'min_price',
             'min_delivery_time', 'user_details'
         ]
 
+    def get_image_variants(self, obj):
+        """Return URLs of the resized image variants, or None until they have been rendered."""
+        return variant_urls(obj.image, obj.image_variants, self.context.get('request'))
+
     def get_user_details(self, obj):
-        """Retrieve user profile details for the offer's owner."""
-        profile = Profile.objects.get(user=obj.user)
+        """Retrieve user profile details for the offer's owner from the joined profile."""
+        profile = obj.user.profile
         return {
             'first_name': profile.first_name or '',
             'last_name': profile.last_name or '',
@@ -55,6 +67,19 @@ class OfferListSerializer(serializers.ModelSerializer):
         }
 
 
+class SimilarOfferSerializer(serializers.ModelSerializer):
+    """Serializes a precomputed neighbour as a short summary of the similar offer with its score."""
+    id = serializers.IntegerField(source='similar_id', read_only=True)
+    title = serializers.CharField(source='similar.title', read_only=True)
+    image = serializers.ImageField(source='similar.image', read_only=True)
+    min_price = serializers.DecimalField(source='similar.min_price', max_digits=10, decimal_places=2, read_only=True)
+    min_delivery_time = serializers.IntegerField(source='similar.min_delivery_time', read_only=True)
+
+    class Meta:
+        model = SimilarOffer
+        fields = ['id', 'title', 'image', 'min_price', 'min_delivery_time', 'score']
+
+
 class OfferCreateSerializer(serializers.ModelSerializer):
     """Serializes data for creating new offers with nested details."""
     details = FullOfferDetailSerializer(many=True)
@@ -82,6 +107,39 @@ class OfferCreateSerializer(serializers.ModelSerializer):
         return offer
 
 
+class OfferBulkCreateListSerializer(serializers.ListSerializer):
+    """Creates many offers and their details with batched inserts inside one transaction."""
+    batch_size = 500
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        offers, details = [], []
+        for item in validated_data:
+            details_data = item.pop('details')
+            # Bulk inserts skip the detail signals, so the stored min values are set up front.
+            offer = Offer(user=user, **item, **Offer.min_values_from_details(details_data))
+            offers.append(offer)
+            details.append(details_data)
+        with transaction.atomic():
+            Offer.objects.bulk_create(offers, batch_size=self.batch_size)
+            OfferDetail.objects.bulk_create(
+                [OfferDetail(offer=offer, **detail_data) for offer, details_data in zip(offers, details) for detail_data in details_data],
+                batch_size=self.batch_size
+            )
+            invalidate_offer_list_cache_after_write()
+            mark_offers_changed(offer.pk for offer in offers)
+        prefetch_related_objects(offers, 'details')
+        return offers
+
+
+class OfferBulkItemSerializer(OfferCreateSerializer):
+    """Serializes one offer of a bulk creation request; images stay on the single-offer endpoint."""
+
+    class Meta(OfferCreateSerializer.Meta):
+        fields = ['id', 'title', 'description', 'details']
+        list_serializer_class = OfferBulkCreateListSerializer
+
+
 class OfferUpdateSerializer(OfferCreateSerializer):
     """Serializes data for updating existing offers with optional nested details."""
     details = FullOfferDetailSerializer(many=True, required=False, partial=True)
@@ -99,14 +157,41 @@ class OfferUpdateSerializer(OfferCreateSerializer):
 
     def update(self, instance, validated_data):
         details_data = validated_data.pop('details', [])
+        update_fields = list(validated_data) + ['updated_at']
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            # Load all tiers once (or reuse the prefetched ones) instead of querying per offer_type.
+            tiers = {tier.offer_type: tier for tier in instance.details.all()} if details_data else {}
+            changed_details, changed_fields = self.apply_detail_changes(tiers, details_data)
+            if changed_details:
+                # bulk_update() skips pre_save, so auto_now is applied here to keep detail ETags current.
+                now = timezone.now()
+                for detail in changed_details:
+                    detail.updated_at = now
+                OfferDetail.objects.bulk_update(changed_details, changed_fields + ['updated_at'])
+                # Keep the stored min values in step with the tiers inside the same transaction.
+                min_values = Offer.min_values_from_details([
+                    {'price': tier.price, 'delivery_time_in_days': tier.delivery_time_in_days}
+                    for tier in tiers.values()
+                ])
+                for attr, value in min_values.items():
+                    setattr(instance, attr, value)
+                update_fields += list(min_values)
+            instance.save(update_fields=update_fields)
+        return instance
+
+    def apply_detail_changes(self, tiers, details_data):
+        """Apply tier changes in memory, returning the modified details and the fields that actually changed."""
+        changed_details, changed_fields = [], set()
         for detail_data in details_data:
-            offer_type = detail_data.pop('offer_type')
-            detail = OfferDetail.objects.filter(offer=instance, offer_type=offer_type).first()
-            if detail:
-                for attr, value in detail_data.items():
+            detail = tiers.get(detail_data['offer_type'])
+            if detail is None:
+                continue
+            for attr, value in detail_data.items():
+                if attr != 'offer_type' and getattr(detail, attr) != value:
                     setattr(detail, attr, value)
-                detail.save()
-        return instance
\ No newline at end of file
+                    changed_fields.add(attr)
+                    if detail not in changed_details:
+                        changed_details.append(detail)
+        return changed_details, sorted(changed_fields)
\ No newline at end of file
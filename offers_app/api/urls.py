@@ -1,12 +1,16 @@
 """URL configuration for the offers_app, defining API endpoints for offer-related views."""
 
 from django.urls import path
-from .views import OfferListView, OfferDetailView, OfferSpecificView
+from .views import OfferListView, OfferDetailView, OfferSpecificView, OfferBulkCreateView, OfferSuggestView, OfferSimilarView, OfferExportView
 
 
 # Define URL patterns for offer-related API endpoints.
 urlpatterns = [
     path('offers/', OfferListView.as_view(), name='offer-list'),
+    path('offers/bulk/', OfferBulkCreateView.as_view(), name='offer-bulk-create'),
+    path('offers/suggest/', OfferSuggestView.as_view(), name='offer-suggest'),
+    path('offers/export/', OfferExportView.as_view(), name='offer-export'),
     path('offers/<int:pk>/', OfferSpecificView.as_view(), name='offer-detail'),
+    path('offers/<int:pk>/similar/', OfferSimilarView.as_view(), name='offer-similar'),
     path('offerdetails/<int:id>/', OfferDetailView.as_view(), name='offerdetail-detail'),
 ]
\ No newline at end of file
@@ -1,18 +1,30 @@
 """API views for managing offers and offer details in Django REST Framework."""
 
-from django.db.models import Q, Min
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from offers_app.models import Offer, OfferDetail
-from django.db.models.functions import Coalesce
+from offers_app.search import TrigramSearchBackend, get_search_backend
+from offers_app.cache import list_cache_enabled, get_cached_list, set_cached_list
+from offers_app.export import EXPORT_FORMATS, export_offers, parse_updated_since
+from offers_app.facets import compute_facets
+from offers_app.snapshot import SNAPSHOT_ORDERINGS, catalog_snapshot, catalog_snapshot_enabled
+from offers_app.suggest import suggest_index
 from decimal import Decimal, InvalidOperation
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView, RetrieveAPIView, UpdateAPIView, DestroyAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import exceptions
 from profiles_app.models import Profile
-from .serializers import OfferListSerializer, FullOfferDetailSerializer, OfferCreateSerializer, OfferUpdateSerializer
+from core.conditional import ConditionalObjectMixin, build_validators
+from core.fieldsets import FieldSource, SparseFieldsetViewMixin
+from .serializers import OfferListSerializer, FullOfferDetailSerializer, OfferCreateSerializer, OfferUpdateSerializer, OfferBulkItemSerializer, SimilarOfferSerializer
 from .permissions import IsOfferOwnerOrReadOnly, IsOfferDetailOwnerOrReadOnly
+from .pagination import OfferCursorPagination
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -22,18 +34,48 @@ class CustomPageNumberPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class OfferListView(ListAPIView):
-    """View for listing offers with filtering, searching, and pagination."""
+class OfferListView(SparseFieldsetViewMixin, ListAPIView):
+    """View for listing offers with filtering, searching, sparse fieldsets and pagination."""
     serializer_class = OfferListSerializer
     permission_classes = []
     pagination_class = CustomPageNumberPagination
+    field_sources = {
+        'id': FieldSource(()),
+        'user': FieldSource(('user',)),
+        'title': FieldSource(('title',)),
+        'image': FieldSource(('image',)),
+        'image_variants': FieldSource(('image', 'image_variants')),
+        'description': FieldSource(('description',)),
+        'created_at': FieldSource(('created_at',)),
+        'updated_at': FieldSource(('updated_at',)),
+        'details': FieldSource((), prefetch_related=(Prefetch('details', queryset=OfferDetail.objects.only('id', 'offer')),)),
+        'min_price': FieldSource(('min_price',)),
+        'min_delivery_time': FieldSource(('min_delivery_time',)),
+        'user_details': FieldSource(
+            ('user', 'user__username', 'user__profile__first_name', 'user__profile__last_name'),
+            select_related=('user__profile',)
+        ),
+    }
+    # Columns read by keyset pagination regardless of the selected fields.
+    cursor_columns = ('created_at', 'updated_at', 'min_price')
+
+    @property
+    def paginator(self):
+        """Switch to keyset pagination when the client opts in, which skips the count query."""
+        if not hasattr(self, '_paginator'):
+            if OfferCursorPagination.is_requested(self.request):
+                self._paginator = OfferCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset_base(self):
+        """Join the owner's profile and prefetch details for serialization."""
+        return Offer.objects.select_related('user__profile').prefetch_related('details')
 
     def get_queryset(self):
-        # Annotate min_price consistently for use in filtering and ordering.
-        queryset = Offer.objects.select_related('user').order_by('-created_at').distinct()
-        queryset = queryset.annotate(
-            annotated_min_price=Coalesce(Min('details__price'), Decimal('0'))
-        )
+        # Filter and order on the stored min columns so no grouping over details is needed.
+        queryset = self.get_queryset_base().order_by('-created_at')
         creator_id = self.request.query_params.get('creator_id')
         if creator_id:
             queryset = queryset.filter(user__id=creator_id)
@@ -41,31 +83,104 @@ class OfferListView(ListAPIView):
         if min_price:
             try:
                 min_price_val = Decimal(min_price)
-                queryset = queryset.filter(annotated_min_price__gte=min_price_val)
+                queryset = queryset.filter(min_price__gte=min_price_val)
             except (ValueError, InvalidOperation):
                 raise exceptions.ValidationError({'min_price': 'Invalid value'})
         max_delivery_time = self.request.query_params.get('max_delivery_time')
         if max_delivery_time:
             try:
-                queryset = queryset.filter(details__delivery_time_in_days__lte=int(max_delivery_time))
+                # A semi-join keeps one row per offer, so no join fan-out or DISTINCT is needed.
+                fast_details = OfferDetail.objects.filter(offer=OuterRef('pk'), delivery_time_in_days__lte=int(max_delivery_time))
+                queryset = queryset.filter(Exists(fast_details))
             except ValueError:
                 raise exceptions.ValidationError({'max_delivery_time': 'Invalid value'})
         search = self.request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
         ordering = self.request.query_params.get('ordering')
+        if search:
+            # Delegate matching and relevance ranking to the full-text backend of the database.
+            fuzzy = self.request.query_params.get('search_mode') == 'fuzzy'
+            search_backend = TrigramSearchBackend() if fuzzy else get_search_backend()
+            queryset = search_backend.filter(queryset, search)
+            # Fuzzy matches are ranked by similarity unless another ordering is requested.
+            if ordering == 'relevance' or (fuzzy and not ordering):
+                queryset = search_backend.order_by_rank(queryset, search)
         if ordering in ['updated_at', 'min_price']:
-            queryset = queryset.order_by('annotated_min_price' if ordering == 'min_price' else ordering)
-        return queryset
+            queryset = queryset.order_by(ordering)
+        return self.apply_sparse_fieldset(queryset, columns=self.cursor_columns)
 
     def list(self, request, *args, **kwargs):
-        """List offers with pagination if applicable."""
+        """List offers with pagination if applicable, serving repeated queries from the response cache."""
+        if not list_cache_enabled():
+            return self.build_list_response(request)
+        data, cache_key = get_cached_list(request)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = self.build_list_response(request)
+        set_cached_list(cache_key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_snapshot_ids(self, request):
+        """Resolve filters and ordering from the catalog snapshot, or return None if it cannot serve the request."""
+        params = request.query_params
+        if not catalog_snapshot_enabled() or OfferCursorPagination.is_requested(request):
+            return None
+        if params.get('search') or params.get('facets') or params.get('ordering') not in SNAPSHOT_ORDERINGS:
+            return None
+        filters = {'ordering': params.get('ordering')}
+        try:
+            if params.get('creator_id'):
+                filters['creator_id'] = int(params['creator_id'])
+        except ValueError:
+            return None
+        try:
+            if params.get('min_price'):
+                filters['min_price'] = Decimal(params['min_price'])
+        except (ValueError, InvalidOperation):
+            raise exceptions.ValidationError({'min_price': 'Invalid value'})
+        try:
+            if params.get('max_delivery_time'):
+                filters['max_delivery_time'] = int(params['max_delivery_time'])
+        except ValueError:
+            raise exceptions.ValidationError({'max_delivery_time': 'Invalid value'})
+        return catalog_snapshot.select(**filters)
+
+    def get_fuzzy_search_ids(self, request):
+        """Resolve a fuzzy search in relevance order from the trigram index, or return None if it needs SQL.
+
+        Other filters, orderings and facets still go through the database with every match as a parameter.
+        """
+        params = request.query_params
+        if params.get('search_mode') != 'fuzzy' or not params.get('search') or OfferCursorPagination.is_requested(request):
+            return None
+        if params.get('facets') or params.get('ordering') not in (None, 'relevance'):
+            return None
+        if any(params.get(name) for name in ('creator_id', 'min_price', 'max_delivery_time')):
+            return None
+        return TrigramSearchBackend().ranked_offer_ids(params['search'])
+
+    def build_list_response(self, request):
+        """Query and serialize the requested page of offers, adding facet counts when asked for."""
+        ids = self.get_snapshot_ids(request)
+        if ids is None:
+            ids = self.get_fuzzy_search_ids(request)
+        if ids is not None:
+            # The in-process index already filtered and ordered the ids, so only the page's rows are fetched.
+            page_ids = self.paginate_queryset(ids)
+            offers = self.apply_sparse_fieldset(self.get_queryset_base()).in_bulk(page_ids)
+            page = [offers[offer_id] for offer_id in page_ids if offer_id in offers]
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         queryset = self.filter_queryset(self.get_queryset())
+        facets = compute_facets(queryset) if request.query_params.get('facets') in ('1', 'true') else None
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+            if facets is not None:
+                response.data['facets'] = facets
+            return response
+        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
     def post(self, request):
@@ -81,26 +196,112 @@ class OfferListView(ListAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class OfferDetailView(RetrieveUpdateDestroyAPIView):
+class OfferSuggestView(APIView):
+    """View for search-as-you-type title suggestions, served from the in-process prefix index."""
+    permission_classes = []
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise exceptions.ValidationError({'limit': 'Invalid value'})
+        if limit < 1:
+            raise exceptions.ValidationError({'limit': 'Invalid value'})
+        suggestions = suggest_index.suggest(request.query_params.get('q', ''), limit)
+        return Response({'suggestions': [{'title': title, 'offers': count} for title, count in suggestions]})
+
+
+class OfferSimilarView(ListAPIView):
+    """View for listing the precomputed similar offers of an offer, most similar first."""
+    serializer_class = SimilarOfferSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        offer = get_object_or_404(Offer.objects.only('id'), pk=self.kwargs['pk'])
+        return offer.similar_offers.select_related('similar').order_by('rank')
+
+
+class OfferExportView(APIView):
+    """View for streaming the offer catalog, or the offers changed since a watermark, as NDJSON or CSV."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise exceptions.ValidationError({'output': 'Invalid value'})
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = parse_updated_since(updated_since)
+            except ValueError:
+                raise exceptions.ValidationError({'updated_since': 'Invalid value'})
+        # Taken before the first row is read, so passing it as the next updated_since misses no change.
+        watermark = timezone.now()
+        response = StreamingHttpResponse(
+            export_offers(export_format, updated_since or None), content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="offers.{export_format}"'
+        response['X-Export-Watermark'] = watermark.isoformat().replace('+00:00', 'Z')
+        return response
+
+
+class OfferBulkCreateView(APIView):
+    """View for creating many offers in one request, restricted to business users."""
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 500
+
+    def post(self, request):
+        """Validate every offer and create all of them in one transaction, or none if any item is invalid."""
+        if not Profile.objects.filter(user=request.user, type='business').exists():
+            return Response({'error': 'Only business users can create offers'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = OfferBulkItemSerializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=self.max_batch_size, context={'request': request}
+        )
+        if serializer.is_valid():
+            offers = serializer.save()
+            return Response(OfferCreateSerializer(offers, many=True).data, status=status.HTTP_201_CREATED)
+        # Errors are returned per item, in the order the offers were submitted.
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class OfferDetailView(ConditionalObjectMixin, RetrieveUpdateDestroyAPIView):
     """View for retrieving, updating, or deleting a specific offer detail."""
     serializer_class = FullOfferDetailSerializer
     permission_classes = [IsAuthenticated, IsOfferDetailOwnerOrReadOnly]
     queryset = OfferDetail.objects.all()
     lookup_field = 'id'
 
+    def get_validators(self):
+        """Derive ETag and Last-Modified from the detail's updated_at."""
+        row = OfferDetail.objects.filter(id=self.kwargs['id']).values_list('id', 'updated_at').first()
+        if row is None:
+            return None
+        return build_validators(*row, last_modified=row[1])
+
 
-class OfferSpecificView(DestroyAPIView, UpdateAPIView, RetrieveAPIView):
+class OfferSpecificView(ConditionalObjectMixin, DestroyAPIView, UpdateAPIView, RetrieveAPIView):
     """View for retrieving, updating, or deleting a specific offer."""
     serializer_class = OfferListSerializer
     permission_classes = [IsAuthenticated, IsOfferOwnerOrReadOnly]
     queryset = Offer.objects.all()
     lookup_field = 'pk'
 
+    def get_validators(self):
+        """Derive ETag and Last-Modified from the offer, its details and the owner's profile in one query."""
+        row = Offer.objects.filter(pk=self.kwargs['pk']).annotate(
+            details_updated_at=Max('details__updated_at'),
+            details_count=Count('details')
+        ).values_list('id', 'updated_at', 'details_updated_at', 'details_count', 'user__profile__updated_at').first()
+        if row is None:
+            return None
+        last_modified = max(value for value in (row[1], row[2], row[4]) if value is not None)
+        return build_validators(*row, last_modified=last_modified)
+
     def get_queryset(self):
-        """Annotate min_price for consistency in serialization."""
-        return Offer.objects.annotate(
-            annotated_min_price=Coalesce(Min('details__price'), Decimal('0'))
-        )
+        """Join the owner's profile and prefetch details for serialization."""
+        return Offer.objects.select_related('user__profile').prefetch_related('details')
 
     def get_serializer_class(self):
         """Use update serializer for PATCH requests."""
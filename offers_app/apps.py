@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class OffersAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'offers_app'
+
+    def ready(self):
+        import offers_app.signals  # Import signals here to connect them on app startup
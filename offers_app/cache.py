@@ -0,0 +1,97 @@
+"""Versioned response cache for the public offer list, invalidated by bumping a generation counter."""
+
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Query parameters that change the offer list response; everything else is ignored when building keys.
+LIST_CACHE_PARAMS = (
+    'creator_id', 'min_price', 'max_delivery_time', 'search', 'search_mode', 'ordering',
+    'page', 'page_size', 'pagination', 'cursor', 'facets', 'fields', 'omit',
+)
+GENERATION_KEY = 'offers:list:generation'
+HITS_KEY = 'offers:list:hits'
+MISSES_KEY = 'offers:list:misses'
+
+
+def list_cache_enabled():
+    return getattr(settings, 'OFFER_LIST_CACHE_ENABLED', True)
+
+
+def get_list_cache():
+    """Return the cache backend configured for offer list responses."""
+    return caches[getattr(settings, 'OFFER_LIST_CACHE_ALIAS', 'default')]
+
+
+def get_generation(cache):
+    """Return the current generation, seeding it with a timestamp so an evicted counter never reuses old keys."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate_offer_list_cache():
+    """Make every cached list response unreachable by moving to a new generation."""
+    cache = get_list_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_offer_list_cache_after_write():
+    """Invalidate now and again after commit so pages cached from pre-commit reads are dropped too."""
+    invalidate_offer_list_cache()
+    transaction.on_commit(invalidate_offer_list_cache)
+
+
+def list_cache_key(request, generation):
+    """Build a cache key from the normalized list parameters and the host used in absolute URLs."""
+    params = sorted(
+        (name, request.query_params.get(name).strip())
+        for name in LIST_CACHE_PARAMS
+        if request.query_params.get(name, '').strip()
+    )
+    raw = repr((request.scheme, request.get_host(), params))
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f'offers:list:{generation}:{digest}'
+
+
+def _count(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_cached_list(request):
+    """Return the cached response data and the key it is stored under, counting hits and misses."""
+    cache = get_list_cache()
+    key = list_cache_key(request, get_generation(cache))
+    data = cache.get(key)
+    _count(cache, MISSES_KEY if data is None else HITS_KEY)
+    return data, key
+
+
+def set_cached_list(key, data):
+    cache = get_list_cache()
+    cache.set(key, data, timeout=getattr(settings, 'OFFER_LIST_CACHE_TIMEOUT', 300))
+
+
+def get_list_cache_stats():
+    """Return the hit and miss counters together with the current generation."""
+    cache = get_list_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+        'generation': cache.get(GENERATION_KEY),
+    }
+
+
+def reset_list_cache_stats():
+    get_list_cache().delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,97 @@
+"""Streaming export of the offer catalog with its tiers as NDJSON or CSV.
+
+Offers are read in id-ordered keyset chunks, each followed by one query for the chunk's tiers, so memory
+stays bounded by the chunk size whatever the catalog size, and no read transaction is held open between chunks.
+"""
+
+import csv
+import json
+from datetime import datetime
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Offer, OfferDetail
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+OFFER_COLUMNS = ['id', 'user_id', 'title', 'description', 'image', 'min_price', 'min_delivery_time', 'created_at', 'updated_at']
+DETAIL_COLUMNS = ['id', 'title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type']
+CSV_HEADER = ['offer_' + column for column in OFFER_COLUMNS] + ['detail_' + column for column in DETAIL_COLUMNS]
+
+
+def parse_updated_since(value):
+    """Parse an ISO 8601 watermark, reading naive values in the current time zone; raises ValueError if invalid."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Invalid timestamp: {value}')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def exported_offers(updated_since=None):
+    """Return the offers to export: all of them, or those whose offer or tier rows changed at or after updated_since."""
+    offers = Offer.objects.all()
+    if updated_since is not None:
+        changed_details = OfferDetail.objects.filter(offer=OuterRef('pk'), updated_at__gte=updated_since)
+        offers = offers.filter(Q(updated_at__gte=updated_since) | Exists(changed_details))
+    return offers
+
+
+def iter_offers(updated_since=None, chunk_size=1000):
+    """Yield (offer, details) pairs as dicts in id order, one chunk of offers and one tier query at a time."""
+    offers = exported_offers(updated_since).order_by('id').values(*OFFER_COLUMNS)
+    last_id = 0
+    while True:
+        chunk = list(offers.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        details = {}
+        rows = OfferDetail.objects.filter(offer_id__in=[offer['id'] for offer in chunk]).order_by('id')
+        for detail in rows.values('offer_id', *DETAIL_COLUMNS):
+            details.setdefault(detail.pop('offer_id'), []).append(detail)
+        for offer in chunk:
+            offer['image'] = default_storage.url(offer['image']) if offer['image'] else None
+            yield offer, details.get(offer['id'], [])
+        last_id = chunk[-1]['id']
+
+
+def export_ndjson(updated_since=None, chunk_size=1000):
+    """Yield one JSON line per offer, with its tiers nested under details."""
+    encoder = DjangoJSONEncoder()
+    for offer, details in iter_offers(updated_since, chunk_size):
+        yield encoder.encode({**offer, 'details': details}) + '\n'
+
+
+def csv_value(value, encoder=DjangoJSONEncoder()):
+    """Format timestamps like the NDJSON export does; other values are written as they are."""
+    return encoder.default(value) if isinstance(value, datetime) else value
+
+
+class Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(updated_since=None, chunk_size=1000):
+    """Yield a header and one CSV row per tier, repeating the offer columns; offers without tiers get one row."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for offer, details in iter_offers(updated_since, chunk_size):
+        offer_values = [csv_value(offer[column]) for column in OFFER_COLUMNS]
+        for detail in details or [None]:
+            if detail is None:
+                detail_values = [''] * len(DETAIL_COLUMNS)
+            else:
+                detail_values = [detail[column] for column in DETAIL_COLUMNS]
+                detail_values[DETAIL_COLUMNS.index('features')] = json.dumps(detail['features'])
+            yield writer.writerow(offer_values + detail_values)
+
+
+def export_offers(export_format, updated_since=None, chunk_size=1000):
+    """Return the line generator of an export format."""
+    return {'ndjson': export_ndjson, 'csv': export_csv}[export_format](updated_since, chunk_size)
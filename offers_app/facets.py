@@ -0,0 +1,58 @@
+"""Facet counts for the offer list, computed from the stored min columns in a single grouped query."""
+
+from decimal import Decimal
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+# Upper bounds (exclusive) of the price bands; the last band is open-ended.
+PRICE_BANDS = [Decimal('50'), Decimal('100'), Decimal('250'), Decimal('500')]
+# Upper bounds (inclusive, in days) of the delivery-time bands; the last band is open-ended.
+DELIVERY_TIME_BANDS = [1, 3, 7, 14]
+CREATOR_FACET_LIMIT = 20
+
+
+def band_expression(field, bounds, inclusive):
+    """Build a CASE expression mapping a column to the index of its band."""
+    lookup = 'lte' if inclusive else 'lt'
+    whens = [When(Q(**{f'{field}__{lookup}': bound}), then=Value(index)) for index, bound in enumerate(bounds)]
+    return Case(*whens, default=Value(len(bounds)), output_field=IntegerField())
+
+
+def band_labels(bounds):
+    """Describe each band by its bounds; None marks an open end.
+
+    Price bands include min and exclude max, delivery-time bands exclude min and include max.
+    """
+    lowers = [None] + bounds
+    uppers = bounds + [None]
+    return [{'min': lower, 'max': upper} for lower, upper in zip(lowers, uppers)]
+
+
+def compute_facets(queryset):
+    """Count the filtered offers per price band, delivery-time band and creator in one query."""
+    rows = queryset.order_by().values(
+        'user_id',
+        price_band=band_expression('min_price', PRICE_BANDS, inclusive=False),
+        delivery_band=band_expression('min_delivery_time', DELIVERY_TIME_BANDS, inclusive=True),
+    ).annotate(count=Count('id'))
+    price_counts = [0] * (len(PRICE_BANDS) + 1)
+    delivery_counts = [0] * (len(DELIVERY_TIME_BANDS) + 1)
+    creator_counts = {}
+    # Fold the (creator, price band, delivery band) groups into the three facets.
+    for row in rows:
+        price_counts[row['price_band']] += row['count']
+        delivery_counts[row['delivery_band']] += row['count']
+        creator_counts[row['user_id']] = creator_counts.get(row['user_id'], 0) + row['count']
+    creators = sorted(creator_counts.items(), key=lambda item: (-item[1], item[0]))[:CREATOR_FACET_LIMIT]
+    return {
+        'price': [
+            {'min': str(band['min']) if band['min'] is not None else None,
+             'max': str(band['max']) if band['max'] is not None else None,
+             'count': count}
+            for band, count in zip(band_labels(PRICE_BANDS), price_counts)
+        ],
+        'delivery_time': [
+            {**band, 'count': count}
+            for band, count in zip(band_labels(DELIVERY_TIME_BANDS), delivery_counts)
+        ],
+        'creator': [{'creator_id': user_id, 'count': count} for user_id, count in creators],
+    }
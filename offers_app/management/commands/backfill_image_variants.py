@@ -0,0 +1,44 @@
+"""Management command to render missing image variants for existing offer images and profile pictures."""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from core.images import generate_variants_in_worker
+from offers_app.cache import invalidate_offer_list_cache
+from offers_app.models import Offer
+from profiles_app.models import Profile
+
+# Model, image field and variants field for every image the pipeline covers.
+IMAGE_SOURCES = {
+    'offers': (Offer, 'image', 'image_variants'),
+    'profiles': (Profile, 'file', 'file_variants'),
+}
+
+
+class Command(BaseCommand):
+    """Render variants for every stored image whose variants are missing or belong to an older upload."""
+    help = 'Backfill resized image variants for existing offer images and profile pictures.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=sorted(IMAGE_SOURCES), help='Restrict the backfill to one kind of image.')
+        parser.add_argument('--force', action='store_true', help='Re-render variants even if they are current.')
+        parser.add_argument('--workers', type=int, default=4, help='Number of worker threads rendering images.')
+
+    def handle(self, *args, **options):
+        sources = [options['only']] if options['only'] else sorted(IMAGE_SOURCES)
+        total = 0
+        for source in sources:
+            model, field_name, variants_field = IMAGE_SOURCES[source]
+            rows = model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+            pending = [
+                pk for pk, name, variants in rows.values_list('pk', field_name, variants_field).iterator()
+                if options['force'] or (variants or {}).get('source') != name
+            ]
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                results = list(executor.map(
+                    lambda pk: generate_variants_in_worker(model, pk, field_name, variants_field, None), pending
+                ))
+            rendered = sum(1 for result in results if result is not None)
+            total += rendered
+            self.stdout.write(f'{source}: rendered {rendered} of {len(pending)} pending image(s).')
+        invalidate_offer_list_cache()
+        self.stdout.write(self.style.SUCCESS(f'Rendered variants for {total} image(s).'))
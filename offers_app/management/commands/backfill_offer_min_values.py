@@ -0,0 +1,39 @@
+"""Management command to backfill and verify the stored min_price and min_delivery_time of offers."""
+
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Min
+from django.db.models.functions import Coalesce
+from offers_app.models import Offer
+
+
+class Command(BaseCommand):
+    """Recalculate the stored minimum values of offers from their details."""
+    help = 'Backfill the stored min_price and min_delivery_time of offers, or verify them with --check.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report stale offers and fail if any are found.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of offers written per batch.')
+
+    def handle(self, *args, **options):
+        # Compare the stored values against a fresh aggregate over the details.
+        stale = Offer.objects.annotate(
+            actual_min_price=Coalesce(Min('details__price'), Decimal('0')),
+            actual_min_delivery_time=Coalesce(Min('details__delivery_time_in_days'), 0)
+        ).exclude(
+            min_price=F('actual_min_price'),
+            min_delivery_time=F('actual_min_delivery_time')
+        ).order_by('id')
+        offers = []
+        for offer in stale.only('id', 'min_price', 'min_delivery_time').iterator(chunk_size=options['batch_size']):
+            offer.min_price = offer.actual_min_price
+            offer.min_delivery_time = offer.actual_min_delivery_time
+            offers.append(offer)
+        if options['check']:
+            if offers:
+                ids = ', '.join(str(offer.id) for offer in offers)
+                raise CommandError(f'{len(offers)} offer(s) have stale min values: {ids}')
+            self.stdout.write(self.style.SUCCESS('All stored offer min values are current.'))
+            return
+        Offer.objects.bulk_update(offers, ['min_price', 'min_delivery_time'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated min values for {len(offers)} offer(s).'))
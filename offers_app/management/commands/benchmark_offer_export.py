@@ -0,0 +1,60 @@
+"""Management command to benchmark the streaming offer export."""
+
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from core.benchmarks import WORDS, benchmark_database
+from offers_app.export import EXPORT_FORMATS, export_offers
+from offers_app.models import Offer, OfferDetail
+
+
+class Command(BaseCommand):
+    """Report export throughput and peak memory per format, which should stay flat as the catalog grows."""
+    help = 'Benchmark the NDJSON and CSV offer export on a throwaway database at several catalog sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help='Catalog sizes to test.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Offers read per query.')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create_user(username='benchmark')
+            rng = random.Random(42)
+            created = 0
+            for size in sorted(options['sizes']):
+                created = self.populate(user, rng, created, size)
+                for export_format in EXPORT_FORMATS:
+                    start = time.perf_counter()
+                    exported = sum(len(line) for line in export_offers(export_format, chunk_size=options['chunk_size']))
+                    elapsed = time.perf_counter() - start
+                    # Tracing slows allocation down, so the peak is measured on a separate run.
+                    tracemalloc.start()
+                    for _ in export_offers(export_format, chunk_size=options['chunk_size']):
+                        pass
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f'{size:>9} offers  {export_format:<7} {elapsed:.1f}s  {size / elapsed:,.0f} offers/s  '
+                        f'{exported / 2 ** 20:.0f}MB written  peak={peak / 2 ** 20:.1f}MB'
+                    )
+
+    def populate(self, user, rng, created, size, batch_size=5000):
+        """Grow the synthetic catalog with three tiers per offer."""
+        while created < size:
+            count = min(batch_size, size - created)
+            offers = Offer.objects.bulk_create([
+                Offer(user=user, title=' '.join(rng.sample(WORDS, 3)).title(), description=' '.join(rng.choices(WORDS, k=30)))
+                for _ in range(count)
+            ])
+            OfferDetail.objects.bulk_create([
+                OfferDetail(
+                    offer=offer, title=offer_type.title(), revisions=1, offer_type=offer_type, features=rng.sample(WORDS, 3),
+                    price=Decimal(rng.randrange(1000, 100000)) / 100, delivery_time_in_days=rng.randint(1, 30)
+                )
+                for offer in offers for offer_type in ('basic', 'standard', 'premium')
+            ])
+            created += count
+        return created
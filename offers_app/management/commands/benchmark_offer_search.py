@@ -0,0 +1,73 @@
+"""Management command to benchmark the full-text and fuzzy search backends against the icontains search path."""
+
+import random
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from core.benchmarks import WORDS, benchmark_database, time_call
+from offers_app.models import Offer
+from offers_app.search import IContainsSearchBackend, TrigramSearchBackend, get_search_backend
+from offers_app.trigrams import trigram_index
+
+
+class Command(BaseCommand):
+    """Compare search latency of the icontains path, the full-text backend and fuzzy search on synthetic catalogs.
+
+    fuzzy times the database path filtered fuzzy searches take; fuzzy page the in-process path of plain ones.
+    """
+    help = 'Benchmark offer search (icontains vs. full-text vs. fuzzy) on a throwaway database at several catalog sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='Catalog sizes to test.')
+        parser.add_argument('--queries', nargs='+', default=['website', 'logo design', 'django api integration', 'webiste desing'], help='Search strings to time.')
+        parser.add_argument('--repeat', type=int, default=5, help='Repetitions per measurement; the median is reported.')
+        parser.add_argument('--page-size', type=int, default=100, help='Number of rows fetched per query.')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            # Backends are created per call, so the fuzzy backend's per-instance lookup is part of the timing.
+            backends = [('icontains', IContainsSearchBackend), ('fulltext', get_search_backend), ('fuzzy', TrigramSearchBackend)]
+            user = User.objects.create_user(username='benchmark')
+            rng = random.Random(42)
+            created = 0
+            self.stdout.write(f'Full-text backend: {type(get_search_backend()).__name__}')
+            for size in sorted(options['sizes']):
+                created = self.populate(user, rng, created, size)
+                # Bulk inserts send no signals, so the trigram index is reloaded for the grown catalog.
+                trigram_index.reset()
+                trigram_index.warm()
+                for query in options['queries']:
+                    results = []
+                    for name, backend in backends:
+                        # Time the same work as one list page: the count plus one page of rows.
+                        elapsed = time_call(
+                            lambda: self.list_page(backend(), query, options['page_size']),
+                            repeat=options['repeat']
+                        )
+                        results.append(f'{name}={elapsed:.1f}ms')
+                    # A plain fuzzy list page is ranked and paged from the trigram index instead.
+                    elapsed = time_call(lambda: self.fuzzy_page(query, options['page_size']), repeat=options['repeat'])
+                    results.append(f'fuzzy page={elapsed:.1f}ms')
+                    self.stdout.write(f'{size:>9} offers  {query!r:<28} ' + '  '.join(results))
+
+    def list_page(self, backend, query, page_size):
+        queryset = backend.filter(Offer.objects.order_by('-created_at'), query)
+        return queryset.count(), list(queryset.values_list('id', flat=True)[:page_size])
+
+    def fuzzy_page(self, query, page_size):
+        ids = TrigramSearchBackend().ranked_offer_ids(query)
+        return len(ids), list(Offer.objects.filter(pk__in=ids[:page_size]).values_list('id', flat=True))
+
+    def populate(self, user, rng, created, size, batch_size=5000):
+        """Grow the synthetic catalog to the requested size with random titles and descriptions."""
+        while created < size:
+            count = min(batch_size, size - created)
+            Offer.objects.bulk_create([
+                Offer(
+                    user=user,
+                    title=' '.join(rng.sample(WORDS, 3)).title(),
+                    description=' '.join(rng.choices(WORDS, k=30))
+                )
+                for _ in range(count)
+            ])
+            created += count
+        return created
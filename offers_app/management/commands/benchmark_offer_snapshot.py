@@ -0,0 +1,113 @@
+"""Management command to benchmark the in-process catalog snapshot against the SQL list path."""
+
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from core.benchmarks import benchmark_database, time_call
+from offers_app.api.views import OfferListView
+from offers_app.models import Offer, OfferDetail
+from offers_app.snapshot import CatalogSnapshot
+
+# Query parameters of the timed list requests.
+SCENARIOS = [
+    ('newest', {}),
+    ('creator', {'creator_id': 1}),
+    ('min_price', {'min_price': '250', 'ordering': 'min_price'}),
+    ('fast_delivery', {'max_delivery_time': '3', 'ordering': 'updated_at'}),
+    ('combined', {'creator_id': 2, 'min_price': '100', 'max_delivery_time': '7'}),
+]
+
+
+class Command(BaseCommand):
+    """Report snapshot memory and load time, and compare filter latency with SQL, on synthetic catalogs."""
+    help = 'Benchmark the offer catalog snapshot against SQL filtering on a throwaway database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='Catalog sizes to test.')
+        parser.add_argument('--users', type=int, default=50, help='Number of business users owning the offers.')
+        parser.add_argument('--repeat', type=int, default=5, help='Repetitions per measurement; the median is reported.')
+        parser.add_argument('--page-size', type=int, default=20, help='Number of ids taken per page.')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            users = [User.objects.create_user(username=f'benchmark{index}') for index in range(options['users'])]
+            rng = random.Random(42)
+            created = 0
+            page_size = options['page_size']
+            for size in sorted(options['sizes']):
+                created = self.populate(users, rng, created, size)
+                snapshot = CatalogSnapshot()
+                start = time.perf_counter()
+                snapshot.refresh()
+                load_ms = (time.perf_counter() - start) * 1000
+                # Tracing slows allocation down, so the peak is measured on a separate load.
+                tracemalloc.start()
+                CatalogSnapshot().refresh()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write(
+                    f'{size:>9} offers  snapshot={snapshot.memory_usage() / 2 ** 20:.1f}MB  '
+                    f'load={load_ms:.0f}ms  load_peak={peak / 2 ** 20:.1f}MB'
+                )
+                for name, params in SCENARIOS:
+                    params = {**params, 'creator_id': users[params['creator_id'] - 1].id} if 'creator_id' in params else params
+                    queryset = self.get_queryset(params)
+                    # Time what each path needs for one page: the total count and the ids of the page.
+                    sql_ms = time_call(
+                        lambda: (queryset.count(), list(queryset.values_list('id', flat=True)[:page_size])),
+                        repeat=options['repeat']
+                    )
+                    filters = self.get_filters(params)
+                    snapshot_ms = time_call(
+                        lambda: self.snapshot_page(snapshot, filters, page_size),
+                        repeat=options['repeat']
+                    )
+                    self.stdout.write(f'{"":>9}         {name:<14} sql={sql_ms:.1f}ms  snapshot={snapshot_ms:.1f}ms')
+
+    def snapshot_page(self, snapshot, filters, page_size):
+        ids = snapshot.select(**filters)
+        return len(ids), ids[:page_size]
+
+    def get_queryset(self, params):
+        """Build the SQL list queryset exactly as the list view does."""
+        view = OfferListView()
+        view.request = Request(APIRequestFactory().get('/', params))
+        return view.get_queryset()
+
+    def get_filters(self, params):
+        filters = {'ordering': params.get('ordering')}
+        if 'creator_id' in params:
+            filters['creator_id'] = params['creator_id']
+        if 'min_price' in params:
+            filters['min_price'] = Decimal(params['min_price'])
+        if 'max_delivery_time' in params:
+            filters['max_delivery_time'] = int(params['max_delivery_time'])
+        return filters
+
+    def populate(self, users, rng, created, size, batch_size=5000):
+        """Grow the synthetic catalog to the requested size with one detail per offer."""
+        while created < size:
+            count = min(batch_size, size - created)
+            offers = [
+                Offer(
+                    user=rng.choice(users), title='Benchmark offer', description='Synthetic',
+                    min_price=Decimal(rng.randrange(1000, 100000)) / 100,
+                    min_delivery_time=rng.randint(1, 30)
+                )
+                for _ in range(count)
+            ]
+            Offer.objects.bulk_create(offers)
+            OfferDetail.objects.bulk_create([
+                OfferDetail(
+                    offer=offer, title='Basic', revisions=1, features=[], offer_type='basic',
+                    price=offer.min_price, delivery_time_in_days=offer.min_delivery_time
+                )
+                for offer in offers
+            ])
+            created += count
+        return created
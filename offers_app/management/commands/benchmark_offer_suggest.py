@@ -0,0 +1,49 @@
+"""Management command to benchmark the title suggestion index."""
+
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from core.benchmarks import WORDS, benchmark_database, time_call
+from offers_app.models import Offer
+from offers_app.suggest import SuggestIndex
+
+
+class Command(BaseCommand):
+    """Report suggestion index memory, load time and per-lookup latency on synthetic catalogs."""
+    help = 'Benchmark the offer title suggestion index on a throwaway database at several catalog sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='Catalog sizes to test.')
+        parser.add_argument('--prefixes', nargs='+', default=['w', 'web', 'website d', 'logo design p', 'zzz'], help='Typed prefixes to time.')
+        parser.add_argument('--repeat', type=int, default=1000, help='Lookups per measurement; the median is reported.')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create_user(username='benchmark')
+            rng = random.Random(42)
+            created = 0
+            for size in sorted(options['sizes']):
+                created = self.populate(user, rng, created, size)
+                index = SuggestIndex()
+                start = time.perf_counter()
+                index.warm()
+                load_ms = (time.perf_counter() - start) * 1000
+                self.stdout.write(
+                    f'{size:>9} offers  titles={len(index)}  memory={index.memory_usage() / 2 ** 20:.1f}MB  load={load_ms:.0f}ms'
+                )
+                for prefix in options['prefixes']:
+                    # The first lookup of a wide prefix ranks it; the median shows the steady state.
+                    elapsed = time_call(lambda: index.suggest(prefix), repeat=options['repeat'])
+                    self.stdout.write(f'{"":>9}         {prefix!r:<16} {elapsed * 1000:.1f}us')
+
+    def populate(self, user, rng, created, size, batch_size=5000):
+        """Grow the synthetic catalog with titles of two to four words, so popular titles repeat."""
+        while created < size:
+            count = min(batch_size, size - created)
+            Offer.objects.bulk_create([
+                Offer(user=user, title=' '.join(rng.sample(WORDS, rng.randint(2, 4))).title(), description='Synthetic')
+                for _ in range(count)
+            ])
+            created += count
+        return created
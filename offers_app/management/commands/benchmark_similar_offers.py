@@ -0,0 +1,66 @@
+"""Management command to benchmark the full and incremental similar offers builds."""
+
+import random
+import time
+from itertools import accumulate
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from core.benchmarks import WORDS, benchmark_database
+from offers_app.models import Offer, OfferDetail, SimilarOffer
+from offers_app.similarity import refresh_similar_offers
+
+
+class Command(BaseCommand):
+    """Time a full build and an incremental refresh after a batch of edits on synthetic catalogs."""
+    help = 'Benchmark the similar offers build on a throwaway database at several catalog sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help='Catalog sizes to test.')
+        parser.add_argument('--vocabulary', type=int, default=5000, help='Distinct synthetic words, drawn with Zipf-like frequencies.')
+        parser.add_argument('--edits', type=int, default=100, help='Offers changed before the incremental refresh.')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = User.objects.create_user(username='benchmark')
+            rng = random.Random(42)
+            vocabulary = WORDS + [f'term{index}' for index in range(options['vocabulary'] - len(WORDS))]
+            cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+            created = 0
+            for size in sorted(options['sizes']):
+                created = self.populate(user, rng, vocabulary, cum_weights, created, size)
+                start = time.perf_counter()
+                refresh_similar_offers(full=True)
+                full_s = time.perf_counter() - start
+                edited = rng.sample(list(Offer.objects.values_list('id', flat=True)), options['edits'])
+                for offer in Offer.objects.filter(pk__in=edited):
+                    offer.title = ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=4))
+                    offer.save()
+                start = time.perf_counter()
+                refreshed = refresh_similar_offers()
+                incremental_s = time.perf_counter() - start
+                self.stdout.write(
+                    f'{size:>9} offers  full={full_s:.1f}s  rows={SimilarOffer.objects.count()}  '
+                    f'incremental({options["edits"]} edits)={incremental_s:.1f}s  refreshed={len(refreshed)}'
+                )
+
+    def populate(self, user, rng, vocabulary, cum_weights, created, size, batch_size=5000):
+        """Grow the synthetic catalog with Zipf-distributed titles, descriptions and tier features."""
+        while created < size:
+            count = min(batch_size, size - created)
+            offers = Offer.objects.bulk_create([
+                Offer(
+                    user=user,
+                    title=' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=4)),
+                    description=' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=40))
+                )
+                for _ in range(count)
+            ])
+            OfferDetail.objects.bulk_create([
+                OfferDetail(
+                    offer=offer, title='Basic', revisions=1, offer_type='basic', price=100, delivery_time_in_days=7,
+                    features=rng.choices(vocabulary, cum_weights=cum_weights, k=3)
+                )
+                for offer in offers
+            ])
+            created += count
+        return created
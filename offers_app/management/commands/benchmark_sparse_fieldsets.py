@@ -0,0 +1,95 @@
+"""Management command to benchmark full list responses against sparse fieldsets."""
+
+import random
+import time
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.benchmarks import WORDS, benchmark_database, time_call
+from offers_app.api.views import OfferListView
+from offers_app.models import Offer, OfferDetail
+from profiles_app.api.views import BusinessProfileListView
+
+# List endpoints and the query parameters of the timed requests; the first of each is the full response.
+SCENARIOS = [
+    (OfferListView, [
+        ('full', {}),
+        ('fields=id,title', {'fields': 'id,title'}),
+        ('omit=user_details,details', {'omit': 'user_details,details'}),
+    ]),
+    (BusinessProfileListView, [
+        ('full', {}),
+        ('fields=user,first_name', {'fields': 'user,first_name'}),
+    ]),
+]
+
+
+class Command(BaseCommand):
+    """Compare CPU time and query count of full and sparse list responses on a synthetic catalog."""
+    help = 'Benchmark sparse fieldsets (?fields= / ?omit=) against full list responses on a throwaway database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offers', type=int, default=10_000, help='Number of offers to create.')
+        parser.add_argument('--users', type=int, default=500, help='Number of business users owning the offers.')
+        parser.add_argument('--repeat', type=int, default=5, help='Repetitions per measurement; the median is reported.')
+        parser.add_argument('--page-size', type=int, default=100, help='Number of offers per page.')
+
+    def handle(self, *args, **options):
+        with benchmark_database(), override_settings(OFFER_LIST_CACHE_ENABLED=False, ALLOWED_HOSTS=['testserver']):
+            users = self.populate(random.Random(42), options['users'], options['offers'])
+            factory = APIRequestFactory()
+            for view_class, scenarios in SCENARIOS:
+                view = view_class.as_view()
+                for name, params in scenarios:
+                    params = {**params, 'page_size': options['page_size']}
+                    request = factory.get('/', params)
+                    force_authenticate(request, user=users[0])
+                    with CaptureQueriesContext(connection) as queries:
+                        self.render(view, request)
+                    # CPU time leaves out waiting on the database, so it shows the serialization work saved.
+                    cpu_ms = time_call(lambda: self.render(view, request), repeat=options['repeat'], clock=time.process_time)
+                    wall_ms = time_call(lambda: self.render(view, request), repeat=options['repeat'])
+                    self.stdout.write(
+                        f'{view_class.__name__:<24} {name:<28} cpu={cpu_ms:.1f}ms  wall={wall_ms:.1f}ms  '
+                        f'queries={len(queries)}'
+                    )
+
+    def render(self, view, request):
+        response = view(request)
+        response.render()
+        return response
+
+    def populate(self, rng, user_count, offer_count, batch_size=5000):
+        """Create business users with filled-in profiles and offers with three details each."""
+        users = [User.objects.create_user(username=f'benchmark{index}') for index in range(user_count)]
+        for user in users:
+            user.profile.type = 'business'
+            user.profile.first_name = 'Bench'
+            user.profile.last_name = 'Mark'
+            user.profile.description = ' '.join(rng.choices(WORDS, k=30))
+            user.profile.save()
+        created = 0
+        while created < offer_count:
+            count = min(batch_size, offer_count - created)
+            offers = Offer.objects.bulk_create([
+                Offer(
+                    user=rng.choice(users),
+                    title=' '.join(rng.sample(WORDS, 3)).title(),
+                    description=' '.join(rng.choices(WORDS, k=30)),
+                    min_price=Decimal(rng.randrange(1000, 100000)) / 100,
+                    min_delivery_time=rng.randint(1, 30)
+                )
+                for _ in range(count)
+            ])
+            OfferDetail.objects.bulk_create([
+                OfferDetail(
+                    offer=offer, title=offer_type.title(), revisions=1, features=[], offer_type=offer_type,
+                    price=offer.min_price, delivery_time_in_days=offer.min_delivery_time
+                )
+                for offer in offers for offer_type in ('basic', 'standard', 'premium')
+            ])
+            created += count
+        return users
@@ -0,0 +1,20 @@
+"""Management command to precompute the similar offers shown on offer pages."""
+
+import time
+from django.core.management.base import BaseCommand
+from offers_app.similarity import refresh_similar_offers
+
+
+class Command(BaseCommand):
+    """Recompute similar offers for stale offers, or for all offers with --full."""
+    help = 'Build the similar offers table from TF-IDF vectors, incrementally unless --full is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every offer instead of only new or changed ones.')
+        parser.add_argument('--count', type=int, default=None, help='Similar offers stored per offer; defaults to OFFER_SIMILAR_COUNT.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        refreshed = refresh_similar_offers(full=options['full'], count=options['count'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Refreshed similar offers for {len(refreshed)} offers in {elapsed:.1f}s.'))
@@ -0,0 +1,33 @@
+"""Management command to export the offer catalog with its tiers as NDJSON or CSV."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from offers_app.export import EXPORT_FORMATS, export_offers, parse_updated_since
+
+
+class Command(BaseCommand):
+    """Stream all offers, or those changed since --updated-since, to a file or stdout."""
+    help = 'Export offers and their tiers as NDJSON or CSV; the watermark for the next incremental export goes to stderr.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-format', choices=sorted(EXPORT_FORMATS), default='ndjson', help='Export format.')
+        parser.add_argument('--updated-since', help='Only export offers whose offer or tier rows changed at or after this ISO 8601 timestamp.')
+        parser.add_argument('--output', help='File to write to; defaults to stdout.')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Offers read per query.')
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            try:
+                updated_since = parse_updated_since(options['updated_since'])
+            except ValueError as error:
+                raise CommandError(str(error))
+        watermark = timezone.now().isoformat().replace('+00:00', 'Z')
+        lines = export_offers(options['output_format'], updated_since, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
+        self.stderr.write(f'Watermark: {watermark}')
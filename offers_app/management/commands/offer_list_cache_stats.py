@@ -0,0 +1,25 @@
+"""Management command to report the hit and miss counters of the offer list response cache."""
+
+from django.core.management.base import BaseCommand
+from offers_app.cache import get_list_cache_stats, reset_list_cache_stats, invalidate_offer_list_cache
+
+
+class Command(BaseCommand):
+    """Print offer list cache statistics and optionally reset or invalidate the cache."""
+    help = 'Show hit/miss counters of the offer list cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the hit and miss counters after printing them.')
+        parser.add_argument('--invalidate', action='store_true', help='Invalidate all cached offer list responses.')
+
+    def handle(self, *args, **options):
+        stats = get_list_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0.0
+        self.stdout.write(f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.2%} generation={stats['generation']}")
+        if options['reset']:
+            reset_list_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
+        if options['invalidate']:
+            invalidate_offer_list_cache()
+            self.stdout.write(self.style.SUCCESS('Offer list cache invalidated.'))
@@ -0,0 +1,18 @@
+"""Management command to (re)install and repopulate the full-text search index for offers."""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from offers_app.models import Offer
+from offers_app.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """Recreate the search index objects of the active backend and rebuild them from the offers table."""
+    help = 'Install and rebuild the full-text search index used by the offers search parameter.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with connection.schema_editor() as schema_editor:
+            backend.uninstall(schema_editor)
+            backend.install(schema_editor, Offer)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index using {type(backend).__name__}.'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:27
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_min_values(apps, schema_editor):
+    """Populate the stored minimum values from the existing offer details."""
+    Offer = apps.get_model('offers_app', 'Offer')
+    OfferDetail = apps.get_model('offers_app', 'OfferDetail')
+    details = OfferDetail.objects.filter(offer=OuterRef('pk')).order_by().values('offer')
+    Offer.objects.update(
+        min_price=Coalesce(Subquery(details.annotate(value=Min('price')).values('value')), Decimal('0')),
+        min_delivery_time=Coalesce(Subquery(details.annotate(value=Min('delivery_time_in_days')).values('value')), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='min_delivery_time',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='min_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(backfill_min_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:40
+
+from django.db import migrations
+
+from offers_app.search import get_vendor_search_backend
+
+
+def create_search_index(apps, schema_editor):
+    """Create and populate the full-text index supported by the current database vendor."""
+    Offer = apps.get_model('offers_app', 'Offer')
+    get_vendor_search_backend(schema_editor.connection).install(schema_editor, Offer)
+
+
+def drop_search_index(apps, schema_editor):
+    """Remove the full-text index created by create_search_index."""
+    get_vendor_search_backend(schema_editor.connection).uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0002_offer_min_values'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0003_offer_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offerdetail',
+            index=models.Index(fields=['offer', 'delivery_time_in_days'], name='offerdetail_offer_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offerdetail',
+            index=models.Index(fields=['offer', 'price'], name='offerdetail_offer_price_idx'),
+        ),
+    ]
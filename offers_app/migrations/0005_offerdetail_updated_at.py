@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0004_offerdetail_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offerdetail',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
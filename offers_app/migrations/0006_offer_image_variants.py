@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+from offers_app.search import get_vendor_search_backend
+
+
+def restore_search_triggers(apps, schema_editor):
+    """SQLite rebuilds offers_app_offer to add the column, which drops the full-text triggers."""
+    get_vendor_search_backend(schema_editor.connection).restore(schema_editor)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0005_offerdetail_updated_at'),
+    ]
+
+    operations = [
+        # Runs last when unapplying, after RemoveField has rebuilt the table again.
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='offer',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0006_offer_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferSimilarity',
+            fields=[
+                ('offer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity', serialize=False, to='offers_app.offer')),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SimilarOffer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('offer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_offers', to='offers_app.offer')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='offers_app.offer')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('offer', 'rank'), name='similaroffer_offer_rank_unique')],
+            },
+        ),
+    ]
@@ -9,22 +9,44 @@ class Offer(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='offers')
     title = models.CharField(max_length=200)
     image = models.ImageField(upload_to='offer_images/', null=True, blank=True)
+    # Resized copies of image rendered by core.images, keyed by variant and format.
+    image_variants = models.JSONField(default=dict, blank=True)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized minimums over the offer's details, kept current by refresh_min_values().
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_index=True)
+    min_delivery_time = models.PositiveIntegerField(default=0, db_index=True)
 
     def __str__(self):
         return self.title
 
-    @property
-    def min_price(self):
-        """Calculate the minimum price from associated details."""
-        return self.details.aggregate(models.Min('price'))['price__min'] or 0
+    @staticmethod
+    def compute_min_values(offer_id):
+        """Calculate the minimum price and delivery time from the details of the given offer."""
+        values = OfferDetail.objects.filter(offer_id=offer_id).aggregate(
+            min_price=models.Min('price'),
+            min_delivery_time=models.Min('delivery_time_in_days')
+        )
+        return {
+            'min_price': values['min_price'] or 0,
+            'min_delivery_time': values['min_delivery_time'] or 0
+        }
 
-    @property
-    def min_delivery_time(self):
-        """Calculate the minimum delivery time from associated details."""
-        return self.details.aggregate(models.Min('delivery_time_in_days'))['delivery_time_in_days__min'] or 0
+    @staticmethod
+    def min_values_from_details(details_data):
+        """Calculate the minimum price and delivery time from in-memory detail data."""
+        return {
+            'min_price': min((detail['price'] for detail in details_data), default=0),
+            'min_delivery_time': min((detail['delivery_time_in_days'] for detail in details_data), default=0)
+        }
+
+    def refresh_min_values(self):
+        """Recalculate and store the minimum price and delivery time without touching updated_at."""
+        values = self.compute_min_values(self.pk)
+        Offer.objects.filter(pk=self.pk).update(**values)
+        for attr, value in values.items():
+            setattr(self, attr, value)
 
 class OfferDetail(models.Model):
     # Define choices for offer types.
@@ -41,10 +63,35 @@ class OfferDetail(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     features = models.JSONField()
     offer_type = models.CharField(max_length=20, choices=OFFER_TYPE_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Composite indexes let per-offer EXISTS checks and min aggregates resolve from the index alone.
+        indexes = [
+            models.Index(fields=['offer', 'delivery_time_in_days'], name='offerdetail_offer_delivery_idx'),
+            models.Index(fields=['offer', 'price'], name='offerdetail_offer_price_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.offer_type})"
 
+class OfferSimilarity(models.Model):
+    """Records when an offer's similar offers were last computed by offers_app.similarity."""
+    offer = models.OneToOneField(Offer, on_delete=models.CASCADE, primary_key=True, related_name='similarity')
+    computed_at = models.DateTimeField()
+
+class SimilarOffer(models.Model):
+    """One precomputed neighbour of an offer, ranked by TF-IDF cosine similarity."""
+    offer = models.ForeignKey(Offer, on_delete=models.CASCADE, related_name='similar_offers')
+    similar = models.ForeignKey(Offer, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['offer', 'rank'], name='similaroffer_offer_rank_unique'),
+        ]
+
 class Order(models.Model):
     # Define choices for order status.
     STATUS_CHOICES = (
@@ -0,0 +1,237 @@
+"""Full-text search backends for offers, selected by database vendor or the OFFER_SEARCH_BACKEND setting."""
+
+import json
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# Name of the SQLite FTS5 table and PostgreSQL GIN index created by install().
+FTS_TABLE = 'offers_app_offer_fts'
+SEARCH_INDEX_NAME = 'offers_app_offer_search_idx'
+SEARCH_CONFIG = 'simple'
+
+
+def search_terms(query):
+    """Split a raw search string into lowercase word tokens."""
+    return re.findall(r'\w+', query.lower())
+
+
+def fts5_available(conn):
+    """Check whether the SQLite library behind the connection was compiled with FTS5."""
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+class IContainsSearchBackend:
+    """Fallback backend using case-insensitive substring matching on title and description."""
+    supports_rank = False
+
+    def install(self, schema_editor, model):
+        """Create the database objects the backend relies on; substring matching needs none."""
+
+    def uninstall(self, schema_editor):
+        """Drop the database objects created by install()."""
+
+    def restore(self, schema_editor):
+        """Recreate objects lost when a migration rebuilds offers_app_offer; needed after such migrations."""
+
+    def rebuild(self, conn):
+        """Repopulate the index from the offers table."""
+
+    def filter(self, queryset, query):
+        """Restrict the queryset to offers containing the search string."""
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+
+    def order_by_rank(self, queryset, query):
+        """Substring matching has no relevance score, so the ordering is kept unchanged."""
+        return queryset
+
+
+class SQLiteFTS5SearchBackend(IContainsSearchBackend):
+    """Backend using an external-content FTS5 table that triggers keep in sync with offers_app_offer."""
+    supports_rank = True
+    install_sql = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"title, description, content='offers_app_offer', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON offers_app_offer BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON offers_app_offer BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+        f"VALUES ('delete', old.id, old.title, old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON offers_app_offer BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+        f"VALUES ('delete', old.id, old.title, old.description); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    ]
+    uninstall_sql = [
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+        f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    ]
+
+    def install(self, schema_editor, model):
+        # Triggers are dropped whenever SQLite remakes offers_app_offer, so this is safe to rerun.
+        for statement in self.install_sql:
+            schema_editor.execute(statement)
+        self.rebuild(schema_editor.connection)
+
+    def uninstall(self, schema_editor):
+        for statement in self.uninstall_sql:
+            schema_editor.execute(statement)
+
+    def restore(self, schema_editor):
+        # The copied table keeps its ids, so the FTS content stays valid and only the triggers are missing.
+        for statement in self.install_sql:
+            schema_editor.execute(statement)
+
+    def rebuild(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    def match_expression(self, query):
+        """Build an FTS5 MATCH expression requiring every term as a quoted prefix."""
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def filter(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return super().filter(queryset, query)
+        # Resolve the matching rowids once through the FTS index instead of scanning the table.
+        return queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]))
+
+    def order_by_rank(self, queryset, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset
+        # bm25 scores are negative, so ascending order puts the best match first.
+        rank = RawSQL(
+            f'SELECT bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = offers_app_offer.id',
+            [expression]
+        )
+        return queryset.annotate(search_rank=rank).order_by('search_rank', '-created_at')
+
+
+class PostgresSearchBackend(IContainsSearchBackend):
+    """Backend using a tsvector expression over title and description backed by a GIN index."""
+    supports_rank = True
+
+    def vector(self):
+        """Return the tsvector expression, which must match the indexed expression exactly."""
+        from django.contrib.postgres.search import SearchVector
+        return SearchVector('title', 'description', config=SEARCH_CONFIG)
+
+    def install(self, schema_editor, model):
+        # PostgreSQL maintains the expression index itself, so no triggers are needed.
+        from django.contrib.postgres.indexes import GinIndex
+        schema_editor.add_index(model, GinIndex(self.vector(), name=SEARCH_INDEX_NAME))
+
+    def uninstall(self, schema_editor):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX_NAME}')
+
+    def rebuild(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {SEARCH_INDEX_NAME}')
+
+    def search_query(self, query):
+        from django.contrib.postgres.search import SearchQuery
+        terms = search_terms(query)
+        if not terms:
+            return None
+        return SearchQuery(' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw')
+
+    def filter(self, queryset, query):
+        search_query = self.search_query(query)
+        if search_query is None:
+            return super().filter(queryset, query)
+        return queryset.annotate(search_vector=self.vector()).filter(search_vector=search_query)
+
+    def order_by_rank(self, queryset, query):
+        from django.contrib.postgres.search import SearchRank
+        search_query = self.search_query(query)
+        if search_query is None:
+            return queryset
+        return queryset.annotate(search_rank=SearchRank(self.vector(), search_query)).order_by('-search_rank', '-created_at')
+
+
+class TrigramSearchBackend(IContainsSearchBackend):
+    """Typo-tolerant backend matching offer and tier titles through the in-process trigram index."""
+    supports_rank = True
+
+    def __init__(self):
+        self.matches = {}
+
+    def rebuild(self, conn):
+        from .trigrams import trigram_index
+        trigram_index.reset()
+
+    def threshold(self):
+        return getattr(settings, 'OFFER_FUZZY_SEARCH_THRESHOLD', 0.3)
+
+    def limit(self):
+        return getattr(settings, 'OFFER_FUZZY_SEARCH_LIMIT', 200)
+
+    def similar_offers(self, query):
+        """Return the best ranked offer ids with their similarity, looked up once per query."""
+        from .trigrams import trigram_index
+        if query not in self.matches:
+            self.matches[query] = trigram_index.search(query, threshold=self.threshold(), limit=self.limit())
+        return self.matches[query]
+
+    def ranked_offer_ids(self, query):
+        """Return every matching offer id in the order order_by_rank() gives, as a lazy sequence for paging."""
+        from .trigrams import trigram_index
+        return trigram_index.ranked_offer_ids(query, threshold=self.threshold(), limit=self.limit())
+
+    def filter(self, queryset, query):
+        # Every offer above the threshold matches, so the other filters, pages, counts and facets see them all;
+        # the ranking limit only decides which matches order_by_rank() puts first.
+        from .trigrams import trigram_index
+        offer_ids = trigram_index.matching_offer_ids(query, self.threshold())
+        if connection.vendor == 'sqlite':
+            # A single JSON parameter avoids SQLite's limit on bound variables for large match sets.
+            return queryset.filter(id__in=RawSQL('SELECT value FROM json_each(%s)', [json.dumps(offer_ids)]))
+        return queryset.filter(id__in=offer_ids)
+
+    def order_by_rank(self, queryset, query):
+        matches = self.similar_offers(query)
+        if not matches:
+            return queryset
+        # Matches beyond the ranked ones follow them, newest first. Most rows are not ranked, so a single
+        # membership test settles them before the per-offer branches are tried.
+        rank = Case(
+            When(~Q(id__in=[offer_id for offer_id, _ in matches]), then=Value(len(matches))),
+            *[When(id=offer_id, then=Value(index)) for index, (offer_id, _) in enumerate(matches)],
+            default=Value(len(matches))
+        )
+        return queryset.annotate(search_rank=rank).order_by('search_rank', '-created_at')
+
+
+def get_vendor_search_backend(conn):
+    """Return the best search backend the given connection supports."""
+    if conn.vendor == 'sqlite' and fts5_available(conn):
+        return SQLiteFTS5SearchBackend()
+    if conn.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return IContainsSearchBackend()
+
+
+@lru_cache(maxsize=None)
+def _default_vendor_search_backend():
+    """Cache the vendor backend of the default connection, since compile options never change at runtime."""
+    return get_vendor_search_backend(connection)
+
+
+def get_search_backend():
+    """Return the configured search backend, defaulting to the best one for the database vendor."""
+    backend_path = getattr(settings, 'OFFER_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    return _default_vendor_search_backend()
@@ -0,0 +1,56 @@
+"""Signal handlers for the offers_app to keep stored minimum values, cached offer lists, the catalog snapshot and image variants in sync."""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.images import schedule_variants
+from profiles_app.models import Profile
+from .models import Offer, OfferDetail
+from .cache import invalidate_offer_list_cache, invalidate_offer_list_cache_after_write
+from .snapshot import mark_offers_changed
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def refresh_offer_min_values(sender, instance, **kwargs):
+    """Recalculate the stored min_price and min_delivery_time of the detail's offer."""
+    # Reuse the cached offer when available so the caller's instance reflects the new values.
+    if OfferDetail.offer.is_cached(instance):
+        offer = instance.offer
+    else:
+        offer = Offer(pk=instance.offer_id)
+    offer.refresh_min_values()
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+@receiver(post_save, sender=Profile)
+def invalidate_offer_list(sender, **kwargs):
+    """Invalidate cached offer list responses, which embed offers, their details and owner names."""
+    invalidate_offer_list_cache_after_write()
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def update_catalog_snapshot_for_offer(sender, instance, **kwargs):
+    """Queue a changed or deleted offer for the in-process catalog snapshot."""
+    mark_offers_changed([instance.pk])
+
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def update_catalog_snapshot_for_detail(sender, instance, **kwargs):
+    """Queue the offer of a changed detail, whose stored minimums may have moved."""
+    mark_offers_changed([instance.offer_id])
+
+
+def offer_image_variants_stored(offer_id):
+    """Refresh the cached lists and in-process indexes, which the variants' queryset update bypassed."""
+    invalidate_offer_list_cache()
+    mark_offers_changed([offer_id])
+
+
+@receiver(post_save, sender=Offer)
+def render_offer_image_variants(sender, instance, **kwargs):
+    """Queue resized variants of a new or replaced offer image."""
+    schedule_variants(instance, 'image', 'image_variants', on_stored=offer_image_variants_stored)
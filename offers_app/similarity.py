@@ -0,0 +1,152 @@
+"""Precomputed "similar offers" from TF-IDF vectors over offer titles, descriptions and tier features.
+
+Vectors are sparse dicts and neighbours are found through an inverted index: each offer's strongest terms
+collect candidates from impact-ordered, truncated postings, and only those candidates are scored by exact
+cosine similarity. This keeps a full build near-linear in the number of offers instead of comparing all pairs.
+"""
+
+import heapq
+import math
+from collections import Counter
+from itertools import chain
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from .models import Offer, OfferDetail, OfferSimilarity, SimilarOffer
+from .search import search_terms
+
+# Title words count this many times, so they outweigh words repeated in long descriptions.
+TITLE_WEIGHT = 2
+# Terms found in more than this share of offers (and more offers than a posting list keeps) do not generate
+# candidates, though they still score them.
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Strongest terms per offer used to collect candidates, and postings kept per term, highest weight first.
+QUERY_TERMS = 10
+POSTINGS_LIMIT = 256
+# Candidates sharing the most strong terms that are scored exactly.
+CANDIDATES = 32
+
+
+def similar_offer_count():
+    return getattr(settings, 'OFFER_SIMILAR_COUNT', 10)
+
+
+def offer_documents():
+    """Count the terms of every offer's title, description and tier features."""
+    documents = {}
+    rows = Offer.objects.order_by('id').values_list('id', 'title', 'description')
+    for offer_id, title, description in rows.iterator(chunk_size=5000):
+        documents[offer_id] = Counter(search_terms(title) * TITLE_WEIGHT + search_terms(description))
+    for offer_id, features in OfferDetail.objects.values_list('offer_id', 'features').iterator(chunk_size=5000):
+        if offer_id in documents and isinstance(features, list):
+            documents[offer_id].update(search_terms(' '.join(str(feature) for feature in features)))
+    return documents
+
+
+def dot(vector, other):
+    # Intersecting the key views runs in C, leaving only the few shared terms to multiply in Python.
+    return sum(vector[term] * other[term] for term in vector.keys() & other.keys())
+
+
+class TfidfModel:
+    """L2-normalized TF-IDF vectors of all offers with an inverted index for candidate generation."""
+
+    def __init__(self, documents):
+        frequencies = Counter(chain.from_iterable(documents.values()))
+        count = len(documents)
+        idf = {term: math.log((count + 1) / (frequency + 1)) + 1 for term, frequency in frequencies.items()}
+        max_frequency = max(MAX_DOCUMENT_FREQUENCY * count, POSTINGS_LIMIT)
+        self.vectors = {}
+        self.query_terms = {}
+        postings = {}
+        for offer_id, terms in documents.items():
+            weights = {term: (1 + math.log(tf)) * idf[term] for term, tf in terms.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            # Terms of a single offer cannot link it to another one, so they only count towards the norm.
+            vector = {term: weight / norm for term, weight in weights.items() if frequencies[term] > 1}
+            self.vectors[offer_id] = vector
+            strong = heapq.nlargest(
+                QUERY_TERMS, (term for term in vector if frequencies[term] <= max_frequency), key=vector.__getitem__
+            )
+            self.query_terms[offer_id] = strong
+            for term in strong:
+                postings.setdefault(term, []).append((vector[term], offer_id))
+        self.postings = {
+            term: [offer_id for _, offer_id in heapq.nlargest(POSTINGS_LIMIT, entries)]
+            for term, entries in postings.items()
+        }
+
+    def neighbours(self, offer_id, count):
+        """Return up to count (offer_id, score) pairs of the most similar offers, best first."""
+        vector = self.vectors.get(offer_id)
+        if not vector:
+            return []
+        shared = Counter(chain.from_iterable(self.postings[term] for term in self.query_terms[offer_id]))
+        shared.pop(offer_id, None)
+        scored = [(dot(vector, self.vectors[candidate]), candidate) for candidate, _ in shared.most_common(CANDIDATES)]
+        return [(candidate, score) for score, candidate in heapq.nlargest(count, scored) if score > 0]
+
+
+def insert_similar_offers(rows):
+    """Insert (offer_id, similar_id, rank, score) rows with executemany, skipping per-row model instances."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(SimilarOffer._meta.get_field(name).column) for name in ('offer', 'similar', 'rank', 'score'))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {quote(SimilarOffer._meta.db_table)} ({columns}) VALUES (%s, %s, %s, %s)', rows
+        )
+
+
+def stale_offer_ids():
+    """Return the ids of offers never computed or changed, including their tiers, since their last computation."""
+    changed_details = OfferDetail.objects.filter(offer=OuterRef('pk'), updated_at__gt=OuterRef('similarity__computed_at'))
+    stale = Offer.objects.filter(
+        Q(similarity__isnull=True) | Q(updated_at__gt=F('similarity__computed_at')) | Exists(changed_details)
+    )
+    return set(stale.values_list('id', flat=True))
+
+
+def refresh_similar_offers(full=False, count=None, chunk_size=1000):
+    """Recompute and store similar offers, for all offers or only the stale ones; returns the refreshed ids.
+
+    An incremental refresh also recomputes the offers listing a stale offer and the stale offers' new
+    neighbours, so changed offers show up on both sides. Other lists and the IDF weights catch up on the
+    next full refresh.
+    """
+    count = count or similar_offer_count()
+    started = timezone.now()
+    stale = None if full else stale_offer_ids()
+    if stale is not None and not stale:
+        return set()
+    model = TfidfModel(offer_documents())
+    if stale is not None and len(stale) * 2 > len(model.vectors):
+        # With most offers stale, a full refresh costs about the same and also refreshes every other list.
+        stale = None
+    if stale is None:
+        targets = set(model.vectors)
+    else:
+        stale &= set(model.vectors)
+        listing = SimilarOffer.objects.filter(similar_id__in=stale).values_list('offer_id', flat=True)
+        targets = (stale | set(listing)) & set(model.vectors)
+    results = {offer_id: model.neighbours(offer_id, count) for offer_id in targets}
+    if stale is not None:
+        for offer_id in stale:
+            for neighbour, _ in results[offer_id]:
+                if neighbour not in results:
+                    results[neighbour] = model.neighbours(neighbour, count)
+    offer_ids = sorted(results)
+    for start in range(0, len(offer_ids), chunk_size):
+        chunk = offer_ids[start:start + chunk_size]
+        with transaction.atomic():
+            SimilarOffer.objects.filter(offer_id__in=chunk).delete()
+            insert_similar_offers([
+                (offer_id, similar_id, rank, score)
+                for offer_id in chunk for rank, (similar_id, score) in enumerate(results[offer_id])
+            ])
+            # Stamped with the start time, so offers changed while the job ran count as stale next time.
+            OfferSimilarity.objects.bulk_create(
+                [OfferSimilarity(offer_id=offer_id, computed_at=started) for offer_id in chunk],
+                update_conflicts=True, unique_fields=['offer'], update_fields=['computed_at']
+            )
+    return set(results)
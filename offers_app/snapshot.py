@@ -0,0 +1,286 @@
+"""In-process snapshot of the offer catalog's filter and sort columns, kept in compact arrays.
+
+The snapshot answers creator, price and delivery-time filters plus the list orderings without a query,
+so the list view only has to fetch the rows of the requested page. It is per process: changes made here
+are applied incrementally from model signals, changes made by other processes show up after a full
+reload once OFFER_CATALOG_SNAPSHOT_MAX_AGE has passed.
+"""
+
+import threading
+import time
+import weakref
+from array import array
+from collections.abc import Sequence
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_CEILING, Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from .models import Offer, OfferDetail
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# Orderings served from the snapshot, mapped to whether they run descending like the SQL path.
+SNAPSHOT_ORDERINGS = {None: True, 'updated_at': False, 'min_price': False}
+
+
+def catalog_snapshot_enabled():
+    return getattr(settings, 'OFFER_CATALOG_SNAPSHOT_ENABLED', False)
+
+
+def to_cents(value):
+    """Convert a price to whole cents, rounding up so a >= comparison keeps its meaning."""
+    return int((Decimal(value) * 100).to_integral_value(rounding=ROUND_CEILING))
+
+
+def to_micros(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+class InProcessOfferIndex:
+    """Base for per-process offer indexes that load lazily and apply queued offer changes on the next lookup.
+
+    Subclasses implement clear(), load() and apply(); every live instance receives mark_offers_changed().
+    """
+    # Name of the setting holding the seconds after which the index is reloaded; None never expires.
+    max_age_setting = None
+    instances = weakref.WeakSet()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.loaded_at = None
+        self.clear()
+        InProcessOfferIndex.instances.add(self)
+
+    def clear(self):
+        raise NotImplementedError
+
+    def load(self):
+        """Fill the cleared index from the database."""
+        raise NotImplementedError
+
+    def apply(self, offer_ids):
+        """Re-read the given offers; returning False requests a full reload instead."""
+        raise NotImplementedError
+
+    def needs_reload(self):
+        return False
+
+    def reload(self):
+        self.clear()
+        self.pending.clear()
+        self.load()
+        self.loaded_at = time.monotonic()
+
+    def refresh(self):
+        """Apply pending changes, or reload if the index is missing, too old or needs compacting."""
+        max_age = getattr(settings, self.max_age_setting, None) if self.max_age_setting else None
+        expired = self.loaded_at is None or (max_age is not None and time.monotonic() - self.loaded_at > max_age)
+        if expired or self.needs_reload():
+            self.reload()
+        elif self.pending:
+            offer_ids, self.pending = self.pending, set()
+            if not self.apply(offer_ids):
+                self.reload()
+
+    def warm(self):
+        """Load the index now instead of on the first lookup."""
+        with self.lock:
+            self.refresh()
+
+    def mark_changed(self, offer_ids):
+        """Queue offers to be re-read on the next lookup; an index that was never loaded ignores them."""
+        with self.lock:
+            if self.loaded_at is not None:
+                self.pending.update(offer_ids)
+
+    def reset(self):
+        with self.lock:
+            self.clear()
+            self.pending.clear()
+            self.loaded_at = None
+
+
+class CatalogSnapshot(InProcessOfferIndex):
+    """Column store of the offer fields used for list filtering and ordering.
+
+    Rows live at fixed positions sorted by id; deleted rows are tombstoned rather than removed, and each
+    ordering keeps an array of live positions sorted by its key with the id as tiebreak.
+    """
+    max_age_setting = 'OFFER_CATALOG_SNAPSHOT_MAX_AGE'
+
+    def clear(self):
+        self.ids = array('q')
+        self.user_ids = array('q')
+        self.prices = array('q')
+        self.delivery_times = array('l')
+        self.has_details = array('b')
+        self.created_at = array('q')
+        self.updated_at = array('q')
+        self.alive = array('b')
+        self.dead = 0
+        self.orders = {}
+
+    def sort_key(self, ordering):
+        """Return the key function of an ordering's position array."""
+        ids = self.ids
+        column = {None: self.created_at, 'updated_at': self.updated_at, 'min_price': self.prices}[ordering]
+        return lambda position: (column[position], ids[position])
+
+    @staticmethod
+    def rows(queryset):
+        has_details = Exists(OfferDetail.objects.filter(offer=OuterRef('pk')))
+        return queryset.annotate(has_details=has_details).order_by('id').values_list(
+            'id', 'user_id', 'min_price', 'min_delivery_time', 'has_details', 'created_at', 'updated_at'
+        )
+
+    def load(self):
+        """Rebuild all columns and orderings from the database in one pass."""
+        for row in self.rows(Offer.objects.all()).iterator(chunk_size=5000):
+            self.append(row)
+        positions = range(len(self.ids))
+        for ordering in SNAPSHOT_ORDERINGS:
+            self.orders[ordering] = array('q', sorted(positions, key=self.sort_key(ordering)))
+
+    def append(self, row):
+        offer_id, user_id, min_price, min_delivery_time, has_details, created_at, updated_at = row
+        self.ids.append(offer_id)
+        self.user_ids.append(user_id)
+        self.prices.append(to_cents(min_price))
+        self.delivery_times.append(min_delivery_time)
+        self.has_details.append(bool(has_details))
+        self.created_at.append(to_micros(created_at))
+        self.updated_at.append(to_micros(updated_at))
+        self.alive.append(1)
+
+    def position(self, offer_id):
+        """Find the live position of an offer id by bisecting the id column, or None."""
+        position = bisect_left(self.ids, offer_id)
+        if position < len(self.ids) and self.ids[position] == offer_id and self.alive[position]:
+            return position
+        return None
+
+    def unlink(self, position):
+        """Remove a position from every ordering, using its current key to find it."""
+        for ordering, order in self.orders.items():
+            key = self.sort_key(ordering)
+            index = bisect_left(order, key(position), key=key)
+            del order[index]
+
+    def link(self, position):
+        for ordering, order in self.orders.items():
+            insort(order, position, key=self.sort_key(ordering))
+
+    def apply(self, offer_ids):
+        """Re-read the given offers and update, insert or tombstone their rows.
+
+        Returns False if a new id sorts before existing ones, which needs a full reload.
+        """
+        rows = {row[0]: row for row in self.rows(Offer.objects.filter(pk__in=offer_ids))}
+        for offer_id in sorted(offer_ids):
+            position = self.position(offer_id)
+            if position is not None:
+                self.unlink(position)
+                self.alive[position] = 0
+                self.dead += 1
+            row = rows.get(offer_id)
+            if row is None:
+                continue
+            if position is None and self.ids and offer_id <= self.ids[-1]:
+                return False
+            if position is not None:
+                # An updated row is written back to its own slot.
+                _, user_id, min_price, min_delivery_time, has_details, created_at, updated_at = row
+                self.user_ids[position] = user_id
+                self.prices[position] = to_cents(min_price)
+                self.delivery_times[position] = min_delivery_time
+                self.has_details[position] = bool(has_details)
+                self.created_at[position] = to_micros(created_at)
+                self.updated_at[position] = to_micros(updated_at)
+                self.alive[position] = 1
+                self.dead -= 1
+            else:
+                self.append(row)
+                position = len(self.ids) - 1
+            self.link(position)
+        return True
+
+    def needs_reload(self):
+        # Compact once tombstones outnumber live rows.
+        return self.dead > len(self.ids) // 2
+
+    def select(self, creator_id=None, min_price=None, max_delivery_time=None, ordering=None):
+        """Return the matching offers in list order as a lazy sequence of ids."""
+        with self.lock:
+            self.refresh()
+            order = self.orders[ordering]
+            start = 0
+            price_cents = to_cents(min_price) if min_price is not None else None
+            if ordering == 'min_price' and price_cents is not None:
+                # Sorted by price, so the price filter is a single bisect to the first match.
+                start = bisect_left(order, price_cents, key=self.prices.__getitem__)
+                price_cents = None
+            positions = order[start:]
+            # Filters keep the ordering intact, so descending orderings are simply read backwards.
+            if creator_id is not None:
+                user_ids = self.user_ids
+                positions = [position for position in positions if user_ids[position] == creator_id]
+            if price_cents is not None:
+                prices = self.prices
+                positions = [position for position in positions if prices[position] >= price_cents]
+            if max_delivery_time is not None:
+                # An offer has a tier this fast exactly when its stored minimum is this fast.
+                has_details, delivery_times = self.has_details, self.delivery_times
+                positions = [
+                    position for position in positions
+                    if has_details[position] and delivery_times[position] <= max_delivery_time
+                ]
+            return SnapshotResult(self.ids, positions, SNAPSHOT_ORDERINGS[ordering])
+
+    def memory_usage(self):
+        """Return the bytes held by the column and ordering arrays."""
+        with self.lock:
+            arrays = [
+                self.ids, self.user_ids, self.prices, self.delivery_times, self.has_details,
+                self.created_at, self.updated_at, self.alive, *self.orders.values()
+            ]
+            return sum(len(column) * column.itemsize for column in arrays)
+
+    def __len__(self):
+        return len(self.ids) - self.dead
+
+
+class SnapshotResult(Sequence):
+    """Matching positions of a snapshot lookup, mapped to offer ids only for the slice a page asks for."""
+
+    def __init__(self, ids, positions, descending):
+        self.ids = ids
+        self.positions = positions
+        self.descending = descending
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if self.descending:
+            index = -1 - index
+        return self.ids[self.positions[index]]
+
+
+catalog_snapshot = CatalogSnapshot()
+
+
+def mark_offers_changed(offer_ids):
+    """Queue offers for every in-process index now and again after commit, so rows read before the commit are re-read."""
+    offer_ids = set(offer_ids)
+
+    def mark():
+        for index in list(InProcessOfferIndex.instances):
+            index.mark_changed(offer_ids)
+
+    mark()
+    transaction.on_commit(mark)
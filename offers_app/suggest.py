@@ -0,0 +1,161 @@
+"""Search-as-you-type suggestions from an in-process, sorted array of normalized offer titles.
+
+A title's popularity is the number of offers carrying it, so titles many businesses offer come first.
+The index holds at most OFFER_SUGGEST_MAX_TITLES titles of at most MAX_TITLE_LENGTH characters; the least
+popular titles are dropped on a full load, and titles added between loads are kept until the next one.
+"""
+
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from django.conf import settings
+from .models import Offer
+from .snapshot import InProcessOfferIndex
+
+MAX_TITLE_LENGTH = 100
+MAX_SUGGESTIONS = 20
+# Prefix ranges wider than this are ranked once and kept until the next change instead of scanned per lookup.
+SCAN_LIMIT = 500
+# Sorts after every character, so prefix + END bounds the titles starting with prefix.
+END = '\U0010ffff'
+
+
+def normalize(text):
+    """Casefold, strip accents and collapse punctuation and whitespace into single spaces."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(re.findall(r'\w+', stripped))[:MAX_TITLE_LENGTH]
+
+
+def max_titles():
+    return getattr(settings, 'OFFER_SUGGEST_MAX_TITLES', 100_000)
+
+
+class SuggestIndex(InProcessOfferIndex):
+    """Sorted normalized titles with their offer counts and the title shown for each.
+
+    Offers are tracked in id-sorted arrays, like the catalog snapshot, so a changed offer's old title can be
+    decremented; deleted offers are tombstoned until the next load.
+    """
+    max_age_setting = 'OFFER_SUGGEST_MAX_AGE'
+
+    def clear(self):
+        self.titles = []
+        self.counts = {}
+        self.display = {}
+        self.offer_ids = array('q')
+        # Normalized title per offer position, or None if the title is not indexed or the offer is gone.
+        self.offer_titles = []
+        self.alive = array('b')
+        self.dead = 0
+        self.ranked = {}
+
+    def load(self):
+        counts = {}
+        display = {}
+        rows = list(Offer.objects.order_by('id').values_list('id', 'title').iterator(chunk_size=5000))
+        normalized = [normalize(title) for _, title in rows]
+        for (_, title), key in zip(rows, normalized):
+            if key:
+                counts[key] = counts.get(key, 0) + 1
+                display.setdefault(key, title[:MAX_TITLE_LENGTH])
+        kept = heapq.nlargest(max_titles(), counts, key=counts.__getitem__)
+        self.titles = sorted(kept)
+        self.counts = {key: counts[key] for key in kept}
+        self.display = {key: display[key] for key in kept}
+        for (offer_id, _), key in zip(rows, normalized):
+            self.offer_ids.append(offer_id)
+            self.offer_titles.append(key if key in self.counts else None)
+            self.alive.append(1)
+
+    def position(self, offer_id):
+        """Find the live position of an offer id by bisecting the id array, or None."""
+        position = bisect_left(self.offer_ids, offer_id)
+        if position < len(self.offer_ids) and self.offer_ids[position] == offer_id and self.alive[position]:
+            return position
+        return None
+
+    def add_title(self, key, title):
+        if key in self.counts:
+            self.counts[key] += 1
+        else:
+            self.counts[key] = 1
+            self.display[key] = title[:MAX_TITLE_LENGTH]
+            insort(self.titles, key)
+
+    def remove_title(self, key):
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.counts[key], self.display[key]
+            del self.titles[bisect_left(self.titles, key)]
+
+    def apply(self, offer_ids):
+        """Move the given offers' counts to their current titles; a new id below existing ones needs a reload."""
+        titles = dict(Offer.objects.filter(pk__in=offer_ids).values_list('id', 'title'))
+        self.ranked = {}
+        for offer_id in sorted(offer_ids):
+            position = self.position(offer_id)
+            if position is None:
+                if offer_id not in titles:
+                    continue
+                if self.offer_ids and offer_id <= self.offer_ids[-1]:
+                    return False
+                self.offer_ids.append(offer_id)
+                self.offer_titles.append(None)
+                self.alive.append(1)
+                position = len(self.offer_ids) - 1
+            elif self.offer_titles[position] is not None:
+                self.remove_title(self.offer_titles[position])
+                self.offer_titles[position] = None
+            if offer_id not in titles:
+                self.alive[position] = 0
+                self.dead += 1
+                continue
+            key = normalize(titles[offer_id])
+            if key:
+                self.add_title(key, titles[offer_id])
+                self.offer_titles[position] = key
+        return True
+
+    def needs_reload(self):
+        # Prune once titles added between loads overshoot the bound, or compact once tombstones dominate.
+        return len(self.titles) > max_titles() * 5 // 4 or self.dead > len(self.offer_ids) // 2
+
+    def rank(self, start, end, limit):
+        """Return the most popular titles in a range of the sorted titles; ties keep alphabetical order."""
+        return heapq.nlargest(limit, self.titles[start:end], key=self.counts.__getitem__)
+
+    def suggest(self, query, limit=10):
+        """Return up to limit (title, offer count) pairs for titles starting with the query, most popular first."""
+        prefix = normalize(query)
+        # A trailing space means the last word is complete, so only titles continuing after it match.
+        if prefix and not query[-1:].isalnum():
+            prefix += ' '
+        if not prefix.strip():
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        with self.lock:
+            self.refresh()
+            start = bisect_left(self.titles, prefix)
+            end = bisect_left(self.titles, prefix + END, lo=start)
+            if end - start <= SCAN_LIMIT:
+                keys = self.rank(start, end, limit)
+            else:
+                if prefix not in self.ranked:
+                    self.ranked[prefix] = self.rank(start, end, MAX_SUGGESTIONS)
+                keys = self.ranked[prefix][:limit]
+            return [(self.display[key], self.counts[key]) for key in keys]
+
+    def memory_usage(self):
+        """Return the bytes held by the offer array and the title strings, leaving out container overhead."""
+        with self.lock:
+            strings = sum(len(key) + len(self.display[key]) for key in self.titles)
+            return len(self.offer_ids) * self.offer_ids.itemsize + strings
+
+    def __len__(self):
+        return len(self.titles)
+
+
+suggest_index = SuggestIndex()
@@ -2,11 +2,33 @@
 
 from django.urls import reverse
 from django.contrib.auth.models import User
-from rest_framework.test import APITestCase, APIClient
-from rest_framework import status
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
+from rest_framework.request import Request
+from rest_framework import serializers, status
 from profiles_app.models import Profile
 from offers_app.models import Offer, OfferDetail
+from offers_app.cache import get_list_cache_stats
+from offers_app.snapshot import catalog_snapshot
+from offers_app.suggest import suggest_index
+from offers_app.trigrams import MATCHES_PER_WORD, trigram_index
+from offers_app.api.serializers import OfferDetailSerializer
+from offers_app.api.views import OfferListView, OfferSpecificView
+from offers_app.search import TrigramSearchBackend
 from datetime import datetime
+from io import BytesIO, StringIO
+from PIL import Image
+import csv
+import json
+import os
+import tempfile
+from unittest import mock
 import pytz
 
 
@@ -100,6 +122,7 @@ class OfferTestsHappy(APITestCase):
                     'user': self.user.id,
                     'title': 'Website Design',
                     'image': None,
+                    'image_variants': None,
                     'description': 'Professionelles Website-Design...',
                     'created_at': self.offer.created_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
                     'updated_at': self.offer.updated_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
@@ -144,6 +167,378 @@ class OfferTestsHappy(APITestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['title'], 'Website Design')
 
+    def test_get_offers_query_count_constant(self):
+        """Test that the number of queries for the offer list does not grow with the page size."""
+        for index in range(5):
+            owner = User.objects.create_user(username=f'owner{index}', password='testpass123')
+            offer = Offer.objects.create(user=owner, title=f'Offer {index}', description='Test')
+            for offer_type, price in (('basic', 10), ('standard', 20), ('premium', 30)):
+                OfferDetail.objects.create(
+                    offer=offer, title=offer_type, revisions=1, delivery_time_in_days=3,
+                    price=price, features=[], offer_type=offer_type
+                )
+        url = reverse('offer-list')
+        with CaptureQueriesContext(connection) as small_page:
+            response = self.client.get(url + '?page_size=1')
+        self.assertEqual(len(response.data['results']), 1)
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get(url + '?page_size=6')
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(small_page), len(large_page))
+
+    def test_min_values_follow_detail_update(self):
+        """Test that the stored min values are updated when a detail is patched."""
+        url = reverse('offerdetail-detail', kwargs={'id': self.detail_basic.id})
+        response = self.client.patch(url, {'price': '50.00', 'delivery_time_in_days': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.offer.refresh_from_db()
+        self.assertEqual(str(self.offer.min_price), '50.00')
+        self.assertEqual(self.offer.min_delivery_time, 3)
+
+    def test_backfill_offer_min_values_command(self):
+        """Test that the backfill command detects and repairs stale min values."""
+        Offer.objects.filter(id=self.offer.id).update(min_price=0, min_delivery_time=0)
+        with self.assertRaises(CommandError):
+            call_command('backfill_offer_min_values', '--check', stdout=StringIO())
+        call_command('backfill_offer_min_values', stdout=StringIO())
+        self.offer.refresh_from_db()
+        self.assertEqual(str(self.offer.min_price), '100.00')
+        self.assertEqual(self.offer.min_delivery_time, 7)
+        call_command('backfill_offer_min_values', '--check', stdout=StringIO())
+
+    def test_get_offers_search_follows_updates(self):
+        """Test that the search index reflects renamed and deleted offers."""
+        self.offer.title = 'Logo Animation'
+        self.offer.save()
+        url = reverse('offer-list')
+        response = self.client.get(url + '?search=animation')
+        self.assertEqual(response.data['count'], 1)
+        self.offer.delete()
+        response = self.client.get(url + '?search=animation')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_get_offers_search_relevance_ordering(self):
+        """Test ordering search results by relevance."""
+        Offer.objects.create(user=self.user, title='Logo Design', description='Logo for your website')
+        url = reverse('offer-list') + '?search=website&ordering=relevance&page_size=10'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([offer['title'] for offer in response.data['results']], ['Website Design', 'Logo Design'])
+
+    def test_get_offers_fuzzy_search(self):
+        """Test that fuzzy search tolerates typos, ranks by similarity and follows creates, renames and deletes."""
+        trigram_index.reset()
+        self.addCleanup(trigram_index.reset)
+        url = reverse('offer-list') + '?search_mode=fuzzy&page_size=10&search='
+        self.assertEqual(self.client.get(url + 'webiste').data['count'], 1)
+        logo = Offer.objects.create(user=self.user, title='Logo Design', description='Test')
+        response = self.client.get(url + 'webiste desing')
+        self.assertEqual([offer['title'] for offer in response.data['results']], ['Website Design', 'Logo Design'])
+        self.assertEqual(self.client.get(url + 'premum').data['count'], 1)
+        logo.title = 'Website Redesign'
+        logo.save()
+        self.offer.delete()
+        response = self.client.get(url + 'webiste')
+        self.assertEqual([offer['title'] for offer in response.data['results']], ['Website Redesign'])
+
+    def test_get_offers_fuzzy_search_beyond_ranking_limit(self):
+        """Test that fuzzy search keeps every match for filters, counts and later pages, not only the ranked ones."""
+        other = User.objects.create_user(username='other', password='testpass456')
+        # The other user's offers are the oldest, so none of them is among the ranked matches.
+        Offer.objects.bulk_create([Offer(user=other, title=f'Website Build {index}', description='Test') for index in range(30)])
+        Offer.objects.bulk_create([Offer(user=self.user, title=f'Website Build {index}', description='Test') for index in range(250)])
+        trigram_index.reset()
+        self.addCleanup(trigram_index.reset)
+        url = reverse('offer-list') + '?search_mode=fuzzy&page_size=100&search=webiste'
+        with override_settings(OFFER_FUZZY_SEARCH_LIMIT=200):
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], 281)
+            self.assertEqual(len(self.client.get(url + '&page=3').data['results']), 81)
+            response = self.client.get(url + f'&creator_id={other.id}')
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual({offer['user'] for offer in response.data['results']}, {other.id})
+
+    def test_get_offers_fuzzy_search_beyond_matches_per_word(self):
+        """Test that fuzzy search lists offers of every similar word, not only of the ones ranking follows."""
+        suffixes = 'abcdefgh'
+        self.assertGreater(len(suffixes), MATCHES_PER_WORD)
+        Offer.objects.bulk_create([Offer(user=self.user, title=f'webiste{suffix}', description='Test') for suffix in suffixes])
+        trigram_index.reset()
+        self.addCleanup(trigram_index.reset)
+        url = reverse('offer-list') + '?search_mode=fuzzy&page_size=100&search=webiste'
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 9)
+        self.assertEqual(
+            {offer['title'] for offer in response.data['results']},
+            {'Website Design'} | {f'webiste{suffix}' for suffix in suffixes}
+        )
+
+    def test_get_offers_fuzzy_search_pages_from_index(self):
+        """Test that plain fuzzy pages come from the trigram index in the database path's order, fetching one page."""
+        offers = Offer.objects.bulk_create([Offer(user=self.user, title=f'Website Build {index}', description='Test') for index in range(30)])
+        # Creation times run against the ids, so the unranked tail must follow created_at rather than insertion.
+        for index, offer in enumerate(offers):
+            Offer.objects.filter(pk=offer.pk).update(created_at=datetime(2024, 1, 30 - index, tzinfo=pytz.UTC))
+        trigram_index.reset()
+        self.addCleanup(trigram_index.reset)
+        url = reverse('offer-list') + '?search_mode=fuzzy&page_size=10&search=webiste'
+        listed = []
+        with override_settings(OFFER_FUZZY_SEARCH_LIMIT=5, OFFER_LIST_CACHE_ENABLED=False):
+            backend = TrigramSearchBackend()
+            ranked = backend.order_by_rank(backend.filter(Offer.objects.order_by('-created_at'), 'webiste'), 'webiste')
+            expected = list(ranked.values_list('id', flat=True))
+            for page in range(1, 5):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url + f'&page={page}')
+                self.assertEqual(response.data['count'], 31)
+                self.assertFalse(any('json_each' in query['sql'] for query in queries))
+                listed += [offer['id'] for offer in response.data['results']]
+        self.assertEqual(listed, expected)
+
+    def test_suggest_offer_titles(self):
+        """Test that suggestions match title prefixes, rank by popularity and follow writes without reloading."""
+        suggest_index.reset()
+        self.addCleanup(suggest_index.reset)
+        for _ in range(2):
+            Offer.objects.create(user=self.user, title='Website Redesign', description='Test')
+        logo = Offer.objects.create(user=self.user, title='Logo Design', description='Test')
+        url = reverse('offer-suggest')
+        response = self.client.get(url + '?q=WEB')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['suggestions'], [
+            {'title': 'Website Redesign', 'offers': 2},
+            {'title': 'Website Design', 'offers': 1},
+        ])
+        loaded_at = suggest_index.loaded_at
+        logo.title = 'Website Redesign'
+        logo.save()
+        self.offer.delete()
+        response = self.client.get(url + '?q=website&limit=5')
+        self.assertEqual(response.data['suggestions'], [{'title': 'Website Redesign', 'offers': 3}])
+        self.assertEqual(self.client.get(url + '?q=logo').data['suggestions'], [])
+        self.assertEqual(suggest_index.loaded_at, loaded_at)
+
+    def test_similar_offers(self):
+        """Test that precomputed similar offers are served best first and refreshed incrementally."""
+        logo = Offer.objects.create(user=self.user, title='Logo Design', description='Vector logo and branding kit')
+        branding = Offer.objects.create(user=self.user, title='Logo Branding', description='Branding with a vector logo')
+        podcast = Offer.objects.create(user=self.user, title='Podcast Editing', description='Audio cleanup for podcasts')
+        Offer.objects.create(user=self.user, title='Video Editing', description='Cuts and audio cleanup')
+        out = StringIO()
+        call_command('build_similar_offers', stdout=out)
+        self.assertIn('for 5 offers', out.getvalue())
+        url = reverse('offer-similar', kwargs={'pk': logo.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['id'], branding.id)
+        self.assertEqual(response.data[0]['title'], 'Logo Branding')
+        self.assertGreater(response.data[0]['score'], 0)
+        podcast.title = 'Logo Vector Branding'
+        podcast.save()
+        out = StringIO()
+        call_command('build_similar_offers', stdout=out)
+        self.assertNotIn('for 5 offers', out.getvalue())
+        similar_ids = [offer['id'] for offer in self.client.get(url).data]
+        self.assertIn(podcast.id, similar_ids)
+
+    def test_export_offers_streams_ndjson_and_csv(self):
+        """Test that the export streams every offer with its tiers and honours the updated_since watermark."""
+        other = Offer.objects.create(user=self.user, title='Logo', description='Test')
+        url = reverse('offer-export')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [self.offer.id, other.id])
+        self.assertEqual([detail['title'] for detail in lines[0]['details']], ['Basic', 'Standard', 'Premium'])
+        self.assertEqual(lines[0]['details'][0]['features'], ['Basic Design'])
+        self.assertEqual(lines[1]['details'], [])
+        watermark = response['X-Export-Watermark']
+        response = self.client.get(url, {'output': 'csv'})
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:2], ['offer_id', 'offer_user_id'])
+        # One row per tier, plus one for the offer without tiers.
+        self.assertEqual(len(rows), 5)
+        response = self.client.get(url, {'updated_since': watermark})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        self.detail_basic.price = 120
+        self.detail_basic.save()
+        response = self.client.get(url, {'updated_since': watermark})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.offer.id])
+
+    def test_export_offers_command(self):
+        """Test that the export command writes NDJSON and reports the watermark."""
+        out, err = StringIO(), StringIO()
+        call_command('export_offers', stdout=out, stderr=err)
+        self.assertEqual(json.loads(out.getvalue())['title'], 'Website Design')
+        self.assertIn('Watermark: ', err.getvalue())
+
+    def test_get_offers_cursor_pagination(self):
+        """Test walking the offer list forwards and backwards with keyset cursors."""
+        for price in (300, 50, 50, 400):
+            offer = Offer.objects.create(user=self.user, title=f'Offer {price}', description='Test')
+            OfferDetail.objects.create(
+                offer=offer, title='Basic', revisions=1, delivery_time_in_days=3,
+                price=price, features=[], offer_type='basic'
+            )
+        expected = list(Offer.objects.order_by('min_price', 'id').values_list('id', flat=True))
+        url = reverse('offer-list') + '?pagination=cursor&ordering=min_price&page_size=2'
+        seen = []
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertNotIn('count', response.data)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries))
+        self.assertIsNone(response.data['previous'])
+        while True:
+            seen.extend(offer['id'] for offer in response.data['results'])
+            if response.data['next'] is None:
+                break
+            last_page = response
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, expected)
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([offer['id'] for offer in response.data['results']], [offer['id'] for offer in last_page.data['results']])
+
+    def test_get_offers_cached_until_write(self):
+        """Test that repeated list queries are served from the cache until an offer detail changes."""
+        url = reverse('offer-list') + '?page_size=5&ordering=min_price'
+        stats = get_list_cache_stats()
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url + '&unrelated=1')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(get_list_cache_stats()['hits'], stats['hits'] + 1)
+        self.detail_basic.price = 80
+        self.detail_basic.save()
+        third = self.client.get(url)
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(third.data['results'][0]['min_price'], '80.00')
+
+    @override_settings(OFFER_LIST_CACHE_ENABLED=False)
+    def test_get_offers_cache_disabled(self):
+        """Test that the list bypasses the cache when it is turned off."""
+        url = reverse('offer-list')
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertNotIn('X-Cache', response)
+
+    def test_get_offers_combined_filters_query_plan(self):
+        """Test that combined filters use a semi-join on the composite index instead of joining and grouping details."""
+        view = OfferListView()
+        view.request = Request(APIRequestFactory().get('/', {'max_delivery_time': 14, 'min_price': 50, 'ordering': 'min_price'}))
+        queryset = view.get_queryset()
+        sql = str(queryset.query).upper()
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('GROUP BY', sql)
+        self.assertNotIn('DISTINCT', sql)
+        self.assertNotIn('JOIN "OFFERS_APP_OFFERDETAIL"', sql)
+        # Every tier matches, yet the offer must only be counted once.
+        self.assertEqual(queryset.count(), 1)
+        if connection.vendor == 'sqlite':
+            self.assertIn('offerdetail_offer_delivery_idx', queryset.explain())
+
+    def test_offer_image_variants_rendered(self):
+        """Test that uploading an offer image renders smaller variants exposed by the list serializer."""
+        buffer = BytesIO()
+        Image.effect_noise((1600, 1200), 64).convert('RGB').save(buffer, format='PNG')
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANTS_ASYNC=False):
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.offer.image = SimpleUploadedFile('cover.png', buffer.getvalue(), content_type='image/png')
+                self.offer.save()
+            # A client caching the offer before rendering finishes must not keep getting 304 afterwards.
+            detail_url = reverse('offer-detail', kwargs={'pk': self.offer.id})
+            response = self.client.get(detail_url)
+            self.assertIsNone(response.data['image_variants'])
+            etag = response['ETag']
+            with self.captureOnCommitCallbacks(execute=True):
+                for callback in callbacks:
+                    callback()
+            response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNotNone(response.data['image_variants'])
+            self.offer.refresh_from_db()
+            variants = self.offer.image_variants
+            self.assertEqual(variants['source'], self.offer.image.name)
+            card_size = os.path.getsize(os.path.join(media_root, variants['card']['webp']))
+            self.assertLess(card_size * 10, self.offer.image.size)
+            with Image.open(os.path.join(media_root, variants['thumbnail']['jpeg'])) as thumbnail:
+                self.assertEqual(thumbnail.size, (160, 160))
+            response = self.client.get(reverse('offer-list'))
+            urls = response.data['results'][0]['image_variants']
+            self.assertTrue(urls['card']['webp'].startswith('http://testserver/'))
+
+    def test_get_offers_facets(self):
+        """Test that facet counts over the filtered offers are returned next to the page in one query."""
+        other = Offer.objects.create(user=self.user, title='Logo', description='Test')
+        OfferDetail.objects.create(offer=other, title='Basic', revisions=1, delivery_time_in_days=2, price=30, features=[], offer_type='basic')
+        url = reverse('offer-list') + '?facets=true&page_size=1'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum('GROUP BY' in query['sql'] for query in queries), 1)
+        facets = response.data['facets']
+        self.assertEqual([band['count'] for band in facets['price']], [1, 0, 1, 0, 0])
+        self.assertEqual([band['count'] for band in facets['delivery_time']], [0, 1, 1, 0, 0])
+        self.assertEqual(facets['creator'], [{'creator_id': self.user.id, 'count': 2}])
+        response = self.client.get(reverse('offer-list') + '?facets=true&min_price=50')
+        self.assertEqual(response.data['facets']['creator'], [{'creator_id': self.user.id, 'count': 1}])
+
+    def test_offer_detail_urls_match_drf(self):
+        """Test that the templated detail hyperlinks equal DRF's reversed ones for each request host."""
+        field = serializers.HyperlinkedIdentityField(view_name='offerdetail-detail', lookup_field='id')
+        details = list(self.offer.details.all())
+        for host in ('testserver', 'api.example.com:8000'):
+            request = Request(APIRequestFactory().get('/', HTTP_HOST=host))
+            with self.settings(ALLOWED_HOSTS=['testserver', 'api.example.com']):
+                expected = [{'id': detail.id, 'url': field.get_url(detail, field.view_name, request, None)} for detail in details]
+                self.assertEqual(OfferDetailSerializer(details, many=True, context={'request': request}).data, expected)
+
+    def test_get_offers_sparse_fieldset(self):
+        """Test that ?fields= and ?omit= trim the output and skip the joins and prefetches of dropped fields."""
+        url = reverse('offer-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + '?fields=id,title')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.offer.id, 'title': 'Website Design'}])
+        self.assertFalse(any('profiles_app_profile' in query['sql'] for query in queries))
+        self.assertFalse(any('offers_app_offerdetail' in query['sql'] for query in queries))
+        self.assertNotIn('description', queries[-1]['sql'])
+        response = self.client.get(url + '?omit=user_details,details')
+        result = response.data['results'][0]
+        self.assertNotIn('user_details', result)
+        self.assertNotIn('details', result)
+        self.assertEqual(result['min_price'], '100.00')
+
+    @override_settings(OFFER_CATALOG_SNAPSHOT_ENABLED=True, OFFER_LIST_CACHE_ENABLED=False)
+    def test_get_offers_from_catalog_snapshot(self):
+        """Test that the snapshot answers filters and ordering like SQL and follows writes without reloading."""
+        catalog_snapshot.reset()
+        self.addCleanup(catalog_snapshot.reset)
+        fast = Offer.objects.create(user=self.user, title='Logo', description='Test')
+        OfferDetail.objects.create(offer=fast, title='Basic', revisions=1, delivery_time_in_days=2, price=150, features=[], offer_type='basic')
+        url = reverse('offer-list') + '?page_size=5&ordering=min_price'
+        self.assertEqual([offer['id'] for offer in self.client.get(url).data['results']], [self.offer.id, fast.id])
+        loaded_at = catalog_snapshot.loaded_at
+        self.detail_basic.price = 400
+        self.detail_basic.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url + '&max_delivery_time=5')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['id'], fast.id)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+        response = self.client.get(url)
+        self.assertEqual([offer['id'] for offer in response.data['results']], [fast.id, self.offer.id])
+        fast.delete()
+        response = self.client.get(reverse('offer-list') + '?min_price=100')
+        self.assertEqual([offer['id'] for offer in response.data['results']], [self.offer.id])
+        self.assertEqual(catalog_snapshot.loaded_at, loaded_at)
+
     def test_create_offer_success(self):
         """Test creating an offer as a business user with exactly three details."""
         url = reverse('offer-list')
@@ -186,6 +581,32 @@ class OfferTestsHappy(APITestCase):
         self.assertEqual(response.data['details'][1]['offer_type'], 'standard')
         self.assertEqual(response.data['details'][2]['offer_type'], 'premium')
 
+    def test_bulk_create_offers_success(self):
+        """Test creating several offers in one request with batched inserts."""
+        url = reverse('offer-bulk-create')
+        data = [
+            {
+                'title': f'Paket {index}',
+                'description': 'Bulk offer',
+                'details': [
+                    {'title': 'Basic', 'revisions': 1, 'delivery_time_in_days': 5, 'price': f'{100 + index}.00', 'features': [], 'offer_type': 'basic'},
+                    {'title': 'Standard', 'revisions': 2, 'delivery_time_in_days': 4, 'price': '300.00', 'features': [], 'offer_type': 'standard'},
+                    {'title': 'Premium', 'revisions': 3, 'delivery_time_in_days': 9, 'price': '500.00', 'features': [], 'offer_type': 'premium'}
+                ]
+            }
+            for index in range(20)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(response.data[3]['title'], 'Paket 3')
+        self.assertEqual(len(response.data[3]['details']), 3)
+        self.assertLess(len(queries), 10)
+        offer = Offer.objects.get(title='Paket 3')
+        self.assertEqual(str(offer.min_price), '103.00')
+        self.assertEqual(offer.min_delivery_time, 4)
+
     def test_update_offer_success(self):
         """Test updating an offer by its owner."""
         url = reverse('offer-detail', kwargs={'pk': self.offer.id})
@@ -213,6 +634,52 @@ class OfferTestsHappy(APITestCase):
         self.assertEqual(response.data['description'], 'Professionelles Website-Design...')
         self.assertEqual(response.data['details'][1]['title'], 'Standard')
 
+    def test_update_offer_tiers_batched(self):
+        """Test that tier updates are written in one batched statement containing only changed fields."""
+        url = reverse('offer-detail', kwargs={'pk': self.offer.id})
+        data = {
+            'details': [
+                {'price': '80.00', 'offer_type': 'basic'},
+                {'price': '450.00', 'delivery_time_in_days': 5, 'offer_type': 'premium'},
+                {'title': 'Standard', 'offer_type': 'standard'}
+            ]
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        detail_updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "offers_app_offerdetail"')]
+        self.assertEqual(len(detail_updates), 1)
+        self.assertNotIn('"title"', detail_updates[0])
+        self.assertNotIn('"revisions"', detail_updates[0])
+        self.offer.refresh_from_db()
+        self.assertEqual(str(self.offer.min_price), '80.00')
+        self.assertEqual(self.offer.min_delivery_time, 5)
+        self.detail_premium.refresh_from_db()
+        self.assertEqual(self.detail_premium.delivery_time_in_days, 5)
+
+    def test_get_offer_not_modified_until_detail_changes(self):
+        """Test conditional GET on an offer, including changes made through its details."""
+        url = reverse('offer-detail', kwargs={'pk': self.offer.id})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        detail_url = reverse('offerdetail-detail', kwargs={'id': self.detail_basic.id})
+        self.client.patch(detail_url, {'price': '90.00'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['min_price'], '90.00')
+
+    def test_get_offer_detail_modified_after_offer_patch(self):
+        """Test that tier changes made through an offer PATCH invalidate the tier's ETag."""
+        detail_url = reverse('offerdetail-detail', kwargs={'id': self.detail_basic.id})
+        etag = self.client.get(detail_url)['ETag']
+        url = reverse('offer-detail', kwargs={'pk': self.offer.id})
+        response = self.client.patch(url, {'details': [{'offer_type': 'basic', 'price': '50.00'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['price'], '50.00')
+
     def test_delete_offer_success(self):
         """Test deleting an offer by its owner."""
         url = reverse('offer-detail', kwargs={'pk': self.offer.id})
@@ -272,6 +739,42 @@ class OfferTestsUnhappy(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data, {'min_price': 'Invalid value'})
 
+    def test_get_offers_unknown_sparse_field(self):
+        """Test that an unknown field in ?fields= is rejected."""
+        url = reverse('offer-list') + '?fields=id,secret'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'fields': 'Unknown field(s): secret.'})
+
+    def test_suggest_offer_titles_invalid_limit(self):
+        """Test that a non-numeric suggestion limit is rejected."""
+        url = reverse('offer-suggest') + '?q=web&limit=many'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'limit': 'Invalid value'})
+
+    def test_similar_offers_not_found(self):
+        """Test that similar offers of a missing offer return 404."""
+        url = reverse('offer-similar', kwargs={'pk': 9999})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_offers_invalid_params(self):
+        """Test that an unknown export format or a malformed watermark is rejected."""
+        url = reverse('offer-export')
+        response = self.client.get(url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'output': 'Invalid value'})
+        response = self.client.get(url, {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'updated_since': 'Invalid value'})
+
+    def test_get_offers_invalid_cursor(self):
+        """Test that a tampered cursor is rejected."""
+        url = reverse('offer-list') + '?cursor=not-a-cursor'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create_offer_non_business(self):
         """Test creating an offer as a non-business user."""
         Profile.objects.filter(user=self.user).update(type='customer')
@@ -331,6 +834,24 @@ class OfferTestsUnhappy(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('Exactly 3 details are required.', str(response.data['details']))
 
+    def test_bulk_create_offers_invalid_item(self):
+        """Test that one invalid offer rejects the whole batch with per-item errors."""
+        url = reverse('offer-bulk-create')
+        details = [
+            {'title': 'Basic', 'revisions': 1, 'delivery_time_in_days': 5, 'price': '100.00', 'features': [], 'offer_type': 'basic'},
+            {'title': 'Standard', 'revisions': 2, 'delivery_time_in_days': 4, 'price': '300.00', 'features': [], 'offer_type': 'standard'},
+            {'title': 'Premium', 'revisions': 3, 'delivery_time_in_days': 9, 'price': '500.00', 'features': [], 'offer_type': 'premium'}
+        ]
+        data = [
+            {'title': 'Valid', 'description': 'Bulk offer', 'details': details},
+            {'title': 'Invalid', 'description': 'Bulk offer', 'details': details[:1]}
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('Exactly 3 details are required.', str(response.data[1]['details']))
+        self.assertFalse(Offer.objects.filter(title='Valid').exists())
+
     def test_create_offer_unauthenticated(self):
         """Test creating an offer without authentication."""
         self.client.force_authenticate(user=None)
@@ -356,6 +877,33 @@ class OfferTestsUnhappy(APITestCase):
         self.assertEqual(response.status_code, 403)
         self.assertEqual(response.data['detail'], 'Permission denied')
 
+    def test_update_offer_stale_if_match(self):
+        """Test that a PATCH carrying an outdated ETag is rejected without writing."""
+        url = reverse('offer-detail', kwargs={'pk': self.offer.id})
+        etag = self.client.get(url)['ETag']
+        self.client.patch(url, {'title': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        response = self.client.patch(url, {'title': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.title, 'First')
+
+    def test_update_offer_stale_after_if_match_check(self):
+        """Test that a PATCH whose row changes between reading its version and writing is rejected."""
+        url = reverse('offer-detail', kwargs={'pk': self.offer.id})
+        etag = self.client.get(url)['ETag']
+        get_validators = OfferSpecificView.get_validators
+
+        def concurrent_write(view):
+            validators = get_validators(view)
+            Offer.objects.filter(pk=self.offer.pk).update(title='Concurrent', updated_at=timezone.now())
+            return validators
+
+        with mock.patch.object(OfferSpecificView, 'get_validators', autospec=True, side_effect=concurrent_write):
+            response = self.client.patch(url, {'title': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.offer.refresh_from_db()
+        self.assertEqual(self.offer.title, 'Concurrent')
+
     def test_update_offer_not_found(self):
         """Test updating a non-existent offer."""
         url = reverse('offer-detail', kwargs={'pk': 999})
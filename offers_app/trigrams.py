@@ -0,0 +1,333 @@
+"""Typo-tolerant offer search over an in-process trigram index of the words in offer and tier titles.
+
+Misspelled query words are matched against the vocabulary of indexed words by trigram similarity, as
+PostgreSQL's pg_trgm does, and the matched words lead to offers through per-word posting arrays. An offer
+scores the mean, over the query words, of the similarity of its best matching word.
+"""
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Sequence
+from itertools import product
+from .models import Offer, OfferDetail
+from .snapshot import InProcessOfferIndex, to_micros
+
+# Query words beyond this many are ignored, and when ranking each query word follows at most this many similar words.
+MAX_QUERY_WORDS = 4
+MATCHES_PER_WORD = 5
+# Documents a walk may probe per needed result before switching to set operations.
+WALK_BUDGET = 4
+# Candidates are probed one by one instead of intersected when a word's postings are this many times larger.
+PROBE_FACTOR = 64
+
+
+def words(text):
+    """Split text into distinct lowercase words, keeping their first-seen order."""
+    return list(dict.fromkeys(re.findall(r'\w+', text.casefold())))
+
+
+def trigrams(word):
+    """Return the padded trigrams of a word, as used by pg_trgm."""
+    padded = f'  {word} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class TrigramIndex(InProcessOfferIndex):
+    """Two-level index: trigram -> vocabulary words, and word -> documents containing it.
+
+    There is one document per offer, holding the words of its title and tier titles. A changed offer gets
+    a new document number and its old one is tombstoned, so posting arrays only grow at the end and stay
+    sorted, which keeps membership tests a bisect and lets lookups walk them newest first.
+    """
+    max_age_setting = 'OFFER_TRIGRAM_INDEX_MAX_AGE'
+
+    def clear(self):
+        self.vocabulary = {}
+        self.word_sizes = array('h')
+        self.word_trigrams = {}
+        self.word_postings = []
+        # Document number -> offer id, with 0 marking a tombstoned document, and -> offer creation time.
+        self.offer_ids = array('q')
+        self.created_at = array('q')
+        self.documents = {}
+        # Tombstoned document numbers, subtracted from match sets in one set operation.
+        self.dead = set()
+
+    def texts(self, offer_ids=None):
+        """Collect the creation time, title and tier titles of all offers, or of the given ones."""
+        offers = Offer.objects.order_by('id')
+        details = OfferDetail.objects.order_by('id')
+        if offer_ids is not None:
+            offers = offers.filter(pk__in=offer_ids)
+            details = details.filter(offer_id__in=offer_ids)
+        texts = {
+            offer_id: (to_micros(created_at), [title])
+            for offer_id, created_at, title in offers.values_list('id', 'created_at', 'title').iterator(chunk_size=5000)
+        }
+        for offer_id, title in details.values_list('offer_id', 'title').iterator(chunk_size=5000):
+            if offer_id in texts:
+                texts[offer_id][1].append(title)
+        return texts
+
+    def word_id(self, word):
+        """Return the vocabulary id of a word, adding it and its trigrams when new."""
+        word_id = self.vocabulary.get(word)
+        if word_id is None:
+            word_id = self.vocabulary[word] = len(self.word_postings)
+            grams = trigrams(word)
+            self.word_sizes.append(len(grams))
+            self.word_postings.append(array('i'))
+            for gram in grams:
+                self.word_trigrams.setdefault(gram, array('i')).append(word_id)
+        return word_id
+
+    def add(self, offer_id, created_at, texts):
+        document = len(self.offer_ids)
+        self.offer_ids.append(offer_id)
+        self.created_at.append(created_at)
+        self.documents[offer_id] = document
+        for word in words(' '.join(texts)):
+            self.word_postings[self.word_id(word)].append(document)
+
+    def load(self):
+        for offer_id, (created_at, texts) in self.texts().items():
+            self.add(offer_id, created_at, texts)
+
+    def apply(self, offer_ids):
+        texts = self.texts(offer_ids)
+        for offer_id in sorted(offer_ids):
+            document = self.documents.pop(offer_id, None)
+            if document is not None:
+                self.offer_ids[document] = 0
+                self.dead.add(document)
+            if offer_id in texts:
+                self.add(offer_id, *texts[offer_id])
+        return True
+
+    def needs_reload(self):
+        # Compact once tombstoned documents outnumber live ones.
+        return len(self.dead) > len(self.offer_ids) // 2
+
+    def similar_words(self, word, threshold, limit=MATCHES_PER_WORD):
+        """Return up to limit (similarity, word id) pairs for vocabulary words close to the word, or all with None."""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.word_trigrams.get(gram, ()))
+        matches = []
+        for word_id, count in shared.items():
+            similarity = count / (len(grams) + self.word_sizes[word_id] - count)
+            if similarity >= threshold:
+                matches.append((similarity, len(self.word_postings[word_id]), word_id))
+        if limit is not None:
+            matches = heapq.nlargest(limit, matches)
+        return [(similarity, word_id) for similarity, _, word_id in matches]
+
+    def levels(self, word, threshold, limit=MATCHES_PER_WORD):
+        """Group the postings of a query word's matches by similarity, best level first."""
+        grouped = {}
+        for similarity, word_id in self.similar_words(word, threshold, limit):
+            grouped.setdefault(similarity, []).append(self.word_postings[word_id])
+        return sorted(grouped.items(), key=lambda level: level[0], reverse=True)
+
+    def search(self, query, threshold, limit):
+        """Return the best (offer_id, score) pairs, best first; ties go to the most recently indexed offer."""
+        query_words = words(query)[:MAX_QUERY_WORDS]
+        with self.lock:
+            self.refresh()
+            return self.rank(query_words, threshold, limit)
+
+    def rank(self, query_words, threshold, limit):
+        levels = [self.levels(word, threshold) for word in query_words]
+        if not any(levels):
+            return []
+        # Each combination picks, per query word, the similarity level its best match has in an offer,
+        # or None for offers without a match; all offers of one combination share the same score.
+        combinations = []
+        for choice in product(*[list(range(len(word_levels))) + [None] for word_levels in levels]):
+            score = sum(levels[index][level][0] for index, level in enumerate(choice) if level is not None)
+            if score:
+                combinations.append((score / len(query_words), choice))
+        combinations.sort(key=lambda combination: combination[0], reverse=True)
+        sets = MatchSets(levels)
+        results = []
+        for score, choice in combinations:
+            need = limit - len(results)
+            documents = self.walk(levels, choice, need)
+            if documents is None:
+                documents = self.intersect(sets, levels, choice, need)
+            results.extend((self.offer_ids[document], score) for document in documents)
+            if len(results) >= limit:
+                break
+        return results
+
+    def matches(self, query_words, threshold):
+        """Return the live documents matching any query word at or above the threshold."""
+        # Every similar word counts here, not only the MATCHES_PER_WORD best that ranking follows.
+        postings = [
+            self.word_postings[word_id]
+            for word in query_words
+            for _, word_id in self.similar_words(word, threshold, limit=None)
+        ]
+        return set().union(*postings).difference(self.dead)
+
+    def matching_offer_ids(self, query, threshold):
+        """Return the ids of all offers matching any query word, unranked and without a limit."""
+        query_words = words(query)[:MAX_QUERY_WORDS]
+        with self.lock:
+            self.refresh()
+            offer_ids = self.offer_ids
+            return [offer_ids[document] for document in self.matches(query_words, threshold)]
+
+    def ranked_offer_ids(self, query, threshold, limit):
+        """Return all matching offers in list order: the limit best by score, then the others newest first."""
+        query_words = words(query)[:MAX_QUERY_WORDS]
+        with self.lock:
+            self.refresh()
+            ranked_ids = [offer_id for offer_id, _ in self.rank(query_words, threshold, limit)]
+            documents = self.matches(query_words, threshold)
+            documents.difference_update(self.documents[offer_id] for offer_id in ranked_ids)
+            return RankedMatches(ranked_ids, documents, self.offer_ids, self.created_at)
+
+    def walk(self, levels, choice, need):
+        """Collect the newest documents of a combination by probing the postings of the driving level.
+
+        Dense combinations fill up after a few documents; if WALK_BUDGET documents per needed result are
+        probed without filling up, None is returned and the combination is resolved with set operations.
+        """
+        driver = self.driver(levels, choice)
+        if sum(len(posting) for posting in levels[driver][choice[driver]][1]) <= WALK_BUDGET * need:
+            # A driver this small is cheaper to intersect than to walk.
+            return None
+        merged = heapq.merge(*[reversed(posting) for posting in levels[driver][choice[driver]][1]], reverse=True)
+        offer_ids = self.offer_ids
+        previous = None
+        documents = []
+        for probed, document in enumerate(merged):
+            if probed >= WALK_BUDGET * need:
+                return None
+            if document == previous or not offer_ids[document]:
+                continue
+            previous = document
+            if all(self.best_level(word_levels, document) == choice[index] for index, word_levels in enumerate(levels)):
+                documents.append(document)
+                if len(documents) >= need:
+                    break
+        return documents
+
+    def intersect(self, sets, levels, choice, need):
+        """Resolve a sparse combination starting from the driving level's documents.
+
+        Each query word then narrows the candidates with set operations, or by probing its postings per
+        candidate when those postings are much larger than the candidate set and building sets would cost more.
+        """
+        driver = self.driver(levels, choice)
+        documents = sets.level(driver, choice[driver])
+        for index, word_levels in enumerate(levels):
+            if not documents:
+                break
+            level = choice[index]
+            if index == driver and level == 0:
+                continue
+            relevant = word_levels if level is None else word_levels[:level + 1]
+            size = sum(len(posting) for _, postings in relevant for posting in postings)
+            if size > PROBE_FACTOR * len(documents):
+                documents = {document for document in documents if self.best_level(word_levels, document) == level}
+            elif level is None:
+                documents = documents.difference(sets.word(index))
+            else:
+                documents = documents.intersection(sets.exact(index, level))
+        offer_ids = self.offer_ids
+        return heapq.nlargest(need, (document for document in documents if offer_ids[document]))
+
+    @staticmethod
+    def driver(levels, choice):
+        """Pick the chosen level with the fewest postings to drive a walk."""
+        return min(
+            (index for index, level in enumerate(choice) if level is not None),
+            key=lambda index: sum(len(posting) for posting in levels[index][choice[index]][1])
+        )
+
+    @staticmethod
+    def best_level(word_levels, document):
+        """Return the best level at which a query word matches the document, or None."""
+        for level, (_, postings) in enumerate(word_levels):
+            for posting in postings:
+                position = bisect_left(posting, document)
+                if position < len(posting) and posting[position] == document:
+                    return level
+        return None
+
+    def memory_usage(self):
+        """Return the bytes held by the posting and document arrays, leaving out dict overhead."""
+        with self.lock:
+            arrays = [self.offer_ids, self.created_at, self.word_sizes, *self.word_trigrams.values(), *self.word_postings]
+            return sum(len(column) * column.itemsize for column in arrays)
+
+
+class MatchSets:
+    """Document sets of a query's match levels, built on first use and shared by its combinations."""
+
+    def __init__(self, levels):
+        self.levels = levels
+        self.cache = {}
+
+    def level(self, index, level):
+        key = ('level', index, level)
+        if key not in self.cache:
+            self.cache[key] = set().union(*self.levels[index][level][1])
+        return self.cache[key]
+
+    def exact(self, index, level):
+        """Documents whose best match for the query word is at the given level."""
+        key = ('exact', index, level)
+        if key not in self.cache:
+            self.cache[key] = self.level(index, level).difference(*[self.level(index, better) for better in range(level)])
+        return self.cache[key]
+
+    def word(self, index):
+        """Documents matching the query word at any level."""
+        key = ('word', index)
+        if key not in self.cache:
+            self.cache[key] = set().union(*[self.level(index, level) for level in range(len(self.levels[index]))])
+        return self.cache[key]
+
+
+class RankedMatches(Sequence):
+    """Matching offer ids of a fuzzy search in list order, ordered only as far as the pages asked for reach.
+
+    The ranked offers come first; the other matches follow newest first, picked with a partial sort that
+    grows to the deepest position read instead of sorting every match.
+    """
+
+    def __init__(self, ranked_ids, documents, offer_ids, created_at):
+        self.ranked_ids = ranked_ids
+        self.documents = documents
+        self.offer_ids = offer_ids
+        self.created_at = created_at
+        self.newest = []
+
+    def __len__(self):
+        return len(self.ranked_ids) + len(self.documents)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index < len(self.ranked_ids):
+            return self.ranked_ids[index]
+        position = index - len(self.ranked_ids)
+        if position >= len(self.newest):
+            # At least double the ordered part, so paging deeper costs a few partial sorts, not one per page.
+            count = max(position + 1, 2 * len(self.newest))
+            self.newest = heapq.nlargest(count, self.documents, key=self.created_at.__getitem__)
+        return self.offer_ids[self.newest[position]]
+
+
+trigram_index = TrigramIndex()
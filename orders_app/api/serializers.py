@@ -1,11 +1,18 @@
 """Serializers for the orders_app to handle order data in Django REST Framework."""
 
+from django.db import transaction
+from django.db.models import Exists
+from django.utils import timezone
 from rest_framework import serializers
+from orders_app.counters import adjust_order_count, count_created_orders
 from orders_app.models import Order
+from orders_app.rollups import add_to_rollups
 from offers_app.models import OfferDetail
+from profiles_app.models import Profile
+from core.fieldsets import SparseFieldsetSerializerMixin
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializes order data for API responses, formatting timestamps in ISO format and prices as strings."""
     created_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%SZ', read_only=True)
     updated_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%SZ', read_only=True)
@@ -21,36 +28,122 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'customer_user', 'business_user', 'created_at', 'updated_at']
 
 
+def orderable_details(user):
+    """Offer details with their offer, annotated with whether user is a customer and may order them."""
+    return OfferDetail.objects.select_related('offer').annotate(
+        ordered_by_customer=Exists(Profile.objects.filter(user=user, type='customer'))
+    )
+
+
+def order_from_detail(customer_user, offer_detail):
+    """Build an unsaved order snapshotting the tier fields of an offer detail."""
+    return Order(
+        customer_user=customer_user,
+        business_user_id=offer_detail.offer.user_id,
+        title=offer_detail.title,
+        revisions=offer_detail.revisions,
+        delivery_time_in_days=offer_detail.delivery_time_in_days,
+        price=offer_detail.price,
+        features=offer_detail.features,
+        offer_type=offer_detail.offer_type
+    )
+
+
 class OrderCreateSerializer(serializers.Serializer):
-    """Serializes input data for creating new orders based on an offer detail."""
+    """Serializes input data for creating new orders based on an offer detail.
+
+    Validation reads the offer detail, its offer and whether the requesting user is a customer in one query,
+    and create() builds the order from that row, so a checkout is one read and one insert.
+    """
     offer_detail_id = serializers.IntegerField(required=True)
 
-    def validate_offer_detail_id(self, value):
-        """Validate that the provided offer detail ID exists and has a title."""
-        try:
-            offer_detail = OfferDetail.objects.get(id=value)
-        except OfferDetail.DoesNotExist:
-            raise serializers.ValidationError('Offer detail not found.')
+    def validate(self, attrs):
+        """Validate that the provided offer detail ID exists and has a title, keeping the loaded detail."""
+        offer_detail = orderable_details(self.context['request'].user).filter(id=attrs['offer_detail_id']).first()
+        if offer_detail is None:
+            raise serializers.ValidationError({'offer_detail_id': ['Offer detail not found.']})
         if not offer_detail.title:
-            raise serializers.ValidationError('Offer detail must have a title.')
-        return value
-    
+            raise serializers.ValidationError({'offer_detail_id': ['Offer detail must have a title.']})
+        attrs['offer_detail'] = offer_detail
+        return attrs
+
     def create(self, validated_data):
         """Create an order using the specified offer detail's attributes."""
-        offer_detail = OfferDetail.objects.get(id=validated_data['offer_detail_id'])
-        order = Order.objects.create(
-            customer_user=self.context['request'].user,
-            business_user=offer_detail.offer.user,
-            title=offer_detail.title,
-            revisions=offer_detail.revisions,
-            delivery_time_in_days=offer_detail.delivery_time_in_days,
-            price=offer_detail.price,
-            features=offer_detail.features,
-            offer_type=offer_detail.offer_type
-        )
+        order = order_from_detail(self.context['request'].user, validated_data['offer_detail'])
+        order.save()
         return order
 
 
+class OrderBatchCreateSerializer(serializers.Serializer):
+    """Serializes a multi-item checkout: one order per listed offer detail, created together or not at all.
+
+    All details are read in one query and the orders are inserted with one batched write.
+    """
+    offer_detail_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=50)
+
+    def validate(self, attrs):
+        """Validate that every listed offer detail exists and has a title, keeping the loaded details in order."""
+        ids = attrs['offer_detail_ids']
+        found = orderable_details(self.context['request'].user).in_bulk(set(ids))
+        errors = {}
+        for index, offer_detail_id in enumerate(ids):
+            if offer_detail_id not in found:
+                errors[index] = ['Offer detail not found.']
+            elif not found[offer_detail_id].title:
+                errors[index] = ['Offer detail must have a title.']
+        if errors:
+            raise serializers.ValidationError({'offer_detail_ids': errors})
+        attrs['offer_details'] = [found[offer_detail_id] for offer_detail_id in ids]
+        return attrs
+
+    def create(self, validated_data):
+        """Insert all orders in one batched write and count them, in a single transaction."""
+        customer_user = self.context['request'].user
+        orders = [order_from_detail(customer_user, detail) for detail in validated_data['offer_details']]
+        with transaction.atomic():
+            Order.objects.bulk_create(orders)
+            count_created_orders(orders)
+        return orders
+
+
+class OrderBulkStatusSerializer(serializers.Serializer):
+    """Serializes a status change applied to many orders of the requesting business user at once.
+
+    save() reads the listed orders' current statuses, changes them with one conditional UPDATE and moves
+    their counts between the per-business counters and daily rollups, all in one transaction.
+    """
+    order_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=500)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+    def save(self):
+        """Apply the status and return the updated, unchanged and rejected order ids."""
+        business_user = self.context['request'].user
+        order_ids = list(dict.fromkeys(self.validated_data['order_ids']))
+        new_status = self.validated_data['status']
+        with transaction.atomic():
+            owned = Order.objects.select_for_update().filter(pk__in=order_ids, business_user=business_user)
+            stored = {row[0]: row[1:] for row in owned.values_list('id', *Order.TRACKED_FIELDS)}
+            current = {order_id: values[1] for order_id, values in stored.items()}
+            changed = [order_id for order_id in order_ids if current.get(order_id, new_status) != new_status]
+            if changed:
+                Order.objects.filter(pk__in=changed, business_user=business_user).exclude(status=new_status).update(
+                    status=new_status, updated_at=timezone.now()
+                )
+                # Queryset updates send no signals, so the counters and rollups are moved here.
+                for old_status in sorted({current[order_id] for order_id in changed}):
+                    moved = sum(current[order_id] == old_status for order_id in changed)
+                    adjust_order_count(business_user.id, old_status, -moved)
+                adjust_order_count(business_user.id, new_status, len(changed))
+                add_to_rollups([stored[order_id] for order_id in changed], sign=-1)
+                add_to_rollups([(values[0], new_status, *values[2:]) for values in map(stored.get, changed)])
+        return {
+            'status': new_status,
+            'updated': changed,
+            'unchanged': [order_id for order_id in order_ids if current.get(order_id) == new_status],
+            'rejected': [order_id for order_id in order_ids if order_id not in current],
+        }
+
+
 class OrderUpdateSerializer(serializers.ModelSerializer):
     """Serializes data for updating an order's status."""
     class Meta:
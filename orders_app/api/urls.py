@@ -1,13 +1,18 @@
 """URL configuration for the orders_app, defining API endpoints for order-related views."""
 
 from django.urls import path
-from .views import OrderListView, OrderSpecificView, OrderCountView, CompletedOrderCountView
+from .views import OrderListView, OrderBatchCreateView, OrderBulkStatusView, OrderSpecificView, OrderCountView, CompletedOrderCountView, OrderStatusCountsView, BusinessTimeseriesView
 
 
 # Define URL patterns for order-related API endpoints.
 urlpatterns = [
     path('orders/', OrderListView.as_view(), name='order-list'),
+    path('orders/batch/', OrderBatchCreateView.as_view(), name='order-batch'),
+    path('orders/status/', OrderBulkStatusView.as_view(), name='order-bulk-status'),
     path('orders/<int:pk>/', OrderSpecificView.as_view(), name='order-detail'),
     path('order-count/<int:business_user_id>/', OrderCountView.as_view(), name='order-count'),
     path('completed-order-count/<int:business_user_id>/', CompletedOrderCountView.as_view(), name='completed-order-count'),
+    path('order-counts/', OrderStatusCountsView.as_view(), name='order-counts'),
+    path('order-counts/<int:business_user_id>/', OrderStatusCountsView.as_view(), name='business-order-counts'),
+    path('business/<int:business_user_id>/timeseries/', BusinessTimeseriesView.as_view(), name='business-timeseries'),
 ]
\ No newline at end of file
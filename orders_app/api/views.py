@@ -1,40 +1,154 @@
 """API views for managing orders in Django REST Framework, including listing, creation, updates, deletion, and counts."""
 
+from datetime import timedelta
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.generics import ListAPIView, UpdateAPIView, DestroyAPIView
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import exceptions, status
+from orders_app.counters import STATUSES, get_order_counts
 from orders_app.models import Order
+from orders_app.rollups import OFFER_TYPES, PERIODS, order_timeseries
 from profiles_app.models import Profile
-from .serializers import OrderSerializer, OrderCreateSerializer, OrderUpdateSerializer
+from core.fieldsets import FieldSource, SparseFieldsetViewMixin, parse_field_list
+from core.pagination import KeysetCursorPagination
+from core.streaming import StreamingListMixin
+from .serializers import OrderSerializer, OrderCreateSerializer, OrderBatchCreateSerializer, OrderBulkStatusSerializer, OrderUpdateSerializer
 
 
-class OrderListView(ListAPIView):
-    """View for listing orders and creating new ones for authenticated customers."""
+class OrderCursorPagination(KeysetCursorPagination):
+    """Keyset pagination over (created_at, id), newest first, opted into with ?pagination=cursor or a cursor parameter."""
+    orderings = {None: ('created_at', True)}
+
+    def seek(self, queryset, condition):
+        # A UNION cannot be filtered once built, so the view rebuilds it with the position inside each branch.
+        return self.view.participant_orders(condition)
+
+
+class OrderListCapPagination(OrderCursorPagination):
+    """Caps the plain list at ORDER_LIST_MAX_RESULTS orders, keeping the bare JSON array existing clients read.
+
+    When more orders exist, a Link header points at the cursor-paginated page that follows the last one listed.
+    """
+
+    def get_page_size(self, request):
+        return settings.ORDER_LIST_MAX_RESULTS
+
+    def get_paginated_response(self, data):
+        response = Response(data)
+        next_link = self.get_next_link()
+        if next_link is not None:
+            response['Link'] = f'<{next_link}>; rel="next"'
+        return response
+
+
+class OrderListView(StreamingListMixin, SparseFieldsetViewMixin, ListAPIView):
+    """View for listing orders and creating new ones for authenticated customers.
+
+    Cursor pagination is opted into with ?pagination=cursor and ?stream=true streams every order chunk by chunk.
+    Otherwise the response stays the bare JSON array of earlier versions for compatibility, capped at the newest
+    ORDER_LIST_MAX_RESULTS orders so memory per request stays bounded.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
     pagination_class = None
+    field_sources = {
+        name: FieldSource((name,)) for name in [
+            'id', 'customer_user', 'business_user', 'title', 'revisions', 'delivery_time_in_days',
+            'price', 'features', 'offer_type', 'status', 'created_at', 'updated_at'
+        ]
+    }
+
+    @property
+    def paginator(self):
+        """Switch to keyset pagination when the client opts in, and cap the plain list otherwise."""
+        if not hasattr(self, '_paginator'):
+            if OrderCursorPagination.is_requested(self.request):
+                self._paginator = OrderCursorPagination()
+            else:
+                self._paginator = OrderListCapPagination()
+        return self._paginator
 
     def get_queryset(self):
-        """Filter orders for the authenticated user as either customer or business."""
+        return self.participant_orders()
+
+    def participant_orders(self, condition=Q()):
+        """Return the authenticated user's orders as customer or business, filtered by status and condition.
+
+        The two roles are queried separately and combined with UNION ALL, so each side is a range scan of its
+        (user, created_at) index and the database merges them in list order instead of sorting every order.
+        Orders a user placed with themselves are only taken from the customer side.
+        """
         user = self.request.user
-        queryset = Order.objects.filter(Q(customer_user=user) | Q(business_user=user)).select_related('customer_user', 'business_user')
-        return queryset.order_by('-created_at')
+        queryset = Order.objects.filter(condition).select_related('customer_user', 'business_user')
+        statuses = parse_field_list(self.request.query_params.get('status', ''))
+        if statuses:
+            if not set(statuses) <= {choice for choice, _ in Order.STATUS_CHOICES}:
+                raise exceptions.ValidationError({'status': 'Invalid value'})
+            queryset = queryset.filter(status__in=statuses)
+        # Users are rendered as ids, so a sparse fieldset drops the joins along with unselected columns.
+        queryset = self.apply_sparse_fieldset(queryset, columns=('created_at',))
+        as_customer = queryset.filter(customer_user=user)
+        as_business = queryset.filter(business_user=user).exclude(customer_user=user)
+        return as_customer.union(as_business, all=True).order_by('-created_at', '-id')
 
     def post(self, request):
         """Create a new order, restricted to authenticated customers."""
-        if not Profile.objects.filter(user=request.user, type='customer').exists():
-            return Response({'error': 'Only customers can create orders'}, status=status.HTTP_403_FORBIDDEN)
         serializer = OrderCreateSerializer(data=request.data, context={'request': request})
-        if serializer.is_valid():
-            order = serializer.save()
-            data = OrderSerializer(order).data
-            data['offer_detail_id'] = serializer.validated_data['offer_detail_id']
-            return Response(data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        valid = serializer.is_valid()
+        # A valid payload already read the customer check along with the offer detail.
+        if valid:
+            is_customer = serializer.validated_data['offer_detail'].ordered_by_customer
+        else:
+            is_customer = Profile.objects.filter(user=request.user, type='customer').exists()
+        if not is_customer:
+            return Response({'error': 'Only customers can create orders'}, status=status.HTTP_403_FORBIDDEN)
+        if not valid:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        order = serializer.save()
+        data = OrderSerializer(order).data
+        data['offer_detail_id'] = serializer.validated_data['offer_detail_id']
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class OrderBatchCreateView(APIView):
+    """View for checking out several offer details at once, restricted to authenticated customers."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Create one order per listed offer detail, all or none, and return them in the listed order."""
+        serializer = OrderBatchCreateSerializer(data=request.data, context={'request': request})
+        valid = serializer.is_valid()
+        # A valid payload already read the customer check along with the offer details.
+        if valid:
+            is_customer = serializer.validated_data['offer_details'][0].ordered_by_customer
+        else:
+            is_customer = Profile.objects.filter(user=request.user, type='customer').exists()
+        if not is_customer:
+            return Response({'error': 'Only customers can create orders'}, status=status.HTTP_403_FORBIDDEN)
+        if not valid:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        orders = serializer.save()
+        data = OrderSerializer(orders, many=True).data
+        for item, offer_detail_id in zip(data, serializer.validated_data['offer_detail_ids']):
+            item['offer_detail_id'] = offer_detail_id
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class OrderBulkStatusView(APIView):
+    """View for changing the status of many orders of the authenticated business user at once."""
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request):
+        """Apply the status to the listed orders the user owns; other ids are reported as rejected."""
+        serializer = OrderBulkStatusSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
 
 
 class OrderSpecificView(DestroyAPIView, UpdateAPIView):
@@ -74,22 +188,110 @@ class OrderSpecificView(DestroyAPIView, UpdateAPIView):
         return Response({'detail': 'Order deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
 
 
+def status_count_response(business_user_id, status_name, key):
+    """Answer a single-status count endpoint from the counter table."""
+    counts = get_order_counts([business_user_id]).get(business_user_id)
+    if counts is None:
+        return Response({'error': 'Business user not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({key: counts[status_name]}, status=status.HTTP_200_OK)
+
+
 class OrderCountView(APIView):
     """View for counting in-progress orders for a business user."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, business_user_id):
-        if not User.objects.filter(id=business_user_id).exists():
-            return Response({'error': 'Business user not found'}, status=status.HTTP_404_NOT_FOUND)
-        count = Order.objects.filter(business_user_id=business_user_id, status='in_progress').count()
-        return Response({'order_count': count}, status=status.HTTP_200_OK)
+        return status_count_response(business_user_id, 'in_progress', 'order_count')
 
 class CompletedOrderCountView(APIView):
     """View for counting completed orders for a business user."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request, business_user_id):
+        return status_count_response(business_user_id, 'completed', 'completed_order_count')
+
+
+class OrderStatusCountsView(APIView):
+    """View for the order counts of every status, for one business user or many at once."""
+    permission_classes = [IsAuthenticated]
+    max_business_users = 100
+
+    def get(self, request, business_user_id=None):
+        if business_user_id is not None:
+            counts = get_order_counts([business_user_id]).get(business_user_id)
+            if counts is None:
+                return Response({'error': 'Business user not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'business_user': business_user_id, **counts}, status=status.HTTP_200_OK)
+        try:
+            business_user_ids = [int(value) for value in parse_field_list(request.query_params.get('business_user_ids', ''))]
+        except ValueError:
+            raise exceptions.ValidationError({'business_user_ids': 'Invalid value'})
+        if not business_user_ids or len(business_user_ids) > self.max_business_users:
+            raise exceptions.ValidationError({'business_user_ids': f'Give 1 to {self.max_business_users} ids.'})
+        counts = get_order_counts(business_user_ids)
+        # Unknown users are left out; the rest keep the requested order.
+        results = [
+            {'business_user': business_user_id, **counts[business_user_id]}
+            for business_user_id in dict.fromkeys(business_user_ids) if business_user_id in counts
+        ]
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class BusinessTimeseriesView(APIView):
+    """View for a business user's orders and revenue per day or week, read from the daily rollups.
+
+    ?period=day|week, ?start= and ?end= (YYYY-MM-DD, inclusive; the last 30 days or 12 weeks by default),
+    ?status= (in_progress and completed by default) and ?offer_type= take comma-separated lists.
+    """
+    permission_classes = [IsAuthenticated]
+    max_periods = 366
+    default_statuses = ['in_progress', 'completed']
+
+    def get(self, request, business_user_id):
+        if request.user.id != business_user_id and not request.user.is_staff:
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         if not User.objects.filter(id=business_user_id).exists():
             return Response({'error': 'Business user not found'}, status=status.HTTP_404_NOT_FOUND)
-        count = Order.objects.filter(business_user_id=business_user_id, status='completed').count()
-        return Response({'completed_order_count': count}, status=status.HTTP_200_OK)
\ No newline at end of file
+        params = self.parse_params(request.query_params)
+        series = order_timeseries(business_user_id, **params)
+        for bucket in series:
+            bucket['revenue'] = f'{bucket["revenue"]:.2f}'
+            for totals in bucket['offer_types'].values():
+                totals['revenue'] = f'{totals["revenue"]:.2f}'
+        return Response({
+            'business_user': business_user_id,
+            'period': params['period'],
+            'start': params['start'],
+            'end': params['end'],
+            'series': series,
+        }, status=status.HTTP_200_OK)
+
+    def parse_params(self, query_params):
+        """Validate the query parameters; invalid values raise a 400 keyed by parameter."""
+        period = query_params.get('period', 'day')
+        if period not in PERIODS:
+            raise exceptions.ValidationError({'period': 'Invalid value'})
+        dates = {}
+        for name in ('start', 'end'):
+            try:
+                dates[name] = parse_date(query_params[name]) if name in query_params else None
+            except ValueError:
+                dates[name] = None
+            if name in query_params and dates[name] is None:
+                raise exceptions.ValidationError({name: 'Invalid value'})
+        end = dates['end'] or timezone.localdate()
+        start = dates['start'] or end - timedelta(days=29 if period == 'day' else 7 * 11 + end.weekday())
+        periods = (end - start).days // (7 if period == 'week' else 1) + 1
+        if start > end or periods > self.max_periods:
+            raise exceptions.ValidationError({'start': 'Invalid value'})
+        filters = {
+            'status': (parse_field_list(query_params.get('status', '')) or self.default_statuses, STATUSES),
+            'offer_type': (parse_field_list(query_params.get('offer_type', '')) or OFFER_TYPES, OFFER_TYPES),
+        }
+        for name, (values, choices) in filters.items():
+            if not set(values) <= set(choices):
+                raise exceptions.ValidationError({name: 'Invalid value'})
+        return {
+            'period': period, 'start': start, 'end': end,
+            'statuses': filters['status'][0], 'offer_types': filters['offer_type'][0],
+        }
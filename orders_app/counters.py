@@ -0,0 +1,93 @@
+"""Per-business order counters by status, adjusted in the same transaction as the order write.
+
+Order saves and deletes adjust the counters through signals. Queryset-level bulk_create() and update() bypass
+them, so code using those adjusts the counters itself; the rebuild_order_counts command verifies and repairs them.
+"""
+
+import logging
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.contrib.auth.models import User
+from .models import Order, OrderStatusCount
+from .rollups import add_to_rollups
+
+logger = logging.getLogger(__name__)
+
+STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+
+
+def adjust_order_count(business_user_id, status, delta):
+    """Add delta to a counter, creating it on the first order; a decrement that would go below zero is logged."""
+    counters = OrderStatusCount.objects.filter(business_user_id=business_user_id, status=status)
+    if delta < 0:
+        if not counters.filter(count__gte=-delta).update(count=F('count') + delta):
+            # The counter has drifted from the orders table; it is left as is for rebuild_order_counts to repair.
+            logger.warning(
+                'Order counter of business user %s for status %s is below %s; run rebuild_order_counts.',
+                business_user_id, status, -delta
+            )
+        return
+    if counters.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            OrderStatusCount.objects.create(business_user_id=business_user_id, status=status, count=delta)
+    except IntegrityError:
+        # A concurrent write created the counter first.
+        counters.update(count=F('count') + delta)
+
+
+def count_created_orders(orders):
+    """Count orders inserted with bulk_create(), which sends no post_save signals, in the counters and rollups."""
+    created = Counter((order.business_user_id, order.status) for order in orders)
+    for (business_user_id, status), count in sorted(created.items()):
+        adjust_order_count(business_user_id, status, count)
+    add_to_rollups([order.tracked_values() for order in orders])
+
+
+def get_order_counts(business_user_ids):
+    """Return {business_user_id: {status: count}} for the given ids that belong to existing users."""
+    counts = {}
+    for business_user_id, status, count in OrderStatusCount.objects.filter(
+        business_user_id__in=business_user_ids
+    ).values_list('business_user_id', 'status', 'count'):
+        counts.setdefault(business_user_id, dict.fromkeys(STATUSES, 0))[status] = count
+    # A user without counter rows has no orders yet, if the user exists at all.
+    missing = set(business_user_ids) - set(counts)
+    for business_user_id in User.objects.filter(id__in=missing).values_list('id', flat=True):
+        counts[business_user_id] = dict.fromkeys(STATUSES, 0)
+    return counts
+
+
+def count_orders():
+    """Count orders per (business_user_id, status) from the orders table."""
+    rows = Order.objects.order_by().values_list('business_user_id', 'status').annotate(count=Count('id'))
+    return {(business_user_id, status): count for business_user_id, status, count in rows}
+
+
+def stored_order_counts():
+    rows = OrderStatusCount.objects.values_list('business_user_id', 'status', 'count')
+    return {(business_user_id, status): count for business_user_id, status, count in rows if count}
+
+
+def verify_order_counts():
+    """Return {(business_user_id, status): (stored, actual)} for every counter that differs from the orders table."""
+    actual = count_orders()
+    stored = stored_order_counts()
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in actual.keys() | stored.keys()
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+
+def rebuild_order_counts():
+    """Recount every counter from the orders table in one transaction; returns the counters that were wrong."""
+    with transaction.atomic():
+        mismatches = verify_order_counts()
+        for (business_user_id, status), (_, actual) in mismatches.items():
+            OrderStatusCount.objects.update_or_create(
+                business_user_id=business_user_id, status=status, defaults={'count': actual}
+            )
+    return mismatches
@@ -0,0 +1,62 @@
+"""Management command to benchmark the order list as a full list, a cursor page and a stream."""
+
+import time
+import tracemalloc
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.benchmarks import benchmark_database
+from orders_app.api.views import OrderListView
+from orders_app.models import Order
+
+# Query parameters of the timed requests.
+SCENARIOS = [
+    ('full list', {}),
+    ('cursor page', {'pagination': 'cursor', 'page_size': 100}),
+    ('stream', {'stream': 'true'}),
+]
+
+
+class Command(BaseCommand):
+    """Report time and peak memory per request for one business account of growing order history."""
+    help = 'Benchmark full, cursor-paginated and streamed order lists on a throwaway database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help='Orders of the benchmarked account.')
+
+    def handle(self, *args, **options):
+        with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            customer = User.objects.create_user(username='customer')
+            business = User.objects.create_user(username='business')
+            view = OrderListView.as_view()
+            created = 0
+            for size in sorted(options['sizes']):
+                created = self.populate(customer, business, created, size)
+                for name, params in SCENARIOS:
+                    request = APIRequestFactory().get('/', params)
+                    force_authenticate(request, user=business)
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    response = view(request)
+                    # Consume the body the way the server would, without keeping it.
+                    written = sum(len(chunk) for chunk in response) if response.streaming else len(response.render().content)
+                    elapsed = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f'{size:>9} orders  {name:<12} {elapsed:.2f}s  {written / 2 ** 20:.1f}MB sent  peak={peak / 2 ** 20:.1f}MB'
+                    )
+
+    def populate(self, customer, business, created, size, batch_size=5000):
+        while created < size:
+            count = min(batch_size, size - created)
+            Order.objects.bulk_create([
+                Order(
+                    customer_user=customer, business_user=business, title='Logo Design', revisions=3,
+                    delivery_time_in_days=5, price=150, features=['Logo Design', 'Visitenkarten'], offer_type='basic'
+                )
+                for _ in range(count)
+            ])
+            created += count
+        return created
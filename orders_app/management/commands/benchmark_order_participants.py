@@ -0,0 +1,87 @@
+"""Management command to benchmark the customer-or-business order query as an OR filter and as a UNION ALL."""
+
+import random
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from core.benchmarks import benchmark_database, time_call
+from orders_app.models import Order
+
+
+def or_page(user, page_size, before=None):
+    """The list query as it was: one OR filter, which the database sorts in full before taking a page."""
+    queryset = Order.objects.filter(Q(customer_user=user) | Q(business_user=user))
+    if before is not None:
+        queryset = queryset.filter(created_at__lt=before)
+    return list(queryset.order_by('-created_at', '-id')[:page_size])
+
+
+def union_page(user, page_size, before=None):
+    """The list query as OrderListView builds it: two index range scans merged by a UNION ALL."""
+    queryset = Order.objects.all() if before is None else Order.objects.filter(created_at__lt=before)
+    as_customer = queryset.filter(customer_user=user)
+    as_business = queryset.filter(business_user=user).exclude(customer_user=user)
+    return list(as_customer.union(as_business, all=True).order_by('-created_at', '-id')[:page_size])
+
+
+class Command(BaseCommand):
+    """Time the first and a deep page of one busy account's orders in a table of many accounts."""
+    help = 'Benchmark the order list query as OR and UNION ALL on a throwaway database at several table sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000], help='Total orders to test.')
+        parser.add_argument('--users', type=int, default=1000, help='Accounts the orders are spread over.')
+        parser.add_argument('--share', type=float, default=0.05, help='Share of orders the benchmarked account takes part in.')
+        parser.add_argument('--page-size', type=int, default=100, help='Orders per page.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; the median is reported.')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            users = User.objects.bulk_create([User(username=f'user{index}') for index in range(options['users'])])
+            user_ids = [user.id for user in users]
+            account = users[0]
+            rng = random.Random(42)
+            origin = timezone.now() - timedelta(seconds=max(options['sizes']))
+            created = 0
+            for size in sorted(options['sizes']):
+                created = self.populate(rng, user_ids, options['share'], origin, created, size)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+                involved = Order.objects.filter(Q(customer_user=account) | Q(business_user=account)).count()
+                deep = Order.objects.filter(Q(customer_user=account) | Q(business_user=account)).order_by('created_at')
+                before = deep.values_list('created_at', flat=True)[involved // 2]
+                self.stdout.write(f'{size:>9} orders  account orders={involved}')
+                for name, page in [('or', or_page), ('union all', union_page)]:
+                    first_ms = time_call(lambda: page(account, options['page_size']), repeat=options['repeat'])
+                    deep_ms = time_call(lambda: page(account, options['page_size'], before), repeat=options['repeat'])
+                    self.stdout.write(f'{"":>9}         {name:<10} first page={first_ms:.1f}ms  middle page={deep_ms:.1f}ms')
+
+    def populate(self, rng, user_ids, share, origin, created, size, batch_size=50_000):
+        """Insert orders one second apart with executemany; the first account is customer or business on share of them."""
+        quote = connection.ops.quote_name
+        columns = [
+            'customer_user_id', 'business_user_id', 'title', 'revisions', 'delivery_time_in_days', 'price',
+            'features', 'offer_type', 'status', 'created_at', 'updated_at'
+        ]
+        sql = (
+            f'INSERT INTO {quote(Order._meta.db_table)} ({", ".join(quote(column) for column in columns)}) '
+            f'VALUES ({", ".join(["%s"] * len(columns))})'
+        )
+        while created < size:
+            rows = []
+            for index in range(created, min(created + batch_size, size)):
+                customer, business = rng.sample(user_ids[1:], 2)
+                if rng.random() < share:
+                    if rng.random() < 0.5:
+                        customer = user_ids[0]
+                    else:
+                        business = user_ids[0]
+                timestamp = connection.ops.adapt_datetimefield_value(origin + timedelta(seconds=index))
+                rows.append((customer, business, 'Logo Design', 3, 5, '150.00', '["Logo Design"]', 'basic', 'in_progress', timestamp, timestamp))
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            created += len(rows)
+        return created
@@ -0,0 +1,21 @@
+"""Management command to verify or rebuild the per-business order counters."""
+
+from django.core.management.base import BaseCommand, CommandError
+from orders_app.counters import rebuild_order_counts, verify_order_counts
+
+
+class Command(BaseCommand):
+    """Compare the counters with the orders table and fix them, or only report with --verify."""
+    help = 'Recount order counters per business user and status; --verify only reports drift and fails if any.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Report wrong counters without changing them.')
+
+    def handle(self, *args, **options):
+        mismatches = verify_order_counts() if options['verify'] else rebuild_order_counts()
+        for (business_user_id, status), (stored, actual) in sorted(mismatches.items()):
+            self.stdout.write(f'business_user={business_user_id} status={status} stored={stored} actual={actual}')
+        if options['verify'] and mismatches:
+            raise CommandError(f'{len(mismatches)} order counters are out of sync.')
+        action = 'Found' if options['verify'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{action} {len(mismatches)} wrong order counters.'))
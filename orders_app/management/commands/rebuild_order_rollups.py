@@ -0,0 +1,38 @@
+"""Management command to verify, compact or rebuild the daily order rollups."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from orders_app.rollups import compact_order_rollups, rebuild_order_rollups, verify_order_rollups
+
+
+class Command(BaseCommand):
+    """Recompute the rollups from the orders table, only report drift with --verify, or drop empty rows with --compact."""
+    help = 'Rebuild the daily order rollups, all or from --since on; --verify reports drift, --compact deletes empty rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day (YYYY-MM-DD) to verify or rebuild; all days by default.')
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--verify', action='store_true', help='Report wrong rollup rows without changing them.')
+        mode.add_argument('--compact', action='store_true', help='Delete rows emptied by status changes, without recounting.')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError(f'Invalid date: {options["since"]}')
+        if options['compact']:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {compact_order_rollups()} empty rollup rows.'))
+            return
+        if options['verify']:
+            mismatches = verify_order_rollups(since)
+            for key, (stored, actual) in sorted(mismatches.items()):
+                self.stdout.write(f'{key} stored={stored} actual={actual}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} order rollup rows are out of sync.')
+            self.stdout.write(self.style.SUCCESS('Order rollups match the orders table.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuild_order_rollups(since)} order rollup rows.'))
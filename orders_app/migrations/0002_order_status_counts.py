@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_order_counts(apps, schema_editor):
+    """Count the existing orders per business user and status."""
+    Order = apps.get_model('orders_app', 'Order')
+    OrderStatusCount = apps.get_model('orders_app', 'OrderStatusCount')
+    rows = Order.objects.order_by().values_list('business_user_id', 'status').annotate(count=Count('id'))
+    OrderStatusCount.objects.bulk_create([
+        OrderStatusCount(business_user_id=business_user_id, status=status, count=count)
+        for business_user_id, status, count in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('business_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_status_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business_user', 'status'), name='orderstatuscount_user_status_unique')],
+            },
+        ),
+        migrations.RunPython(populate_order_counts, migrations.RunPython.noop),
+    ]
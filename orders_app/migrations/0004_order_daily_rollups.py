@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_order_rollups(apps, schema_editor):
+    """Aggregate the existing orders per business user, day, offer type and status."""
+    Order = apps.get_model('orders_app', 'Order')
+    OrderDailyRollup = apps.get_model('orders_app', 'OrderDailyRollup')
+    rows = Order.objects.order_by().values_list('business_user_id', TruncDate('created_at'), 'offer_type', 'status').annotate(
+        count=Count('id'), revenue=Sum('price')
+    )
+    OrderDailyRollup.objects.bulk_create([
+        OrderDailyRollup(
+            business_user_id=business_user_id, day=day, offer_type=offer_type, status=status, count=count, revenue=revenue
+        )
+        for business_user_id, day, offer_type, status, count, revenue in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0003_order_participant_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('offer_type', models.CharField(choices=[('basic', 'Basic'), ('standard', 'Standard'), ('premium', 'Premium')], max_length=20)),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('business_user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='order_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business_user', 'day', 'offer_type', 'status'), name='orderdailyrollup_key_unique')],
+            },
+        ),
+        migrations.RunPython(populate_order_rollups, migrations.RunPython.noop),
+    ]
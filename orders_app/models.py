@@ -1,6 +1,6 @@
 """Django model for orders in the orders_app."""
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class Order(models.Model):
@@ -17,8 +17,9 @@ class Order(models.Model):
         ('standard', 'Standard'),
         ('premium', 'Premium'),
     )
-    customer_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='customer_orders')
-    business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='business_orders')
+    # The composite indexes in Meta start with these columns, so separate foreign key indexes would be redundant.
+    customer_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='customer_orders', db_index=False)
+    business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='business_orders', db_index=False)
     title = models.CharField(max_length=200)
     revisions = models.PositiveIntegerField()
     delivery_time_in_days = models.PositiveIntegerField()
@@ -29,5 +30,60 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Each side of a user's order list is one range scan, already in created_at order, of one of these indexes.
+        indexes = [
+            models.Index(fields=['customer_user', 'created_at'], name='order_customer_created_idx'),
+            models.Index(fields=['business_user', 'created_at'], name='order_business_created_idx'),
+        ]
+
     def __str__(self):
-        return f"Order {self.id} for {self.title} by {self.customer_user.username}"
\ No newline at end of file
+        return f"Order {self.id} for {self.title} by {self.customer_user.username}"
+
+    # Columns the order counters and daily rollups are keyed by or sum up.
+    TRACKED_FIELDS = ('business_user_id', 'status', 'created_at', 'offer_type', 'price')
+
+    def tracked_values(self):
+        """Return the TRACKED_FIELDS values, with the price as the Decimal the database stores."""
+        values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+        values['price'] = self._meta.get_field('price').to_python(values['price'])
+        return tuple(values.values())
+
+    def save(self, *args, **kwargs):
+        # The pre_save row lock and the post_save counter update run inside this transaction, so the order and its
+        # counter commit together.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class OrderStatusCount(models.Model):
+    """Materialized number of a business user's orders per status, kept current by orders_app.counters."""
+    business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='order_status_counts')
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['business_user', 'status'], name='orderstatuscount_user_status_unique'),
+        ]
+
+
+class OrderDailyRollup(models.Model):
+    """Number and revenue of a business user's orders per creation day, offer type and status.
+
+    Kept current by orders_app.rollups alongside the order counters; days are in the TIME_ZONE setting.
+    """
+    # The unique constraint starts with this column, so a separate foreign key index would be redundant.
+    business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='order_rollups', db_index=False)
+    day = models.DateField()
+    offer_type = models.CharField(max_length=20, choices=Order.OFFER_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['business_user', 'day', 'offer_type', 'status'], name='orderdailyrollup_key_unique'
+            ),
+        ]
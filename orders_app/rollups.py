@@ -0,0 +1,164 @@
+"""Daily order rollups per business user, offer type and status, and the revenue time series built from them.
+
+Like the order counters, rollups are adjusted in the same transaction as the order write: by signals for
+order saves and deletes, and explicitly by code using bulk_create() or queryset update(). Orders are given
+as Order.TRACKED_FIELDS tuples. Status moves leave empty rows behind, which compact_order_rollups() removes;
+rebuild_order_rollups() recomputes the rows from the orders table.
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Order, OrderDailyRollup
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('day', 'week')
+OFFER_TYPES = [offer_type for offer_type, _ in Order.OFFER_TYPE_CHOICES]
+ZERO = Decimal('0.00')
+
+
+def adjust_rollup(business_user_id, day, offer_type, status, count, revenue):
+    """Add count orders and their revenue to a rollup row, creating it on the first order."""
+    rows = OrderDailyRollup.objects.filter(business_user_id=business_user_id, day=day, offer_type=offer_type, status=status)
+    if count < 0:
+        if not rows.filter(count__gte=-count).update(count=F('count') + count, revenue=F('revenue') + revenue):
+            # As with the counters, drift is left for rebuild_order_rollups to repair rather than stored negative.
+            logger.warning(
+                'Order rollup of business user %s for %s, %s, %s is below %s; run rebuild_order_rollups.',
+                business_user_id, day, offer_type, status, -count
+            )
+        return
+    if rows.update(count=F('count') + count, revenue=F('revenue') + revenue):
+        return
+    try:
+        with transaction.atomic():
+            OrderDailyRollup.objects.create(
+                business_user_id=business_user_id, day=day, offer_type=offer_type, status=status,
+                count=count, revenue=revenue
+            )
+    except IntegrityError:
+        # A concurrent write created the row first.
+        rows.update(count=F('count') + count, revenue=F('revenue') + revenue)
+
+
+def add_to_rollups(orders, sign=1):
+    """Add (sign=1) or remove (sign=-1) orders, given as Order.TRACKED_FIELDS tuples, one update per row touched."""
+    totals = {}
+    for business_user_id, status, created_at, offer_type, price in orders:
+        key = (business_user_id, timezone.localdate(created_at), offer_type, status)
+        count, revenue = totals.get(key, (0, ZERO))
+        totals[key] = (count + 1, revenue + price)
+    for key, (count, revenue) in sorted(totals.items()):
+        adjust_rollup(*key, sign * count, sign * revenue)
+
+
+def day_start(day):
+    """Return the aware datetime a day starts at in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def aggregate_orders(since=None):
+    """Aggregate the orders table into {(business_user_id, day, offer_type, status): (count, revenue)}."""
+    orders = Order.objects.order_by()
+    if since is not None:
+        orders = orders.filter(created_at__gte=day_start(since))
+    rows = orders.values_list('business_user_id', TruncDate('created_at'), 'offer_type', 'status').annotate(
+        count=Count('id'), revenue=Sum('price')
+    )
+    return {
+        (business_user_id, day, offer_type, status): (count, revenue)
+        for business_user_id, day, offer_type, status, count, revenue in rows
+    }
+
+
+def stored_rollups(since=None):
+    rows = OrderDailyRollup.objects.filter(count__gt=0)
+    if since is not None:
+        rows = rows.filter(day__gte=since)
+    return {
+        (business_user_id, day, offer_type, status): (count, revenue)
+        for business_user_id, day, offer_type, status, count, revenue
+        in rows.values_list('business_user_id', 'day', 'offer_type', 'status', 'count', 'revenue')
+    }
+
+
+def verify_order_rollups(since=None):
+    """Return {key: (stored, actual)} for every rollup row, from since on, that differs from the orders table."""
+    actual = aggregate_orders(since)
+    stored = stored_rollups(since)
+    empty = (0, ZERO)
+    return {
+        key: (stored.get(key, empty), actual.get(key, empty))
+        for key in actual.keys() | stored.keys()
+        if stored.get(key, empty) != actual.get(key, empty)
+    }
+
+
+def rebuild_order_rollups(since=None, batch_size=1000):
+    """Replace the rollup rows, all or from since on, with a fresh aggregate in one transaction; returns the row count."""
+    with transaction.atomic():
+        rows = OrderDailyRollup.objects.all()
+        if since is not None:
+            rows = rows.filter(day__gte=since)
+        rows.delete()
+        aggregates = aggregate_orders(since)
+        OrderDailyRollup.objects.bulk_create([
+            OrderDailyRollup(
+                business_user_id=business_user_id, day=day, offer_type=offer_type, status=status,
+                count=count, revenue=revenue
+            )
+            for (business_user_id, day, offer_type, status), (count, revenue) in aggregates.items()
+        ], batch_size=batch_size)
+    return len(aggregates)
+
+
+def compact_order_rollups():
+    """Delete the empty rows that status moves leave behind; returns how many were deleted."""
+    deleted, _ = OrderDailyRollup.objects.filter(count=0).delete()
+    return deleted
+
+
+def period_start(day, period):
+    """Return the first day of the day or ISO week (starting Monday) containing day."""
+    return day - timedelta(days=day.weekday()) if period == 'week' else day
+
+
+def order_timeseries(business_user_id, start, end, period='day', statuses=None, offer_types=None):
+    """Return orders and revenue per period from start to end, inclusive, read only from the rollups.
+
+    Every period in the range is listed, with a breakdown by offer type; empty periods count zero.
+    """
+    offer_types = offer_types or OFFER_TYPES
+    rows = OrderDailyRollup.objects.filter(
+        business_user_id=business_user_id, day__range=(start, end), offer_type__in=offer_types
+    )
+    if statuses:
+        rows = rows.filter(status__in=statuses)
+    step = timedelta(days=7 if period == 'week' else 1)
+    series = {}
+    bucket = period_start(start, period)
+    while bucket <= end:
+        series[bucket] = {offer_type: [0, ZERO] for offer_type in offer_types}
+        bucket += step
+    for day, offer_type, count, revenue in rows.values_list('day', 'offer_type').annotate(
+        orders=Sum('count'), total=Sum('revenue')
+    ).order_by():
+        totals = series[period_start(day, period)][offer_type]
+        totals[0] += count
+        totals[1] += revenue
+    return [
+        {
+            'start': bucket,
+            'orders': sum(count for count, _ in by_type.values()),
+            'revenue': sum((revenue for _, revenue in by_type.values()), ZERO),
+            'offer_types': {
+                offer_type: {'orders': count, 'revenue': revenue} for offer_type, (count, revenue) in by_type.items()
+            },
+        }
+        for bucket, by_type in series.items()
+    ]
@@ -0,0 +1,59 @@
+"""Signal handlers for the orders_app to keep the order counters and daily rollups in sync with order writes."""
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .counters import adjust_order_count
+from .models import Order
+from .rollups import add_to_rollups
+
+
+def lock_stored_tracked_values(instance):
+    """Lock an order's row and remember its stored tracked values, or None if it has no row.
+
+    Read under the lock rather than taken from the instance, which may have been loaded before a concurrent
+    PATCH or bulk status update changed the row; the lock is held until the write's transaction commits.
+    """
+    instance._stored_tracked_values = (
+        Order.objects.select_for_update().filter(pk=instance.pk).values_list(*Order.TRACKED_FIELDS).first()
+    )
+
+
+@receiver(pre_save, sender=Order)
+def remember_stored_tracked_values(sender, instance, **kwargs):
+    """Read the stored tracked values of an existing order before it is saved."""
+    if not instance._state.adding:
+        lock_stored_tracked_values(instance)
+
+
+@receiver(pre_delete, sender=Order)
+def remember_deleted_tracked_values(sender, instance, **kwargs):
+    """Read the stored tracked values of an order before it is deleted."""
+    lock_stored_tracked_values(instance)
+
+
+@receiver(post_save, sender=Order)
+def update_order_aggregates_on_save(sender, instance, created, **kwargs):
+    """Count a new order, or move a changed order from its old counter and rollup to its new ones."""
+    values = instance.tracked_values()
+    stored = None if created else getattr(instance, '_stored_tracked_values', None)
+    if stored != values:
+        # The counters are keyed by the first two tracked values, business user and status.
+        if stored is None or stored[:2] != values[:2]:
+            if stored is not None:
+                adjust_order_count(*stored[:2], -1)
+            adjust_order_count(*values[:2], 1)
+        if stored is not None:
+            add_to_rollups([stored], sign=-1)
+        add_to_rollups([values])
+    instance._stored_tracked_values = values
+
+
+@receiver(post_delete, sender=Order)
+def update_order_aggregates_on_delete(sender, instance, **kwargs):
+    """Uncount a deleted order from the counter and rollup it was stored under."""
+    stored = instance._stored_tracked_values
+    if stored is None:
+        # A concurrent delete removed the row first and uncounted it.
+        return
+    adjust_order_count(*stored[:2], -1)
+    add_to_rollups([stored], sign=-1)
@@ -1,6 +1,15 @@
 """Test cases for order-related API endpoints in Django REST Framework, covering happy and unhappy paths."""
 
+import json
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import skipUnless
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
@@ -86,6 +95,147 @@ class OrderTestsHappy(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['business_user'], self.business_user.id)
 
+    def test_get_orders_cursor_paginated_by_status(self):
+        """Test paging through orders newest first with a cursor, filtered by status."""
+        completed = [
+            Order.objects.create(
+                customer_user=self.customer_user, business_user=self.business_user, title=f'Order {index}',
+                revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic', status='completed'
+            )
+            for index in range(3)
+        ]
+        url = reverse('order-list') + '?pagination=cursor&page_size=2&status=completed'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([order['id'] for order in response.data['results']], [completed[2].id, completed[1].id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([order['id'] for order in response.data['results']], [completed[0].id])
+        self.assertIsNone(response.data['next'])
+        response = self.client.get(reverse('order-list') + '?status=in_progress,cancelled')
+        self.assertEqual([order['id'] for order in response.data], [self.order.id])
+
+    def test_get_orders_plain_list_capped(self):
+        """Test that the plain list keeps its array shape, capped at the newest orders with a Link to the rest."""
+        newer = [
+            Order.objects.create(
+                customer_user=self.customer_user, business_user=self.business_user, title=f'Order {index}',
+                revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+            )
+            for index in range(2)
+        ]
+        with self.settings(ORDER_LIST_MAX_RESULTS=2):
+            response = self.client.get(reverse('order-list'))
+            self.assertEqual([order['id'] for order in response.data], [newer[1].id, newer[0].id])
+            next_link = response['Link'].removeprefix('<').removesuffix('>; rel="next"')
+            response = self.client.get(next_link)
+            self.assertEqual([order['id'] for order in response.data['results']], [self.order.id])
+            self.assertIsNone(response.data['next'])
+        response = self.client.get(reverse('order-list'))
+        self.assertEqual(len(response.data), 3)
+        self.assertNotIn('Link', response)
+
+    def test_get_orders_in_both_roles(self):
+        """Test that a user's orders as customer and as business are merged newest first, each listed once."""
+        other = User.objects.create_user(username='other', password='testpass789')
+        as_business = Order.objects.create(
+            customer_user=other, business_user=self.customer_user, title='Sold',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        own = Order.objects.create(
+            customer_user=self.customer_user, business_user=self.customer_user, title='Own',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        Order.objects.create(
+            customer_user=other, business_user=self.business_user, title='Unrelated',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        expected = [own.id, as_business.id, self.order.id]
+        response = self.client.get(reverse('order-list'))
+        self.assertEqual([order['id'] for order in response.data], expected)
+        response = self.client.get(reverse('order-list') + '?pagination=cursor&page_size=2')
+        paged = [order['id'] for order in response.data['results']]
+        response = self.client.get(response.data['next'])
+        self.assertEqual(paged + [order['id'] for order in response.data['results']], expected)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Asserts the SQLite query plan.')
+    def test_order_list_plan_merges_index_scans(self):
+        """Test that the first and later list pages merge participant index scans instead of sorting the orders."""
+        Order.objects.create(
+            customer_user=self.customer_user, business_user=self.business_user, title='Second',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        url = reverse('order-list') + '?pagination=cursor&page_size=1'
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            sql = next(query['sql'] for query in queries if 'UNION ALL' in query['sql'])
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+            self.assertIn('MERGE (UNION ALL)', plan)
+            self.assertIn('USING INDEX order_customer_created_idx', plan)
+            self.assertIn('USING INDEX order_business_created_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+            url = response.data['next']
+
+    def test_get_orders_streamed(self):
+        """Test that a streamed order list matches the regular one."""
+        Order.objects.create(
+            customer_user=self.customer_user, business_user=self.business_user, title='Second',
+            revisions=1, delivery_time_in_days=1, price=10, features=['A'], offer_type='basic'
+        )
+        url = reverse('order-list')
+        expected = json.loads(self.client.get(url).content)
+        response = self.client.get(url + '?stream=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+    def test_order_counters_follow_writes(self):
+        """Test that counters follow order creation, status changes and deletion, and serve the count endpoints."""
+        second = Order.objects.create(
+            customer_user=self.customer_user, business_user=self.business_user, title='Second',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        url = reverse('business-order-counts', kwargs={'business_user_id': self.business_user.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'business_user': self.business_user.id, 'in_progress': 2, 'completed': 0, 'cancelled': 0})
+        self.client.force_authenticate(user=self.business_user)
+        self.client.patch(reverse('order-detail', kwargs={'pk': second.id}), {'status': 'completed'}, format='json')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('completed-order-count', kwargs={'business_user_id': self.business_user.id}))
+        self.assertEqual(response.data, {'completed_order_count': 1})
+        self.order.delete()
+        response = self.client.get(reverse('order-count', kwargs={'business_user_id': self.business_user.id}))
+        self.assertEqual(response.data, {'order_count': 0})
+        url = reverse('order-counts') + f'?business_user_ids={self.business_user.id},{self.customer_user.id},9999'
+        response = self.client.get(url)
+        self.assertEqual(response.data, [
+            {'business_user': self.business_user.id, 'in_progress': 0, 'completed': 1, 'cancelled': 0},
+            {'business_user': self.customer_user.id, 'in_progress': 0, 'completed': 0, 'cancelled': 0},
+        ])
+
+    def test_rebuild_order_counts_command(self):
+        """Test that the rebuild command detects and repairs counters that drifted from the orders."""
+        Order.objects.filter(pk=self.order.pk).update(status='cancelled')
+        with self.assertRaises(CommandError):
+            call_command('rebuild_order_counts', '--verify', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_order_counts', stdout=out)
+        self.assertIn('Fixed 2 wrong order counters.', out.getvalue())
+        call_command('rebuild_order_counts', '--verify', stdout=StringIO())
+        response = self.client.get(reverse('business-order-counts', kwargs={'business_user_id': self.business_user.id}))
+        self.assertEqual(response.data['cancelled'], 1)
+        self.assertEqual(response.data['in_progress'], 0)
+
+    def test_get_orders_sparse_fieldset(self):
+        """Test listing orders with only the requested fields."""
+        url = reverse('order-list') + '?fields=id,status'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': self.order.id, 'status': 'in_progress'}])
+
     def test_create_order_success(self):
         """Test creating an order as a customer using a valid offer detail ID."""
         offer_detail = OfferDetail.objects.create(
@@ -106,6 +256,43 @@ class OrderTestsHappy(APITestCase):
         self.assertEqual(response.data['title'], 'Basic')
         self.assertEqual(response.data['status'], 'in_progress')
 
+    def test_create_order_query_count(self):
+        """Test that creating an order takes one joined read, the insert and the counter and rollup updates."""
+        offer_detail = OfferDetail.objects.create(
+            offer=self.offer, title='Basic', revisions=3, delivery_time_in_days=5,
+            price=150.00, features=['Logo Design'], offer_type='basic'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('order-list'), {'offer_detail_id': offer_detail.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(statements, ['SELECT', 'INSERT', 'UPDATE', 'UPDATE'])
+        self.assertIn('JOIN "offers_app_offer"', queries[0]['sql'])
+
+    def test_batch_create_orders(self):
+        """Test checking out several offer details at once, in one read and one batched insert."""
+        basic, premium = OfferDetail.objects.bulk_create([
+            OfferDetail(offer=self.offer, title='Basic', revisions=1, delivery_time_in_days=5,
+                        price=100, features=['Logo'], offer_type='basic'),
+            OfferDetail(offer=self.offer, title='Premium', revisions=5, delivery_time_in_days=10,
+                        price=300, features=['Logo', 'Flyer'], offer_type='premium'),
+        ])
+        ids = [premium.id, basic.id, premium.id]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('order-batch'), {'offer_detail_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        # One counter update, then one rollup update per offer type; the first premium order creates its row.
+        self.assertEqual(statements, ['SELECT', 'INSERT', 'UPDATE', 'UPDATE', 'UPDATE', 'INSERT'])
+        self.assertEqual([item['offer_detail_id'] for item in response.data], ids)
+        self.assertEqual([item['title'] for item in response.data], ['Premium', 'Basic', 'Premium'])
+        self.assertEqual(response.data[1]['price'], '100.00')
+        self.assertEqual(response.data[0]['features'], ['Logo', 'Flyer'])
+        order = Order.objects.get(pk=response.data[1]['id'])
+        self.assertEqual((order.customer_user, order.business_user, order.status), (self.customer_user, self.business_user, 'in_progress'))
+        response = self.client.get(reverse('order-count', kwargs={'business_user_id': self.business_user.id}))
+        self.assertEqual(response.data, {'order_count': 4})
+
     def test_update_order_status_success(self):
         """Test updating an order's status as the business user."""
         self.client.force_authenticate(user=self.business_user) 
@@ -118,6 +305,100 @@ class OrderTestsHappy(APITestCase):
         self.assertEqual(self.order.status, 'completed')
         self.assertGreater(self.order.updated_at, old_updated_at)
 
+    def test_bulk_update_order_status(self):
+        """Test moving several orders to a status at once, reporting rejected ids and keeping counters in sync."""
+        cancelled = Order.objects.create(
+            customer_user=self.customer_user, business_user=self.business_user, title='Cancelled',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic', status='cancelled'
+        )
+        done = Order.objects.create(
+            customer_user=self.customer_user, business_user=self.business_user, title='Done',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic', status='completed'
+        )
+        foreign = Order.objects.create(
+            customer_user=self.business_user, business_user=self.customer_user, title='Foreign',
+            revisions=1, delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        self.client.force_authenticate(user=self.business_user)
+        data = {'order_ids': [self.order.id, cancelled.id, done.id, foreign.id, 9999], 'status': 'completed'}
+        response = self.client.patch(reverse('order-bulk-status'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'status': 'completed',
+            'updated': [self.order.id, cancelled.id],
+            'unchanged': [done.id],
+            'rejected': [foreign.id, 9999],
+        })
+        self.assertEqual(Order.objects.get(pk=cancelled.pk).status, 'completed')
+        self.assertEqual(Order.objects.get(pk=foreign.pk).status, 'in_progress')
+        self.assertGreater(Order.objects.get(pk=self.order.pk).updated_at, self.order.updated_at)
+        response = self.client.get(reverse('business-order-counts', kwargs={'business_user_id': self.business_user.id}))
+        self.assertEqual(response.data, {'business_user': self.business_user.id, 'in_progress': 0, 'completed': 3, 'cancelled': 0})
+        call_command('rebuild_order_counts', '--verify', stdout=StringIO())
+
+    def test_order_rollups_follow_writes(self):
+        """Test that daily rollups follow order creation, status changes and deletion, and compact when emptied."""
+        second = Order.objects.create(
+            customer_user=self.customer_user, business_user=self.business_user, title='Second',
+            revisions=1, delivery_time_in_days=1, price=49.99, features=[], offer_type='premium'
+        )
+        self.client.force_authenticate(user=self.business_user)
+        self.client.patch(reverse('order-detail', kwargs={'pk': second.id}), {'status': 'completed'}, format='json')
+        self.client.patch(reverse('order-bulk-status'), {'order_ids': [self.order.id], 'status': 'cancelled'}, format='json')
+        call_command('rebuild_order_rollups', '--verify', stdout=StringIO())
+        url = reverse('business-timeseries', kwargs={'business_user_id': self.business_user.id})
+        response = self.client.get(url + '?status=completed,cancelled')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today = response.data['series'][-1]
+        self.assertEqual((today['start'], today['orders'], today['revenue']), (timezone.localdate(), 2, '199.99'))
+        self.assertEqual(today['offer_types']['premium'], {'orders': 1, 'revenue': '49.99'})
+        self.order.delete()
+        call_command('rebuild_order_rollups', '--verify', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_order_rollups', '--compact', stdout=out)
+        self.assertIn('Deleted 3 empty rollup rows.', out.getvalue())
+        call_command('rebuild_order_rollups', '--verify', stdout=StringIO())
+
+    def test_order_aggregates_follow_stale_instance_writes(self):
+        """Test that saving an order loaded before a bulk status change moves it from its stored status."""
+        stale = Order.objects.get(pk=self.order.pk)
+        self.client.force_authenticate(user=self.business_user)
+        self.client.patch(reverse('order-bulk-status'), {'order_ids': [self.order.id], 'status': 'cancelled'}, format='json')
+        stale.status = 'completed'
+        stale.save()
+        response = self.client.get(reverse('business-order-counts', kwargs={'business_user_id': self.business_user.id}))
+        self.assertEqual(response.data, {'business_user': self.business_user.id, 'in_progress': 0, 'completed': 1, 'cancelled': 0})
+        call_command('rebuild_order_counts', '--verify', stdout=StringIO())
+        call_command('rebuild_order_rollups', '--verify', stdout=StringIO())
+        stale.delete()
+        call_command('rebuild_order_counts', '--verify', stdout=StringIO())
+        call_command('rebuild_order_rollups', '--verify', stdout=StringIO())
+
+    def test_business_timeseries_weekly(self):
+        """Test weekly revenue from rebuilt rollups, with empty weeks listed and only the rollups queried."""
+        other = Order.objects.create(
+            customer_user=self.customer_user, business_user=self.business_user, title='Second',
+            revisions=1, delivery_time_in_days=1, price=50, features=[], offer_type='standard'
+        )
+        Order.objects.filter(pk=self.order.pk).update(created_at=datetime(2026, 9, 2, 12, tzinfo=dt_timezone.utc))
+        Order.objects.filter(pk=other.pk).update(created_at=datetime(2026, 9, 17, 12, tzinfo=dt_timezone.utc))
+        out = StringIO()
+        call_command('rebuild_order_rollups', stdout=out)
+        self.assertIn('Rebuilt 2 order rollup rows.', out.getvalue())
+        self.client.force_authenticate(user=self.business_user)
+        url = reverse('business-timeseries', kwargs={'business_user_id': self.business_user.id})
+        with self.assertNumQueries(2):
+            response = self.client.get(url + '?period=week&start=2026-09-01&end=2026-09-20')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        series = [(bucket['start'].isoformat(), bucket['orders'], bucket['revenue']) for bucket in response.data['series']]
+        self.assertEqual(series, [
+            ('2026-08-31', 1, '150.00'), ('2026-09-07', 0, '0.00'), ('2026-09-14', 1, '50.00')
+        ])
+        response = self.client.get(url + '?start=2026-09-01&end=2026-09-30&offer_type=standard')
+        self.assertEqual(len(response.data['series']), 30)
+        self.assertEqual(sum(bucket['orders'] for bucket in response.data['series']), 1)
+        self.assertEqual(list(response.data['series'][16]['offer_types']), ['standard'])
+
     def test_delete_order_success(self):
         """Test deleting an order as a staff user."""
         self.business_user.is_staff = True
@@ -197,6 +478,13 @@ class OrderTestsUnhappy(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_get_orders_invalid_status(self):
+        """Test that filtering by an unknown status is rejected."""
+        url = reverse('order-list') + '?status=shipped'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'status': 'Invalid value'})
+
     def test_create_order_non_customer(self):
         """Test creating an order as a non-customer user."""
         Profile.objects.filter(user=self.customer_user).update(type='business')
@@ -213,6 +501,21 @@ class OrderTestsUnhappy(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(str(response.data['offer_detail_id'][0]), 'Offer detail not found.')
 
+    def test_batch_create_orders_invalid(self):
+        """Test that a checkout with an unknown offer detail or no items creates no orders."""
+        detail = OfferDetail.objects.create(
+            offer=self.offer, title='Basic', revisions=1, delivery_time_in_days=5, price=100, features=[], offer_type='basic'
+        )
+        response = self.client.post(reverse('order-batch'), {'offer_detail_ids': [detail.id, 999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(str(response.data['offer_detail_ids'][1][0]), 'Offer detail not found.')
+        response = self.client.post(reverse('order-batch'), {'offer_detail_ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.filter(title='Basic').exists())
+        Profile.objects.filter(user=self.customer_user).update(type='business')
+        response = self.client.post(reverse('order-batch'), {'offer_detail_ids': [detail.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_create_order_unauthenticated(self):
         """Test creating an order without authentication."""
         self.client.force_authenticate(user=None)
@@ -239,6 +542,43 @@ class OrderTestsUnhappy(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('"invalid" is not a valid choice.', str(response.data['status']))
 
+    def test_bulk_update_order_status_invalid(self):
+        """Test that a bulk status change with an unknown status or no ids is rejected."""
+        self.client.force_authenticate(user=self.business_user)
+        url = reverse('order-bulk-status')
+        response = self.client.patch(url, {'order_ids': [self.order.id], 'status': 'shipped'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+        response = self.client.patch(url, {'order_ids': [], 'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'in_progress')
+
+    def test_business_timeseries_invalid(self):
+        """Test that the time series rejects bad parameters, other users' series and unknown users."""
+        self.client.force_authenticate(user=self.business_user)
+        url = reverse('business-timeseries', kwargs={'business_user_id': self.business_user.id})
+        for query in ['?period=month', '?start=2026-13-01', '?start=2026-10-02&end=2026-10-01', '?start=2020-01-01&end=2026-01-01', '?status=shipped']:
+            response = self.client.get(url + query)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+        response = self.client.get(reverse('business-timeseries', kwargs={'business_user_id': self.customer_user.id}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.business_user.is_staff = True
+        self.business_user.save()
+        response = self.client.get(reverse('business-timeseries', kwargs={'business_user_id': 9999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_order_with_drifted_counters(self):
+        """Test that uncounting an order from a counter already at zero is logged and left for the rebuild."""
+        # A queryset update bypasses the counters and rollups, so the cancelled ones never counted the order.
+        Order.objects.filter(pk=self.order.pk).update(status='cancelled')
+        with self.assertLogs('orders_app', level='WARNING') as logs:
+            self.order.delete()
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn('run rebuild_order_counts', logs.output[0])
+        self.assertIn('run rebuild_order_rollups', logs.output[1])
+        with self.assertRaises(CommandError):
+            call_command('rebuild_order_counts', '--verify', stdout=StringIO())
+
     def test_update_order_unauthenticated(self):
         """Test updating an order without authentication."""
         self.client.force_authenticate(user=None)
@@ -284,6 +624,15 @@ class OrderTestsUnhappy(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_order_counts_invalid_ids(self):
+        """Test that the combined count endpoint rejects malformed or missing business user ids."""
+        response = self.client.get(reverse('order-counts') + '?business_user_ids=1,abc')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('order-counts'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('business-order-counts', kwargs={'business_user_id': 9999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_completed_order_count_not_found(self):
         """Test retrieving completed order count for a non-existent business user."""
         url = reverse('completed-order-count', kwargs={'business_user_id': 999})
@@ -3,6 +3,8 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from profiles_app.models import Profile
+from core.fieldsets import SparseFieldsetSerializerMixin
+from core.images import variant_urls
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -15,8 +17,10 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializes Profile model data, including nested user information and image uploads."""
+    # Output fields assembled in to_representation() from the nested user or the model directly.
+    sparse_sources = {'user': (), 'username': ('user',), 'email': ('user',), 'file_variants': ()}
     user = UserSerializer()
     created_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%SZ', read_only=True)
     file = serializers.ImageField(allow_null=True, required=False)
@@ -47,20 +51,28 @@ class ProfileSerializer(serializers.ModelSerializer):
         representation = super().to_representation(instance)
         non_nullable_fields = ['first_name', 'last_name', 'location', 'tel', 'description', 'working_hours']
         for field in non_nullable_fields:
-            if representation[field] is None:
+            if representation.get(field, '') is None:
                 representation[field] = ''
-        if instance.file:
-            request = self.context.get('request', None)
-            if request is not None:
-                representation['file'] = request.build_absolute_uri(instance.file.url)
+        if 'file' in representation:
+            if instance.file:
+                request = self.context.get('request', None)
+                if request is not None:
+                    representation['file'] = request.build_absolute_uri(instance.file.url)
+                else:
+                    representation['file'] = instance.file.url
             else:
-                representation['file'] = instance.file.url
-        else:
-            representation['file'] = None
-        user_data = representation.pop('user')
-        representation['user'] = instance.user.id
-        representation['username'] = user_data['username']
-        representation['email'] = user_data['email']
+                representation['file'] = None
+        if self.wants('file_variants'):
+            representation['file_variants'] = variant_urls(instance.file, instance.file_variants, self.context.get('request', None))
+        # Skipped when no user field was selected, which spares the join to the user table.
+        user_data = representation.pop('user', None)
+        if self.wants('user'):
+            representation['user'] = instance.user_id
+        if user_data is not None:
+            if self.wants('username'):
+                representation['username'] = user_data['username']
+            if self.wants('email'):
+                representation['email'] = user_data['email']
         return representation
 
     def update(self, instance, validated_data):
@@ -1,5 +1,6 @@
 """API views for managing profiles in Django REST Framework, including detail retrieval, updates, and lists by type."""
 
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
@@ -7,6 +8,8 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from profiles_app.models import Profile
+from core.conditional import build_validators, check_if_match, claim_version, not_modified_response, set_validator_headers
+from core.fieldsets import FieldSource, SparseFieldsetViewMixin
 from .serializers import ProfileSerializer, BusinessProfileSerializer, CustomerProfileSerializer
 
 
@@ -15,42 +18,78 @@ class ProfileDetailView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
+    def get_validators(self, user_id, updated_at):
+        """Derive ETag and Last-Modified from the profile's updated_at."""
+        if updated_at is None:
+            return None
+        return build_validators(user_id, updated_at, last_modified=updated_at)
+
     def get(self, request, pk):
-        """Retrieve a profile by user ID."""
+        """Retrieve a profile by user ID, answering 304 when the client's copy is current."""
+        # Read only the timestamp first so unchanged profiles are answered without serializing.
+        updated_at = Profile.objects.filter(user__id=pk).values_list('updated_at', flat=True).first()
+        validators = self.get_validators(pk, updated_at)
+        not_modified = not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
         try:
-            profile = Profile.objects.get(user__id=pk)
+            profile = Profile.objects.select_related('user').get(user__id=pk)
             serializer = ProfileSerializer(profile)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return set_validator_headers(Response(serializer.data, status=status.HTTP_200_OK), validators)
         except Profile.DoesNotExist:
             return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
 
     def patch(self, request, pk):
-        """Update a profile, restricted to the owner."""
+        """Update a profile, restricted to the owner and to the version named in If-Match."""
         # Ensure only the profile owner can perform updates.
         if request.user.id != pk:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         try:
-            profile = Profile.objects.get(user__id=pk)
+            profile = Profile.objects.get(user_id=pk)
+            conditional = check_if_match(request, self.get_validators(pk, profile.updated_at))
             serializer = ProfileSerializer(profile, data=request.data, partial=True)
-            if serializer.is_valid():
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                if conditional:
+                    # Fails with 412 if another write moved the profile off the version checked above.
+                    claim_version(profile)
                 serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            response = Response(serializer.data, status=status.HTTP_200_OK)
+            return set_validator_headers(response, self.get_validators(pk, profile.updated_at))
         except Profile.DoesNotExist:
             return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class BusinessProfileListView(ListAPIView):
-    """View for listing business profiles."""
+class ProfileListView(SparseFieldsetViewMixin, ListAPIView):
+    """Base view for the profile lists, which support sparse fieldsets."""
     permission_classes = [IsAuthenticated]
+    pagination_class = None
+    field_sources = {
+        'user': FieldSource(('user',)),
+        'username': FieldSource(('user', 'user__username', 'user__email'), select_related=('user',)),
+        'first_name': FieldSource(('first_name',)),
+        'last_name': FieldSource(('last_name',)),
+        'file': FieldSource(('file',)),
+        'file_variants': FieldSource(('file', 'file_variants')),
+        'location': FieldSource(('location',)),
+        'tel': FieldSource(('tel',)),
+        'description': FieldSource(('description',)),
+        'working_hours': FieldSource(('working_hours',)),
+        'type': FieldSource(('type',)),
+    }
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(super().get_queryset())
+
+
+class BusinessProfileListView(ProfileListView):
+    """View for listing business profiles."""
     serializer_class = BusinessProfileSerializer
     queryset = Profile.objects.filter(type='business').select_related('user')
-    pagination_class = None
 
 
-class CustomerProfileListView(ListAPIView):
+class CustomerProfileListView(ProfileListView):
     """View for listing customer profiles."""
-    permission_classes = [IsAuthenticated]
     serializer_class = CustomerProfileSerializer
-    queryset = Profile.objects.filter(type='customer').select_related('user')
-    pagination_class = None
\ No newline at end of file
+    queryset = Profile.objects.filter(type='customer').select_related('user')
\ No newline at end of file
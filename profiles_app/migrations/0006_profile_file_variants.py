@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles_app', '0005_profile_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='file_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -19,7 +19,10 @@ class Profile(models.Model):
     working_hours = models.CharField(max_length=50, default='')
     type = models.CharField(max_length=20, choices=USER_TYPE_CHOICES, default='customer')
     file = models.ImageField(upload_to='', null=True, blank=True)
+    # Resized copies of file rendered by core.images, keyed by variant and format.
+    file_variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
@@ -1,12 +1,18 @@
-"""Signal handlers for the profiles_app to automatically create profiles for new users."""
+"""Signal handlers for the profiles_app to create profiles for new users and render profile picture variants."""
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from core.images import schedule_variants
 from .models import Profile
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
     """Create a Profile instance with default values when a new User is created."""
     if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+@receiver(post_save, sender=Profile)
+def render_profile_file_variants(sender, instance, **kwargs):
+    """Queue resized variants of a new or replaced profile picture."""
+    schedule_variants(instance, 'file', 'file_variants')
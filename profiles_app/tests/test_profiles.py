@@ -1,11 +1,21 @@
 """Test cases for profile-related API endpoints in Django REST Framework, covering happy and unhappy paths."""
 
+import tempfile
+from io import BytesIO
+from PIL import Image
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from profiles_app.models import Profile
+from profiles_app.api.views import ProfileDetailView
 from datetime import datetime
+from unittest import mock
 import pytz
 
 
@@ -76,6 +86,7 @@ class ProfileTestsHappy(APITestCase):
             'first_name': 'Max',
             'last_name': 'Mustermann',
             'file': None,
+            'file_variants': None,
             'location': 'Berlin',
             'tel': '123456789',
             'description': 'Business description',
@@ -101,6 +112,38 @@ class ProfileTestsHappy(APITestCase):
         self.assertEqual(self.profile.tel, '987654321')
         self.assertEqual(self.profile.description, 'Updated description')
 
+    def test_get_profile_not_modified(self):
+        """Test that an unchanged profile is answered with 304 and a changed one with a new ETag."""
+        url = reverse('profile-detail', kwargs={'pk': self.user.id})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch(url, {'tel': '111'}, format='json', HTTP_IF_MATCH=etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_get_profile_modified_when_variants_stored(self):
+        """Test that storing rendered picture variants gives the profile a new ETag."""
+        buffer = BytesIO()
+        Image.new('RGB', (400, 300), 'teal').save(buffer, format='PNG')
+        url = reverse('profile-detail', kwargs={'pk': self.user.id})
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANTS_ASYNC=False):
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.profile.file = SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+                self.profile.save()
+            response = self.client.get(url)
+            self.assertIsNone(response.data['file_variants'])
+            etag = response['ETag']
+            for callback in callbacks:
+                callback()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNotNone(response.data['file_variants'])
+
     def test_get_business_profiles_authenticated(self):
         """Test retrieving a list of business profiles as an authenticated user."""
         url = reverse('business-profiles-list')
@@ -122,6 +165,19 @@ class ProfileTestsHappy(APITestCase):
             self.assertNotIn('email', profile)
             self.assertNotIn('created_at', profile)
 
+    def test_get_business_profiles_sparse_fieldset(self):
+        """Test that a profile list limited to profile columns does not join the user table."""
+        url = reverse('business-profiles-list') + '?fields=user,first_name'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        for profile in response.data:
+            self.assertEqual(set(profile), {'user', 'first_name'})
+        self.assertFalse(any('JOIN "auth_user"' in query['sql'] for query in queries))
+        response = self.client.get(reverse('business-profiles-list') + '?fields=username')
+        self.assertIn('testuser', [profile['username'] for profile in response.data])
+
     def test_get_business_profiles_empty_fields(self):
         """Test business profile list handles empty fields correctly."""
         empty_business_user = User.objects.create_user(
@@ -264,6 +320,33 @@ class ProfileTestsUnhappy(APITestCase):
         response = self.client.patch(url, {}, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_patch_profile_stale_if_match(self):
+        """Test that a PATCH based on an outdated version is rejected."""
+        url = reverse('profile-detail', kwargs={'pk': self.user.id})
+        etag = self.client.get(url)['ETag']
+        self.client.patch(url, {'tel': '111'}, format='json')
+        response = self.client.patch(url, {'tel': '222'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.tel, '111')
+
+    def test_patch_profile_stale_after_if_match_check(self):
+        """Test that a PATCH whose profile changes between reading its version and writing is rejected."""
+        url = reverse('profile-detail', kwargs={'pk': self.user.id})
+        etag = self.client.get(url)['ETag']
+        get_validators = ProfileDetailView.get_validators
+
+        def concurrent_write(view, user_id, updated_at):
+            if updated_at == self.profile.updated_at:
+                Profile.objects.filter(pk=self.profile.pk).update(tel='111', updated_at=timezone.now())
+            return get_validators(view, user_id, updated_at)
+
+        with mock.patch.object(ProfileDetailView, 'get_validators', autospec=True, side_effect=concurrent_write):
+            response = self.client.patch(url, {'tel': '222'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.tel, '111')
+
     def test_get_business_profiles_unauthenticated(self):
         """Test retrieving business profiles without authentication."""
         self.client.force_authenticate(user=None)
@@ -4,9 +4,10 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 from reviews_app.models import Review
 from profiles_app.models import Profile
+from core.fieldsets import SparseFieldsetSerializerMixin
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializes review data for API responses, formatting timestamps in ISO format."""
     created_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%SZ', read_only=True)
     updated_at = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%SZ', read_only=True)
@@ -8,13 +8,19 @@ from rest_framework import status
 from reviews_app.models import Review
 from .serializers import ReviewSerializer, ReviewCreateSerializer, ReviewUpdateSerializer
 from profiles_app.models import Profile
+from core.fieldsets import FieldSource, SparseFieldsetViewMixin
 
 
-class ReviewListView(ListAPIView):
+class ReviewListView(SparseFieldsetViewMixin, ListAPIView):
     """View for listing and creating reviews, with no pagination for simple lists."""
     permission_classes = [IsAuthenticated]
     serializer_class = ReviewSerializer
     pagination_class = None
+    field_sources = {
+        name: FieldSource((name,)) for name in [
+            'id', 'business_user', 'reviewer', 'rating', 'description', 'created_at', 'updated_at'
+        ]
+    }
 
     def get_queryset(self):
         """Filter and order reviews based on query parameters."""
@@ -28,7 +34,7 @@ class ReviewListView(ListAPIView):
         ordering = self.request.query_params.get('ordering')
         if ordering in ['updated_at', 'rating']:
             queryset = queryset.order_by(ordering)
-        return queryset.order_by('-updated_at')
+        return self.apply_sparse_fieldset(queryset.order_by('-updated_at'))
 
     def post(self, request):
         """Create a new review, restricted to customer users."""
@@ -112,6 +112,27 @@ class ReviewTestsHappy(APITestCase):
         ]
         self.assertEqual(response.data, expected_data)
 
+    def test_get_reviews_sparse_fieldset(self):
+        """Test that ?omit= drops fields from the review list."""
+        review = Review.objects.create(
+            business_user=self.business_user1,
+            reviewer=self.reviewer,
+            rating=4,
+            description='Sehr professioneller Service.'
+        )
+        url = reverse('review-list') + '?omit=description,created_at,updated_at'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected_data = [
+            {
+                'id': review.id,
+                'business_user': self.business_user1.id,
+                'reviewer': self.reviewer.id,
+                'rating': 4
+            }
+        ]
+        self.assertEqual(response.data, expected_data)
+
     def test_create_review_success(self):
         """Test creating a review as an authenticated customer."""
         url = reverse('review-list')